@@ -0,0 +1,173 @@
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add the src directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from crawl_checkpoint import RUN_COMPLETED
+from mock_rt_server import MockRTServer
+
+DATA_RETRIEVER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_retriever.py')
+
+
+def _run_and_measure(command: list, env: dict, log_path: str) -> tuple[int, int | None]:
+    """
+    Run a command and return its exit code and peak resident set size.
+
+    Args:
+        command: Command line to run.
+        env: Environment of the process.
+        log_path: File that receives the process's output.
+
+    Returns:
+        tuple[int, int | None]: Exit code and peak RSS in bytes (None where the
+            platform does not report the resource usage of a single child).
+    """
+    with open(log_path, 'w', encoding='utf-8') as log_file:
+        process = subprocess.Popen(command, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+        if not hasattr(os, 'wait4'):
+            return process.wait(), None
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    peak_rss = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+    return process.returncode, peak_rss
+
+
+def _database_size(database_dir: str) -> int:
+    """Return the total size of the files in the database directory, including the WAL."""
+    return sum(entry.stat().st_size for entry in os.scandir(database_dir) if entry.is_file())
+
+
+def _run_status(database_path: str) -> str | None:
+    """Return the status of the latest crawl run recorded in a database, or None if there is none."""
+    conn = sqlite3.connect(database_path)
+    try:
+        row = conn.execute("SELECT status FROM crawl_runs ORDER BY run_id DESC LIMIT 1").fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def _stage_seconds(metrics: dict) -> dict:
+    """Sum the stage durations from a metrics JSON dump."""
+    return {sample['labels']['stage']: sample['sum']
+            for sample in metrics.get('histograms', {}).get('rt_stage_duration_seconds', [])}
+
+
+def run_benchmark(server: MockRTServer, retriever_args: list | None = None, work_dir: str | None = None) -> dict:
+    """
+    Crawl the mock server once with data_retriever.py into a fresh database.
+
+    The crawler runs in its own process, so its peak memory is measured
+    without the server, and reads its configuration from the environment
+    like a real run. The response cache is off, and unless retriever_args
+    say otherwise, the request rate is not limited.
+
+    Args:
+        server: A started mock server.
+        retriever_args: Extra command-line arguments for data_retriever.py.
+        work_dir: Directory for the database, metrics and log; defaults to a temporary directory.
+
+    Returns:
+        dict: Acts stored, elapsed seconds, acts/sec, peak RSS, database size,
+              requests served and errors injected by the server, and seconds per pipeline stage.
+
+    Raises:
+        RuntimeError: If the crawler exits with an error, including a crawl that failed part way.
+    """
+    with tempfile.TemporaryDirectory() if work_dir is None else contextlib.nullcontext(work_dir) as work_dir:
+        database_dir = os.path.join(work_dir, 'data')
+        os.makedirs(database_dir, exist_ok=True)
+        metrics_path = os.path.join(work_dir, 'metrics.json')
+        log_path = os.path.join(work_dir, 'data_retriever.log')
+        database_filename = 'benchmark.sqlite'
+
+        env = dict(os.environ, API_BASE_URL=server.api_url, RT_DOCUMENT_BASE_URL=server.base_url,
+                   DATABASE_DIR=database_dir, DATABASE_FILENAME=database_filename)
+        command = [sys.executable, DATA_RETRIEVER_PATH, '--cache-mode', 'off', '--metrics-json', metrics_path,
+                   '--metrics-interval', '0', '--rate-limit-mode', 'fixed', '--requests-per-second', '0']
+        command += retriever_args or []
+
+        requests_before = server.requests_served
+        errors_before = server.errors_injected
+        started_at = time.monotonic()
+        exit_code, peak_rss = _run_and_measure(command, env, log_path)
+        elapsed = time.monotonic() - started_at
+        if exit_code != 0:
+            raise RuntimeError(f"data_retriever.py exited with {exit_code}; see {log_path}")
+        run_status = _run_status(os.path.join(database_dir, database_filename))
+        if run_status != RUN_COMPLETED:
+            raise RuntimeError(f"The crawl ended with status {run_status}; see {log_path}")
+
+        with open(metrics_path, encoding='utf-8') as f:
+            metrics = json.load(f)
+        acts_stored = sum(sample['value'] for sample in metrics['counters'].get('rt_acts_total', [])
+                          if sample['labels'].get('result') == 'stored')
+        return {
+            'acts': acts_stored,
+            'seconds': round(elapsed, 3),
+            'acts_per_second': round(acts_stored / elapsed, 1) if elapsed > 0 else 0.0,
+            'peak_rss_mb': round(peak_rss / 1024 / 1024, 1) if peak_rss is not None else None,
+            'database_mb': round(_database_size(database_dir) / 1024 / 1024, 2),
+            'requests': server.requests_served - requests_before,
+            'errors_injected': server.errors_injected - errors_before,
+            'stage_seconds': {stage: round(seconds, 3) for stage, seconds in _stage_seconds(metrics).items()}
+        }
+
+
+def main():
+    """Run the end-to-end throughput benchmark against a local mock server."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(
+        description="Benchmark data_retriever.py end to end against a local mock Riigi Teataja server.",
+        epilog="Arguments after '--' are passed to data_retriever.py, e.g. -- --workers 8 --batch-size 500."
+    )
+    parser.add_argument("--acts", type=int, default=1000, help="Number of synthetic acts. Default: 1000.")
+    parser.add_argument("--sections", type=int, default=20, help="Sections per act; sets the document size. Default: 20.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response. Default: 0.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Upper bound of an extra random delay in seconds. Default: 0.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503. Default: 0.")
+    parser.add_argument("--html-fraction", type=float, default=0.0, help="Share of acts without a plain text link. Default: 0.")
+    parser.add_argument("--runs", type=int, default=1, help="Number of crawls; each starts with an empty database. Default: 1.")
+    parser.add_argument("--output", type=str, default=None, help="Optional. Write the results as JSON to this file.")
+    args, retriever_args = parser.parse_known_args()
+    if retriever_args[:1] == ['--']:
+        retriever_args = retriever_args[1:]
+
+    results = []
+    with MockRTServer(acts=args.acts, sections=args.sections, latency=args.latency, jitter=args.jitter,
+                      error_rate=args.error_rate, html_fraction=args.html_fraction) as server:
+        for run in range(1, args.runs + 1):
+            result = run_benchmark(server, retriever_args)
+            results.append(result)
+            logging.info(f"Run {run}: {result['acts']} acts in {result['seconds']:.2f}s = "
+                         f"{result['acts_per_second']:.1f} acts/s, peak RSS {result['peak_rss_mb']} MB, "
+                         f"database {result['database_mb']} MB, {result['requests']} requests "
+                         f"({result['errors_injected']} injected errors), stages {json.dumps(result['stage_seconds'])}")
+
+    rates = sorted(result['acts_per_second'] for result in results)
+    summary = {
+        'config': {'acts': args.acts, 'sections': args.sections, 'latency': args.latency, 'jitter': args.jitter,
+                   'error_rate': args.error_rate, 'html_fraction': args.html_fraction,
+                   'data_retriever_args': retriever_args},
+        'runs': results,
+        'median_acts_per_second': rates[len(rates) // 2]
+    }
+    logging.info(f"Median throughput over {len(results)} run(s): {summary['median_acts_per_second']:.1f} acts/s")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        logging.info(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
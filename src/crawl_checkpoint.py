@@ -0,0 +1,234 @@
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict, defaultdict, deque
+from datetime import datetime
+
+# Add the src directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+RUN_RUNNING = 'RUNNING'
+RUN_COMPLETED = 'COMPLETED'
+RUN_INTERRUPTED = 'INTERRUPTED'
+RUN_FAILED = 'FAILED'
+
+STATE_PENDING = 'PENDING'
+STATE_STORED = 'STORED'
+STATE_SKIPPED = 'SKIPPED'
+STATE_FAILED = 'FAILED'
+# Listed by another shard of a sharded crawl, which fetches it
+STATE_DUPLICATE = 'DUPLICATE'
+
+
+def query_key(query_params: dict) -> str:
+    """
+    Serialize query parameters so that equal queries compare equal.
+
+    Args:
+        query_params: API query parameters without 'leht'.
+
+    Returns:
+        str: JSON with sorted keys.
+    """
+    return json.dumps(query_params, sort_keys=True, ensure_ascii=False)
+
+
+def _now() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+class CrawlCheckpoint:
+    """
+    Progress of one crawl, persisted in crawl_runs and crawl_checkpoints.
+
+    Acts are registered page by page as the listing is read and marked as
+    finished once they are handed to the writer. State changes are kept in
+    memory and written by save(), which the data retriever calls after every
+    writer flush, so a checkpoint never claims an act that is not yet stored.
+    Pages may be registered and acts finished on different threads.
+    A page counts as completed once every act on it and on all earlier pages
+    has finished; a resumed run starts at the page after the last completed one
+    and leaves out the acts of that page that had already finished. Failed acts
+    are retried: the run resumes at the first page with a failed act if that
+    page comes earlier.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, run_id: int, last_completed_page: int = 0,
+                 finished_ids: set | None = None):
+        """
+        Wrap an existing crawl run.
+
+        Args:
+            conn: Open database connection; usually the writer's connection.
+            run_id: The run's crawl_runs.run_id.
+            last_completed_page: The run's last completed page.
+            finished_ids: full_text_id values already finished in this run.
+        """
+        self.conn = conn
+        self.run_id = run_id
+        self.last_completed_page = last_completed_page
+        self.finished_ids = set(finished_ids or ())
+        self.acts_processed = 0
+        self._open_pages = OrderedDict()
+        self._act_pages = defaultdict(deque)
+        self._pending_rows = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def start(cls, conn: sqlite3.Connection, query_params: dict, resume: bool = False) -> 'CrawlCheckpoint':
+        """
+        Start a new crawl run, or continue the latest unfinished run of the same query.
+
+        Args:
+            conn: Open database connection.
+            query_params: API query parameters without 'leht'.
+            resume: Continue the latest run with the same parameters that did not complete.
+
+        Returns:
+            CrawlCheckpoint: The run's checkpoint.
+        """
+        key = query_key(query_params)
+        if resume:
+            row = conn.execute(
+                "SELECT run_id, last_completed_page, acts_processed FROM crawl_runs "
+                "WHERE query_params = ? AND status != ? ORDER BY run_id DESC LIMIT 1",
+                (key, RUN_COMPLETED)
+            ).fetchone()
+            if row is not None:
+                run_id, last_completed_page, acts_processed = row
+                finished_ids = {full_text_id for (full_text_id,) in conn.execute(
+                    "SELECT full_text_id FROM crawl_checkpoints WHERE run_id = ? AND state NOT IN (?, ?)",
+                    (run_id, STATE_PENDING, STATE_FAILED)
+                )}
+                failed_acts, first_failed_page = conn.execute(
+                    "SELECT COUNT(*), MIN(page) FROM crawl_checkpoints WHERE run_id = ? AND state = ?",
+                    (run_id, STATE_FAILED)
+                ).fetchone()
+                if failed_acts:
+                    # Failed acts are listed and fetched again, so they are counted again as well
+                    last_completed_page = min(last_completed_page, first_failed_page - 1)
+                    acts_processed -= failed_acts
+                with conn:
+                    conn.execute("UPDATE crawl_runs SET status = ?, updated_at = ? WHERE run_id = ?",
+                                 (RUN_RUNNING, _now(), run_id))
+                logging.info(f"Resuming crawl run {run_id} after page {last_completed_page} "
+                             f"({len(finished_ids)} acts already processed, {failed_acts} failed acts to retry)")
+                checkpoint = cls(conn, run_id, last_completed_page, finished_ids)
+                checkpoint.acts_processed = acts_processed
+                return checkpoint
+            logging.info("No unfinished crawl found for these parameters; starting a new one")
+
+        now = _now()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO crawl_runs (query_params, status, started_at, updated_at) VALUES (?, ?, ?, ?)",
+                (key, RUN_RUNNING, now, now)
+            )
+        logging.info(f"Started crawl run {cursor.lastrowid}")
+        return cls(conn, cursor.lastrowid)
+
+    @property
+    def start_page(self) -> int:
+        """The first listing page that still has to be read."""
+        return self.last_completed_page + 1
+
+    def track_pages(self, pages):
+        """
+        Register listing pages and pass on the acts that still need processing.
+
+        Args:
+            pages: Iterable of (page number, acts) as yielded by iter_pages().
+
+        Yields:
+            dict: Metadata of acts not finished in an earlier attempt of this run.
+        """
+        for page, acts in pages:
+            self.page_started(page, acts)
+            for act_metadata in acts:
+                if act_metadata.get('terviktekstID') not in self.finished_ids:
+                    yield act_metadata
+
+    def page_started(self, page: int, acts: list[dict]):
+        """
+        Register the acts found on a listing page.
+
+        Args:
+            page: Page number.
+            acts: The acts on the page.
+        """
+        outstanding = 0
+        now = _now()
+        with self._lock:
+            for act_metadata in acts:
+                full_text_id = act_metadata.get('terviktekstID')
+                if full_text_id is None or full_text_id in self.finished_ids:
+                    continue
+                outstanding += 1
+                self._act_pages[full_text_id].append(page)
+                self._pending_rows.append((self.run_id, full_text_id, page, STATE_PENDING, now))
+            self._open_pages[page] = outstanding
+
+    def act_finished(self, full_text_id: int | None, state: str):
+        """
+        Record that an act has been handed to the writer, skipped or failed.
+
+        Args:
+            full_text_id: The act's 'terviktekstID'.
+            state: STATE_STORED, STATE_SKIPPED, STATE_FAILED or STATE_DUPLICATE.
+        """
+        with self._lock:
+            self.acts_processed += 1
+            pages = self._act_pages.get(full_text_id)
+            if not pages:
+                return
+            page = pages.popleft()
+            if not pages:
+                del self._act_pages[full_text_id]
+            self._open_pages[page] -= 1
+            self._pending_rows.append((self.run_id, full_text_id, page, state, _now()))
+
+    def _advance_completed_page(self):
+        """Move last_completed_page past every leading page without outstanding acts."""
+        while self._open_pages:
+            page, outstanding = next(iter(self._open_pages.items()))
+            if outstanding > 0:
+                break
+            self._open_pages.popitem(last=False)
+            self.last_completed_page = page
+
+    def save(self, status: str = RUN_RUNNING):
+        """
+        Write the buffered act states and the run's progress in one transaction.
+
+        Args:
+            status: Run status to record.
+        """
+        with self._lock:
+            self._advance_completed_page()
+            rows = self._pending_rows
+            self._pending_rows = []
+            last_completed_page, acts_processed = self.last_completed_page, self.acts_processed
+        with self.conn:
+            # A later state of the same act replaces the PENDING row
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO crawl_checkpoints (run_id, full_text_id, page, state, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self.conn.execute(
+                "UPDATE crawl_runs SET status = ?, last_completed_page = ?, acts_processed = ?, updated_at = ? "
+                "WHERE run_id = ?",
+                (status, last_completed_page, acts_processed, _now(), self.run_id)
+            )
+
+    def finish(self, status: str):
+        """
+        Save the final progress of the run.
+
+        Args:
+            status: RUN_COMPLETED, RUN_INTERRUPTED or RUN_FAILED.
+        """
+        self.save(status)
+        logging.info(f"Crawl run {self.run_id} {status.lower()}; last completed page: {self.last_completed_page}")
@@ -0,0 +1,385 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from multiprocessing.managers import SyncManager
+from dotenv import load_dotenv
+
+# Add the src directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from crawl_checkpoint import (
+    RUN_COMPLETED, RUN_FAILED, RUN_INTERRUPTED, STATE_DUPLICATE, STATE_FAILED, STATE_SKIPPED, STATE_STORED,
+    CrawlCheckpoint
+)
+from data_retriever import (
+    add_crawl_arguments, create_ingest_pipeline, create_response_cache, load_known_full_text_ids, setup_logging,
+    touch_last_checked
+)
+from db_setup import get_db_path, initialize_database
+from db_writer import DocumentWriter
+from metrics import MetricsRegistry, MetricsReporter
+from rt_api_client import HTTP_POOL_SIZE, RTApiClient, create_rate_limiter, set_default_client
+
+# Number of worker processes crawling shards at the same time
+CRAWL_PROCESSES = int(os.getenv('CRAWL_PROCESSES', 2))
+# Messages buffered between the worker processes and the writer; workers block while it is full
+CRAWL_QUEUE_SIZE = int(os.getenv('CRAWL_QUEUE_SIZE', 200))
+
+
+class CrawlManager(SyncManager):
+    """Server process holding the state shared by all worker processes of a crawl."""
+
+
+_rate_limiter = None
+
+
+def _shared_rate_limiter(mode: str, rate: float, burst: int):
+    """Return the manager process's rate limiter, creating it on first use."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = create_rate_limiter(mode, rate, burst)
+    return _rate_limiter
+
+
+# Workers call the limiter through a proxy, so every request of every process
+# draws from one token bucket and, in adaptive mode, feeds one rate controller
+CrawlManager.register('rate_limiter', callable=_shared_rate_limiter,
+                      exposed=('acquire', 'record_response', 'set_rate', 'stats'))
+
+
+class ActBudget:
+    """Number of acts the shards of a crawl may still download together (--limit-acts)."""
+
+    def __init__(self, limit: int):
+        """
+        Args:
+            limit: Number of acts that may be downloaded.
+        """
+        self._remaining = limit
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        """
+        Reserve one download.
+
+        Returns:
+            bool: False once the budget is used up.
+        """
+        with self._lock:
+            if self._remaining <= 0:
+                return False
+            self._remaining -= 1
+            return True
+
+
+# The manager serves every worker process from one instance, so the limit is global
+CrawlManager.register('act_budget', callable=ActBudget, exposed=('take',))
+
+
+def expand_dates(date_specs: list[str], step_days: int = 365) -> list[str]:
+    """
+    Turn dates and date ranges into the list of dates to query.
+
+    Args:
+        date_specs: Dates (YYYY-MM-DD) or inclusive ranges (YYYY-MM-DD:YYYY-MM-DD).
+        step_days: Days between the dates taken from a range.
+
+    Returns:
+        list[str]: The dates in the given order, without duplicates.
+
+    Raises:
+        ValueError: If a date is malformed or a range ends before it starts.
+    """
+    dates = []
+    for spec in date_specs:
+        start, _, end = spec.partition(':')
+        first = datetime.strptime(start, '%Y-%m-%d').date()
+        last = datetime.strptime(end, '%Y-%m-%d').date() if end else first
+        if last < first:
+            raise ValueError(f"Date range '{spec}' ends before it starts")
+        day = first
+        while day <= last:
+            dates.append(day.isoformat())
+            day += timedelta(days=max(1, step_days))
+    return list(dict.fromkeys(dates))
+
+
+def plan_shards(document_types: list[str], dates: list[str], items_per_page: int = 100) -> list[dict]:
+    """
+    Split a crawl into one search query per document type and date.
+
+    Args:
+        document_types: Values of the 'dokument' parameter, e.g. ['seadus', 'määrus'].
+        dates: Values of the 'kehtiv' parameter; empty for a query without a date.
+        items_per_page: Value of the 'limiit' parameter.
+
+    Returns:
+        list[dict]: The API query parameters of every shard, without 'leht'.
+    """
+    shards = []
+    for document_type in dict.fromkeys(document_types):
+        for valid_on in dates or [None]:
+            params = {'dokument': document_type, 'limiit': items_per_page}
+            if valid_on:
+                params['kehtiv'] = valid_on
+            shards.append(params)
+    return shards
+
+
+def _crawl_shard(task: dict, results, rate_limiter, claims, budget, known_ids: set, options: argparse.Namespace):
+    """
+    Crawl one shard in a worker process and send what it finds to the writer.
+
+    The writer receives ('page', shard, page, full_text_ids) for every listing
+    page, ('act', shard, full_text_id, row, state) for every act and finally
+    ('done', shard, error, metrics snapshot). An act that appears in several
+    shards is only fetched by the shard that claims it first; the others report
+    it as STATE_DUPLICATE. A shard that fails to fetch an act releases its
+    claim, so a shard listing the act later fetches it instead. With
+    --limit-acts, every download is taken from the budget shared by all
+    shards, and the shard stops once it is used up.
+    """
+    index = task['index']
+    metrics = MetricsRegistry()
+    client = RTApiClient(
+        pool_size=max(HTTP_POOL_SIZE, options.workers + options.page_workers),
+        rate_limiter=rate_limiter,
+        cache=create_response_cache(options.cache_mode),
+        page_workers=options.page_workers,
+        metrics=metrics
+    )
+    set_default_client(client)
+
+    def acts():
+        for page, page_acts in client.iter_pages(task['params'], max_pages=options.page_limit,
+                                                 start_page=task['start_page']):
+            results.put(('page', index, page, [act.get('terviktekstID') for act in page_acts]))
+            for act_metadata in page_acts:
+                full_text_id = act_metadata.get('terviktekstID')
+                if full_text_id in task['finished_ids']:
+                    continue
+                if full_text_id in known_ids:
+                    results.put(('act', index, full_text_id, None, STATE_SKIPPED))
+                    continue
+                if full_text_id is not None and claims.setdefault(full_text_id, index) != index:
+                    results.put(('act', index, full_text_id, None, STATE_DUPLICATE))
+                    continue
+                if budget is not None and not budget.take():
+                    # Left pending, so another crawl can still download the act
+                    claims.pop(full_text_id, None)
+                    return
+                yield act_metadata
+
+    error = None
+    pipeline = create_ingest_pipeline(options.workers, max(1, options.transform_workers), options.queue_size,
+                                      metrics=metrics, sink_name='send')
+    try:
+        for act_metadata, row, act_error in pipeline.results(acts()):
+            full_text_id = act_metadata.get('terviktekstID')
+            if act_error is None:
+                results.put(('act', index, full_text_id, row, STATE_STORED))
+            else:
+                logging.error(f"Error processing act ID={act_metadata.get('globaalID')}: {str(act_error)}")
+                claims.pop(full_text_id, None)
+                results.put(('act', index, full_text_id, None, STATE_FAILED))
+    except Exception as e:
+        error = str(e)
+        logging.error(f"Shard {index} ({json.dumps(task['params'], ensure_ascii=False)}) failed: {error}")
+    finally:
+        set_default_client(None)
+        client.close()
+        results.put(('done', index, error, metrics.snapshot()))
+
+
+def _crawl_worker(tasks, results, rate_limiter, claims, budget, known_ids: set, options: argparse.Namespace):
+    """Entry point of a worker process: crawl shards from the task queue until it is empty."""
+    # Ctrl-C reaches the whole process group; the main process stops the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    setup_logging()
+    for task in iter(tasks.get, None):
+        _crawl_shard(task, results, rate_limiter, claims, budget, known_ids, options)
+
+
+def run_shards(shards: list[dict], options: argparse.Namespace, processes: int = CRAWL_PROCESSES,
+               metrics: MetricsRegistry | None = None) -> dict:
+    """
+    Crawl the shards in worker processes and store the results with a single writer.
+
+    Each worker process has its own HTTP session, and all of them share one
+    rate limiter held by a manager process, so the request budget is global,
+    as is the --limit-acts budget.
+    Fetched and parsed rows come back over a bounded queue and are written by
+    this process only, so SQLite never sees competing writers. Every shard is
+    a crawl run of its own, so an interrupted crawl can be resumed with the
+    same shards.
+
+    Args:
+        shards: Query parameters as returned by plan_shards().
+        options: Parsed crawl options (see data_retriever.add_crawl_arguments()).
+        processes: Number of worker processes.
+        metrics: Optional registry; the workers' metrics are merged into it as their shards finish.
+
+    Returns:
+        dict: Number of shards completed and failed, acts stored, skipped, failed and left to another shard,
+              the write statistics and the final rate limiter statistics.
+    """
+    metrics = metrics or MetricsRegistry()
+    _, database_path = get_db_path()
+    writer = DocumentWriter(database_path, batch_size=options.batch_size, metrics=metrics)
+    checkpoints = [CrawlCheckpoint.start(writer.conn, params, resume=options.resume) for params in shards]
+
+    def save_checkpoints():
+        for checkpoint in checkpoints:
+            checkpoint.save()
+
+    # Progress is saved after every committed batch, as in data_retriever.py
+    writer.on_flush = save_checkpoints
+    known_ids = set() if options.refetch_existing else load_known_full_text_ids(writer.conn)
+
+    context = multiprocessing.get_context('spawn')
+    manager = CrawlManager(ctx=context)
+    manager.start()
+    rate_limiter = manager.rate_limiter(options.rate_limit_mode, options.requests_per_second, options.burst)
+    claims = manager.dict()
+    budget = manager.act_budget(options.limit_acts) if options.limit_acts else None
+    tasks = context.Queue()
+    results = context.Queue(maxsize=CRAWL_QUEUE_SIZE)
+    for index, (params, checkpoint) in enumerate(zip(shards, checkpoints)):
+        tasks.put({'index': index, 'params': params, 'start_page': checkpoint.start_page,
+                   'finished_ids': checkpoint.finished_ids})
+    processes = max(1, min(processes, len(shards)))
+    for _ in range(processes):
+        tasks.put(None)
+    workers = [context.Process(target=_crawl_worker, name=f"crawl-{number}",
+                               args=(tasks, results, rate_limiter, claims, budget, known_ids, options))
+               for number in range(1, processes + 1)]
+    for worker in workers:
+        worker.start()
+    logging.info(f"Crawling {len(shards)} shards in {processes} processes")
+
+    statuses = [None] * len(shards)
+    counts = {STATE_STORED: 0, STATE_SKIPPED: 0, STATE_FAILED: 0, STATE_DUPLICATE: 0}
+    skipped_ids = []
+    rate_stats = None
+    interrupted = False
+    try:
+        while None in statuses:
+            try:
+                message = results.get(timeout=1.0)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    logging.error("All worker processes exited before their shards finished")
+                    break
+                continue
+            kind, index = message[0], message[1]
+            if kind == 'page':
+                _, _, page, full_text_ids = message
+                checkpoints[index].page_started(page, [{'terviktekstID': full_text_id}
+                                                       for full_text_id in full_text_ids])
+            elif kind == 'act':
+                _, _, full_text_id, row, state = message
+                if state == STATE_STORED:
+                    writer.add(row)
+                elif state == STATE_SKIPPED:
+                    skipped_ids.append(full_text_id)
+                checkpoints[index].act_finished(full_text_id, state)
+                counts[state] += 1
+                metrics.inc('rt_acts_total', result=state.lower())
+            else:
+                _, _, error, snapshot = message
+                statuses[index] = RUN_FAILED if error else RUN_COMPLETED
+                metrics.merge(snapshot)
+                logging.info(f"Shard {index + 1}/{len(shards)} {statuses[index].lower()}")
+        rate_stats = rate_limiter.stats()
+    except KeyboardInterrupt:
+        interrupted = True
+        logging.warning("Interrupted; saving progress. Run again with --resume to continue.")
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+        manager.shutdown()
+        total_skipped = 0
+        try:
+            writer.flush()
+            with writer.conn:
+                total_skipped = touch_last_checked(writer.conn, skipped_ids,
+                                                   datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            unfinished = RUN_INTERRUPTED if interrupted else RUN_FAILED
+            for checkpoint, status in zip(checkpoints, statuses):
+                checkpoint.finish(status or unfinished)
+        finally:
+            writer.close()
+    if interrupted:
+        raise KeyboardInterrupt
+
+    return {
+        'shards_completed': statuses.count(RUN_COMPLETED),
+        'shards_failed': len(statuses) - statuses.count(RUN_COMPLETED),
+        'acts_stored': counts[STATE_STORED],
+        'acts_skipped': counts[STATE_SKIPPED],
+        'acts_failed': counts[STATE_FAILED],
+        'acts_duplicate': counts[STATE_DUPLICATE],
+        'last_checked_updated': total_skipped,
+        'write': writer.stats(),
+        'rate_limiter': rate_stats
+    }
+
+
+def main():
+    """Crawl many document types and dates in parallel processes into one database."""
+    load_dotenv()
+    setup_logging()
+
+    parser = argparse.ArgumentParser(
+        description="Crawl several document types and dates from the Riigi Teataja API in parallel processes."
+    )
+    parser.add_argument("--document-types", nargs='+', default=['seadus'],
+                        help="Document types to crawl, e.g. seadus määrus korraldus. Default: seadus.")
+    parser.add_argument("--dates", nargs='*', default=[],
+                        help="Optional. Dates (YYYY-MM-DD) or ranges (YYYY-MM-DD:YYYY-MM-DD) on which the acts must be valid; "
+                             "each date is a separate query.")
+    parser.add_argument("--date-step-days", type=int, default=365,
+                        help="Optional. Days between the dates taken from a range. Default: 365.")
+    parser.add_argument("--processes", type=int, default=CRAWL_PROCESSES,
+                        help="Optional. Number of worker processes. Default: CRAWL_PROCESSES or 2.")
+    add_crawl_arguments(parser)
+    args = parser.parse_args()
+    args.workers = max(1, args.workers)
+    args.page_workers = max(1, args.page_workers)
+
+    try:
+        dates = expand_dates(args.dates, args.date_step_days)
+    except ValueError as e:
+        parser.error(str(e))
+    shards = plan_shards(args.document_types, dates, args.items_per_page)
+
+    initialize_database(reset=args.reset)
+    metrics = MetricsRegistry()
+    reporter = MetricsReporter(metrics, args.metrics_textfile, args.metrics_json, args.metrics_interval)
+    metrics.set_gauge('rt_crawl_start_time_seconds', time.time())
+    reporter.start()
+    try:
+        summary = run_shards(shards, args, processes=args.processes, metrics=metrics)
+        logging.info(f"Crawl complete. Shards: {summary['shards_completed']} completed, {summary['shards_failed']} failed; "
+                     f"acts stored: {summary['acts_stored']}, skipped: {summary['acts_skipped']}, "
+                     f"failed: {summary['acts_failed']}, left to another shard: {summary['acts_duplicate']}")
+        logging.info(f"Write statistics: {json.dumps(summary['write'])}")
+        logging.info(f"Request rate statistics: {json.dumps(summary['rate_limiter'])}")
+    except KeyboardInterrupt:
+        sys.exit(130)
+    finally:
+        reporter.stop()
+
+
+if __name__ == "__main__":
+    main()
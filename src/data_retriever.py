@@ -5,6 +5,8 @@ import os
 import datetime
 from datetime import datetime, date
 import argparse
+import time
+from itertools import islice
 from dotenv import load_dotenv
 import sys
 import os
@@ -12,8 +14,23 @@ import os
 # Add the src directory to the Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from rt_api_client import get_all_acts_for_query, get_full_document_text
+from rt_api_client import (
+    HTTP_POOL_SIZE, PAGE_FETCH_WORKERS, RATE_LIMIT_BURST, RATE_LIMIT_MODE, REQUESTS_PER_SECOND, RTApiClient,
+    create_rate_limiter, get_full_document_text, iter_pages, set_default_client
+)
+from response_cache import ResponseCache
 from db_setup import get_db_path, initialize_database
+from db_writer import DB_WRITE_BATCH_SIZE, DocumentWriter
+from html_text import STORE_RAW_HTML, split_plain_and_html
+from ingest_pipeline import PIPELINE_QUEUE_SIZE, TRANSFORM_WORKERS, IngestPipeline, Stage
+from metrics import METRICS_INTERVAL_SECONDS, METRICS_JSON_FILE, METRICS_TEXTFILE, MetricsRegistry, MetricsReporter
+from crawl_checkpoint import (
+    RUN_COMPLETED, RUN_FAILED, RUN_INTERRUPTED, STATE_FAILED, STATE_SKIPPED, STATE_STORED, CrawlCheckpoint
+)
+
+# Keep each act's raw API metadata in api_response_json, compressed like the texts; the
+# fields queried in practice have columns of their own
+STORE_API_RESPONSE_JSON = os.getenv('STORE_API_RESPONSE_JSON', 'true').lower() in ('1', 'true', 'yes')
 
 def setup_logging():
     """Set up basic logging configuration."""
@@ -22,20 +39,24 @@ def setup_logging():
         format='%(asctime)s - %(levelname)s - %(message)s'
     )
 
-def determine_document_status(publication_date_str, entry_into_force_date_str, repeal_date_str) -> str:
+def determine_document_status(publication_date_str, entry_into_force_date_str, repeal_date_str,
+                              as_of: date | None = None) -> str:
     """
     Determine the status of a document based on its dates.
 
+    The same rules are applied to stored rows by refresh_status.py.
+
     Args:
         publication_date_str: Publication date as YYYY-MM-DD string
         entry_into_force_date_str: Entry into force date as YYYY-MM-DD string
         repeal_date_str: Repeal date as YYYY-MM-DD string (can be None)
+        as_of: Date the status is evaluated at (defaults to today)
 
     Returns:
         Status string ('VALID', 'EXPIRED', 'PENDING_VALIDITY', 'UNKNOWN')
     """
     try:
-        current_date = date.today()
+        current_date = as_of or date.today()
 
         # Parse dates if they exist
         parsed_publication_date = datetime.strptime(publication_date_str, '%Y-%m-%d').date() if publication_date_str else None
@@ -55,6 +76,258 @@ def determine_document_status(publication_date_str, entry_into_force_date_str, r
         logging.error(f"Error parsing dates for status determination: {e}")
         return 'UNKNOWN'
 
+def create_response_cache(cache_mode: str) -> ResponseCache | None:
+    """
+    Create the on-disk HTTP response cache for the given mode.
+
+    Args:
+        cache_mode: 'off', 'revalidate' (serve fresh entries, revalidate stale ones)
+                    or 'replay' (serve only from the cache, never use the network).
+
+    Returns:
+        ResponseCache | None: The cache, or None if caching is off.
+    """
+    if cache_mode == 'off':
+        return None
+    database_dir, _ = get_db_path()
+    cache_dir = os.getenv('RESPONSE_CACHE_DIR') or os.path.join(database_dir, 'http_cache')
+    cache = ResponseCache(
+        cache_dir,
+        max_size_bytes=int(float(os.getenv('RESPONSE_CACHE_MAX_MB', 2048)) * 1024 * 1024),
+        ttl_seconds=float(os.getenv('RESPONSE_CACHE_TTL_SECONDS', 86400)),
+        replay_only=cache_mode == 'replay'
+    )
+    logging.info(f"Using response cache in '{cache_dir}' (mode: {cache_mode}, {cache.total_size} bytes stored)")
+    return cache
+
+def load_known_full_text_ids(conn: sqlite3.Connection) -> set:
+    """
+    Load the consolidated text IDs ('terviktekstID') already stored in the database.
+
+    Args:
+        conn: Open database connection.
+
+    Returns:
+        set: The stored full_text_id values.
+    """
+    return {row[0] for row in conn.execute("SELECT full_text_id FROM legal_documents")}
+
+def skip_known_acts(acts, known_ids: set, skipped_ids: list, checkpoint: CrawlCheckpoint | None = None,
+                    metrics: MetricsRegistry | None = None):
+    """
+    Filter out acts whose consolidated text is already stored.
+
+    Args:
+        acts: Iterable of act metadata dictionaries.
+        known_ids: full_text_id values already present in the database.
+        skipped_ids: List that receives the 'terviktekstID' of every skipped act.
+        checkpoint: Optional crawl checkpoint on which skipped acts are marked as finished.
+        metrics: Optional registry in which skipped acts are counted.
+
+    Yields:
+        dict: Metadata of acts that still need their full text downloaded.
+    """
+    for act_metadata in acts:
+        full_text_id = act_metadata.get('terviktekstID')
+        if full_text_id is not None and full_text_id in known_ids:
+            skipped_ids.append(full_text_id)
+            if checkpoint is not None:
+                checkpoint.act_finished(full_text_id, STATE_SKIPPED)
+            if metrics is not None:
+                metrics.inc('rt_acts_total', result='skipped')
+            continue
+        yield act_metadata
+
+def touch_last_checked(conn: sqlite3.Connection, full_text_ids: list, checked_at: str) -> int:
+    """
+    Update last_checked_at for already stored acts in a single UPDATE statement.
+
+    Args:
+        conn: Open database connection.
+        full_text_ids: IDs of the acts that were seen again.
+        checked_at: Timestamp to store (YYYY-MM-DD HH:MM:SS).
+
+    Returns:
+        int: Number of rows updated.
+    """
+    if not full_text_ids:
+        return 0
+    cursor = conn.execute(
+        "UPDATE legal_documents SET last_checked_at = ? "
+        "WHERE full_text_id IN (SELECT value FROM json_each(?))",
+        (checked_at, json.dumps(full_text_ids))
+    )
+    return cursor.rowcount
+
+def build_source_url(act_metadata: dict) -> str | None:
+    """
+    Build the public URL of an act's HTML page.
+
+    Args:
+        act_metadata: A single act's metadata from the search API.
+
+    Returns:
+        str | None: Absolute URL, or None if neither 'dokumentHtml' nor 'globaalID' is present.
+    """
+    document_base_url = os.getenv('RT_DOCUMENT_BASE_URL', 'https://www.riigiteataja.ee')
+    html_url_path = act_metadata.get('dokumentHtml')
+
+    if not html_url_path:
+        # Fallback: use globaalID to construct the path if dokumentHtml is not found
+        globaal_id = act_metadata.get('globaalID')
+        if globaal_id:
+            html_url_path = f"/akt/{globaal_id}"
+
+    if not html_url_path:
+        return None
+    if html_url_path.startswith('http'):
+        return html_url_path
+    if html_url_path.startswith('/'):
+        return f"{document_base_url}{html_url_path}"
+    return f"{document_base_url}/{html_url_path}"
+
+def build_document_row(act_metadata: dict, plain_text: str | None, xml_text: str | None,
+                       store_raw_html: bool = STORE_RAW_HTML, store_api_response: bool = STORE_API_RESPONSE_JSON) -> dict:
+    """
+    Derive the legal_documents column values for an act.
+
+    An HTML page fetched as the dokumentHtml fallback is reduced to its text
+    here, so text_content_plain never holds markup.
+
+    Args:
+        act_metadata: A single act's metadata from the search API.
+        plain_text: Plain text or HTML content from get_full_document_text().
+        xml_text: XML content from get_full_document_text().
+        store_raw_html: Keep the raw HTML page in text_content_html.
+        store_api_response: Keep the act's API metadata in api_response_json.
+
+    Returns:
+        dict: Column values keyed by column name.
+    """
+    plain_text, raw_html = split_plain_and_html(plain_text)
+    publication_date = act_metadata.get('avaldamiseKuupaev')
+    entry_into_force_date = act_metadata.get('kehtivus', {}).get('algus')
+    repeal_date = act_metadata.get('kehtivus', {}).get('lopp')
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    return {
+        'full_text_id': act_metadata.get('terviktekstID'),
+        'rt_unique_id': act_metadata.get('globaalID'),
+        'lineage_id': act_metadata.get('terviktekstiGrupiID'),
+        'title': act_metadata.get('pealkiri', ''),
+        'document_type': act_metadata.get('liik', ''),
+        'text_content_plain': plain_text,
+        'text_content_xml': xml_text,
+        'text_content_html': raw_html if store_raw_html else None,
+        'publication_date': publication_date,
+        'entry_into_force_date': entry_into_force_date,
+        'repeal_date': repeal_date,
+        'status': determine_document_status(publication_date, entry_into_force_date, repeal_date),
+        'source_url': build_source_url(act_metadata),
+        'text_url': act_metadata.get('dokumentTekst'),
+        'xml_url': act_metadata.get('dokumentXML'),
+        'api_response_json': json.dumps(act_metadata) if store_api_response else None,
+        'retrieved_at': now,
+        'last_checked_at': now
+    }
+
+def create_ingest_pipeline(workers: int, transform_workers: int = TRANSFORM_WORKERS,
+                           queue_size: int = PIPELINE_QUEUE_SIZE, metrics: MetricsRegistry | None = None,
+                           sink_name: str = 'write') -> IngestPipeline:
+    """
+    Build the stages between the act listing and the database writer.
+
+    Acts from the listing are downloaded on ``workers`` threads ('fetch') and
+    turned into legal_documents rows on ``transform_workers`` threads ('parse');
+    the caller writes the rows as they arrive. The request rate is governed by
+    the rate limiter of the shared API client, not by the number of workers.
+
+    Args:
+        workers: Number of download threads.
+        transform_workers: Number of threads deriving document rows.
+        queue_size: Capacity of each queue between two stages.
+        metrics: Optional registry receiving stage durations, wait times and queue depths.
+        sink_name: Name of the caller's stage in statistics and metrics.
+
+    Returns:
+        IngestPipeline: The pipeline; its results() yield (act_metadata, row, error).
+    """
+    return IngestPipeline([
+        Stage('fetch', lambda act_metadata, _: get_full_document_text(act_metadata), workers),
+        Stage('parse', lambda act_metadata, texts: build_document_row(act_metadata, *texts), transform_workers)
+    ], queue_size=queue_size, metrics=metrics, sink_name=sink_name)
+
+def finish_crawl(writer: DocumentWriter, checkpoint: CrawlCheckpoint | None, skipped_ids: list, status: str) -> int:
+    """
+    Write out everything still buffered, record the run's final status and close the writer.
+
+    Args:
+        writer: The crawl's document writer.
+        checkpoint: The crawl's checkpoint, if one was started.
+        skipped_ids: IDs of already stored acts seen during the crawl.
+        status: Final run status (RUN_COMPLETED, RUN_INTERRUPTED or RUN_FAILED).
+
+    Returns:
+        int: Number of already stored acts whose last_checked_at was updated.
+    """
+    total_skipped = 0
+    try:
+        writer.flush()
+        with writer.conn:
+            total_skipped = touch_last_checked(writer.conn, skipped_ids, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        if checkpoint is not None:
+            checkpoint.finish(status)
+    except sqlite3.Error as e:
+        logging.error(f"Could not save crawl progress: {str(e)}")
+    finally:
+        writer.close()
+    return total_skipped
+
+def add_crawl_arguments(parser: argparse.ArgumentParser):
+    """
+    Add the command-line options shared by data_retriever.py and crawl_planner.py.
+
+    Args:
+        parser: The parser to add the options to.
+    """
+    parser.add_argument("--limit-acts", type=int, default=None,
+                        help="Optional. Limit the number of acts downloaded; acts already stored do not count. No further pages are fetched once reached (for testing purposes).")
+    parser.add_argument("--page-limit", type=int, default=None,
+                        help="Optional. Limit the number of pages fetched from the API for each query (for testing purposes).")
+    parser.add_argument("--items-per-page", type=int, default=100,
+                        help="Optional. The number of items to request per page from the API ('limiit' parameter). Default: 100.")
+    parser.add_argument("--workers", type=int, default=int(os.getenv('FETCH_WORKERS', 4)),
+                        help="Optional. Number of concurrent full-text download workers. Default: FETCH_WORKERS or 4.")
+    parser.add_argument("--requests-per-second", type=float, default=REQUESTS_PER_SECOND,
+                        help="Optional. Request rate shared by all workers; the starting rate in adaptive mode. Default: REQUESTS_PER_SECOND.")
+    parser.add_argument("--rate-limit-mode", choices=['adaptive', 'fixed'], default=RATE_LIMIT_MODE,
+                        help="Optional. 'adaptive' raises the rate while the server responds quickly and lowers it on slow responses, 429s and 5xx, within RATE_LIMIT_FLOOR and RATE_LIMIT_CEILING; 'fixed' keeps --requests-per-second. Default: RATE_LIMIT_MODE or 'adaptive'.")
+    parser.add_argument("--batch-size", type=int, default=DB_WRITE_BATCH_SIZE,
+                        help="Optional. Number of acts written to the database per transaction. Default: DB_WRITE_BATCH_SIZE or 100.")
+    parser.add_argument("--cache-mode", choices=['off', 'revalidate', 'replay'],
+                        default=os.getenv('RESPONSE_CACHE_MODE', 'off'),
+                        help="Optional. On-disk HTTP response cache: 'off', 'revalidate' (conditional GETs for stale entries) or 'replay' (offline, cache only). Default: RESPONSE_CACHE_MODE or 'off'.")
+    parser.add_argument("--reset", action="store_true",
+                        help="Optional. Drop all stored documents and rebuild the database schema before retrieving.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Optional. Continue the latest unfinished crawl with the same query parameters from its last completed page.")
+    parser.add_argument("--refetch-existing", action="store_true",
+                        help="Optional. Download full texts again for acts that are already stored. By default they are skipped and only their last_checked_at is updated.")
+    parser.add_argument("--transform-workers", type=int, default=TRANSFORM_WORKERS,
+                        help="Optional. Number of threads deriving document rows from downloaded texts. Default: TRANSFORM_WORKERS or 2.")
+    parser.add_argument("--queue-size", type=int, default=PIPELINE_QUEUE_SIZE,
+                        help="Optional. Acts buffered between two pipeline stages before the earlier stage waits. Default: PIPELINE_QUEUE_SIZE or 32.")
+    parser.add_argument("--page-workers", type=int, default=PAGE_FETCH_WORKERS,
+                        help="Optional. Number of listing pages fetched concurrently once the result count is known. Default: PAGE_FETCH_WORKERS or 4.")
+    parser.add_argument("--burst", type=int, default=RATE_LIMIT_BURST,
+                        help="Optional. Number of requests allowed back to back before the rate applies. Default: RATE_LIMIT_BURST.")
+    parser.add_argument("--metrics-textfile", type=str, default=METRICS_TEXTFILE,
+                        help="Optional. Write crawl metrics in Prometheus text format to this file (e.g. for node_exporter's textfile collector). Default: METRICS_TEXTFILE.")
+    parser.add_argument("--metrics-json", type=str, default=METRICS_JSON_FILE,
+                        help="Optional. Write crawl metrics as JSON to this file. Default: METRICS_JSON_FILE.")
+    parser.add_argument("--metrics-interval", type=float, default=METRICS_INTERVAL_SECONDS,
+                        help="Optional. Seconds between metrics file updates during the crawl; the files are always written at the end. Default: METRICS_INTERVAL_SECONDS or 30.")
+
 def main():
     """Main function to retrieve legal acts and store them in the database."""
     # Load environment variables
@@ -69,20 +342,29 @@ def main():
                         help="The type of document to search for (e.g., 'seadus', 'määrus). Default: 'seadus'.")
     parser.add_argument("--search-date", type=str, default=None,
                         help="Optional. A specific date for which to find valid documents (YYYY-MM-DD).")
-    parser.add_argument("--limit-acts", type=int, default=None,
-                        help="Optional. Limit the total number of acts to process and the number of pages fetched (for testing purposes).")
-    parser.add_argument("--page-limit", type=int, default=None,
-                        help="Optional. Limit the number of pages fetched from the API for each query (for testing purposes).")
-    parser.add_argument("--items-per-page", type=int, default=100,
-                        help="Optional. The number of items to request per page from the API ('limiit' parameter). Default: 100.")
+    add_crawl_arguments(parser)
 
     args = parser.parse_args()
 
+    # All workers share one client, and therefore one connection pool and one rate limiter
+    workers = max(1, args.workers)
+    page_workers = max(1, args.page_workers)
+    rate_limiter = create_rate_limiter(args.rate_limit_mode, args.requests_per_second, args.burst)
+    metrics = MetricsRegistry()
+    set_default_client(RTApiClient(
+        pool_size=max(HTTP_POOL_SIZE, workers + page_workers),
+        rate_limiter=rate_limiter,
+        cache=create_response_cache(args.cache_mode),
+        page_workers=page_workers,
+        metrics=metrics
+    ))
+    reporter = MetricsReporter(metrics, args.metrics_textfile, args.metrics_json, args.metrics_interval)
+
     # Get the database path
     _, database_path = get_db_path()
 
-    # Ensure the database is initialized
-    initialize_database()
+    # Apply pending schema migrations; existing documents are kept unless --reset is given
+    initialize_database(reset=args.reset)
 
     # Construct initial parameters for API query
     initial_params = {
@@ -94,143 +376,89 @@ def main():
     if args.search_date:
         initial_params['kehtiv'] = args.search_date
 
+    writer = None
+    checkpoint = None
+    skipped_ids = []
+    total_processed = 0
+    started_at = time.monotonic()
+
+    def collect_progress(registry: MetricsRegistry):
+        elapsed = time.monotonic() - started_at
+        registry.set_gauge('rt_acts_per_second', (total_processed + len(skipped_ids)) / elapsed if elapsed > 0 else 0.0)
+        if writer is not None:
+            registry.set_gauge('rt_queue_depth', writer.pending_rows, queue='write_buffer')
+
+    metrics.set_gauge('rt_crawl_start_time_seconds', time.time())
+    metrics.add_collector(collect_progress)
+    reporter.start()
     try:
-        # Connect to the SQLite database
-        conn = sqlite3.connect(database_path)
-        cursor = conn.cursor()
+        writer = DocumentWriter(database_path, batch_size=args.batch_size, metrics=metrics)
+
+        # Progress is saved after every committed batch, so --resume never skips unsaved acts
+        checkpoint = CrawlCheckpoint.start(writer.conn, initial_params, resume=args.resume)
+        writer.on_flush = checkpoint.save
 
-        # Calculate max_pages based on limit_acts if specified
+        # Acts are streamed page by page, starting after the last completed page
+        # of a resumed run; both limits stop the stream early instead of fetching further pages
+        pages = iter_pages(initial_params, max_pages=args.page_limit, start_page=checkpoint.start_page)
+        acts = checkpoint.track_pages(pages)
+
+        # Incremental mode: acts already in the database are not downloaded again
+        if not args.refetch_existing:
+            known_ids = load_known_full_text_ids(writer.conn)
+            logging.info(f"Found {len(known_ids)} acts already stored; their full texts will not be downloaded again")
+            acts = skip_known_acts(acts, known_ids, skipped_ids, checkpoint=checkpoint, metrics=metrics)
+
+        # Applied after skipping, so the limit caps the acts downloaded rather than the acts listed
         if args.limit_acts:
-            # Calculate the number of pages needed for the limit
-            max_pages = (args.limit_acts + args.items_per_page - 1) // args.items_per_page
-            # Fetch acts with the calculated page limit
-            all_acts = get_all_acts_for_query(initial_params, max_pages=max_pages)
-            # Apply the limit to the acts
-            all_acts = all_acts[:args.limit_acts]
-        else:
-            # Fetch all acts for the query, with optional page limit
-            all_acts = get_all_acts_for_query(initial_params, max_pages=args.page_limit)
-            # Process acts with pagination limit if specified
-            if args.page_limit:
-                all_acts = all_acts[:args.page_limit * args.items_per_page]
-
-        # Process each act
-        total_processed = 0
-        total_inserted = 0
-        total_ignored = 0
-
-        for act_metadata in all_acts:
+            acts = islice(acts, args.limit_acts)
+
+        # Listing, downloads, parsing and writes run as separate stages, so this
+        # thread only writes rows while the other stages keep working
+        pipeline = create_ingest_pipeline(workers, max(1, args.transform_workers), args.queue_size, metrics=metrics)
+        for act_metadata, row, error in pipeline.results(acts):
             total_processed += 1
             act_id = act_metadata.get('globaalID')
             act_title = act_metadata.get('pealkiri', 'untitled')
 
-            logging.info(f"Processing act {total_processed}/{len(all_acts)}: ID={act_id}, Title='{act_title}'")
+            logging.info(f"Processing act {total_processed}: ID={act_id}, Title='{act_title}'")
 
             try:
-                # Fetch full text
-                plain_text, xml_text = get_full_document_text(act_metadata)
-
-                # Extract fields
-                rt_unique_id = act_metadata.get('globaalID')
-                title = act_metadata.get('pealkiri', '')
-                document_type = act_metadata.get('liik', '')
-                publication_date = act_metadata.get('avaldamiseKuupaev')
-                entry_into_force_date = act_metadata.get('kehtivus', {}).get('algus')
-                repeal_date = act_metadata.get('kehtivus', {}).get('lopp')
-
-                # Determine status
-                status = determine_document_status(
-                    publication_date,
-                    entry_into_force_date,
-                    repeal_date
-                )
-
-                # Construct source URL
-                document_base_url = os.getenv('RT_DOCUMENT_BASE_URL', 'https://www.riigiteataja.ee')
-                html_url_path = act_metadata.get('dokumentHtml') # Try to get 'dokumentHtml' first
-
-                if not html_url_path:
-                    # Fallback: Use globaalID to construct the path if dokumentHtml is not found
-                    globaal_id = act_metadata.get('globaalID')
-                    if globaal_id:
-                        html_url_path = f"/akt/{globaal_id}"
-                    # else:
-                    # Optional further fallback: If 'url' (XML path) is more reliable than globaalID
-                    # and globaalID might be missing. For simplicity, this is commented out for now.
-                    # xml_api_path = act_metadata.get('url')
-                    # if xml_api_path and isinstance(xml_api_path, str) and xml_api_path.endswith('.xml'):
-                    #     html_url_path = xml_api_path[:-4] # Removes .xml
-                    # else:
-                    #     html_url_path = '' # Ensure it's an empty string if no suitable path found
-
-                # Construct the full source_url
-                if html_url_path: # If a path (relative or absolute) was determined
-                    if html_url_path.startswith('http'): # If it's already a full URL
-                         source_url = html_url_path
-                    elif html_url_path.startswith('/'): # If it's an absolute path
-                         source_url = f"{document_base_url}{html_url_path}"
-                    else: # If it's a relative path (less likely for this specific case, but good to handle)
-                         source_url = f"{document_base_url}/{html_url_path}" # Assuming it needs a leading slash
-                else:
-                    # Decide how to handle missing URLs: None or an empty string,
-                    # depending on database schema (NULLABLE or NOT NULL) and preference.
-                    # Using None if the database field allows NULLs is often cleaner.
-                    source_url = None
-
-                # Prepare data for insertion
-                full_text_id = act_metadata.get('terviktekstID')
-                data = (
-                    full_text_id,
-                    rt_unique_id,
-                    title,
-                    document_type,
-                    plain_text,
-                    xml_text,
-                    publication_date,
-                    entry_into_force_date,
-                    repeal_date,
-                    status,
-                    source_url,
-                    json.dumps(act_metadata),
-                    datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                )
-
-                # Insert into database
-                cursor.execute('''
-                    INSERT OR IGNORE INTO legal_documents (
-                        full_text_id, rt_unique_id, title, document_type, text_content_plain, text_content_xml,
-                        publication_date, entry_into_force_date, repeal_date, status, source_url,
-                        api_response_json, retrieved_at, last_checked_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', data)
-
-                # Check if insertion was successful (row count)
-                if cursor.rowcount > 0:
-                    total_inserted += 1
-                    logging.info(f"Inserted act full_text_id={full_text_id} rt_unique_id={rt_unique_id}")
-                else:
-                    total_ignored += 1
-                    logging.info(f"Ignored act ID={act_id} (already exists)")
-
+                if error is not None:
+                    raise error
+                writer.add(row)
+                checkpoint.act_finished(act_metadata.get('terviktekstID'), STATE_STORED)
+                metrics.inc('rt_acts_total', result='stored')
             except Exception as e:
                 logging.error(f"Error processing act ID={act_id}: {str(e)}")
-
-            # Commit periodically to avoid losing too much data on crash
-            if total_processed % 10 == 0:
-                conn.commit()
-
-        # Final commit
-        conn.commit()
-
-        # Close the database connection
-        conn.close()
-
-        # Log summary
-        logging.info(f"Processing complete. Total acts: {total_processed}, Inserted: {total_inserted}, Ignored: {total_ignored}")
-
+                checkpoint.act_finished(act_metadata.get('terviktekstID'), STATE_FAILED)
+                metrics.inc('rt_acts_total', result='failed')
+
+        total_skipped = finish_crawl(writer, checkpoint, skipped_ids, RUN_COMPLETED)
+        write_stats = writer.stats()
+
+        logging.info(f"Processing complete. Total acts: {total_processed}, Inserted: {write_stats['rows_inserted']}, "
+                     f"Ignored: {write_stats['rows_ignored']}, Skipped (already stored): {total_skipped}")
+        logging.info(f"Write statistics: {json.dumps(write_stats)}")
+        logging.info(f"Request rate statistics: {json.dumps(rate_limiter.stats())}")
+        logging.info(f"Stage statistics: {json.dumps(pipeline.stats())}")
+
+    except KeyboardInterrupt:
+        logging.warning("Interrupted; saving progress. Run again with --resume to continue.")
+        if writer is not None:
+            finish_crawl(writer, checkpoint, skipped_ids, RUN_INTERRUPTED)
+        sys.exit(130)
     except Exception as e:
         logging.error(f"Critical error: {str(e)}")
+        if checkpoint is not None:
+            logging.error("Progress was saved; run again with --resume to continue.")
+        if writer is not None:
+            finish_crawl(writer, checkpoint, skipped_ids, RUN_FAILED)
+        # A non-zero exit code lets callers such as benchmark.py tell a failed run from a finished one
+        sys.exit(1)
+    finally:
+        # The final numbers are written however the crawl ended
+        reporter.stop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,7 +1,13 @@
 import sqlite3
 import os
+import sys
+import argparse
+from datetime import datetime
 from dotenv import load_dotenv
 
+# Add the src directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
 def get_db_path():
     """Get the database directory and file path from environment variables."""
     database_dir = os.getenv('DATABASE_DIR', './data')
@@ -12,23 +18,9 @@ def get_db_path():
 
     return database_dir, database_path
 
-def initialize_database():
-    """Initialize the SQLite database with the legal_documents table."""
-    # Load environment variables from .env file
-    load_dotenv()
-
-    # Get the database directory and file path
-    database_dir, database_path = get_db_path()
-
-    # Ensure the database directory exists
-    os.makedirs(database_dir, exist_ok=True)
-
-    # Connect to the SQLite database (creates the file if it doesn't exist)
-    conn = sqlite3.connect(database_path)
-    cursor = conn.cursor()
-
-    # Define the SQL statement to create the legal_documents table
-    create_table_sql = '''
+def _migrate_create_legal_documents(conn: sqlite3.Connection):
+    """Create the legal_documents table (adopts tables created before migrations existed)."""
+    conn.execute('''
     CREATE TABLE IF NOT EXISTS legal_documents (
         full_text_id INTEGER PRIMARY KEY,      -- From API 'terviktekstID'
         rt_unique_id TEXT UNIQUE NOT NULL,      -- From API 'globaalID'
@@ -45,18 +37,357 @@ def initialize_database():
         retrieved_at TEXT NOT NULL,         -- ISO timestamp (YYYY-MM-DD HH:MM:SS) of when record was created
         last_checked_at TEXT NOT NULL       -- ISO timestamp (YYYY-MM-DD HH:MM:SS) of when record was last checked/created
     )
+    ''')
+
+def _migrate_add_text_codec(conn: sqlite3.Connection):
+    """Record per row how text_content_plain and text_content_xml are encoded (NULL = plain TEXT)."""
+    conn.execute("ALTER TABLE legal_documents ADD COLUMN text_codec TEXT")
+
+def _migrate_create_search_index(conn: sqlite3.Connection):
+    """Create the FTS5 index over titles and plain texts and fill it from the stored documents."""
+    # Imported here because search imports this module
+    from search import rebuild_search_index
+
+    # remove_diacritics 0 keeps ä, ö, ü, õ, š and ž distinct from a, o, u and s,
+    # as they are separate letters in Estonian; case folding still applies to them
+    conn.execute('''
+    CREATE VIRTUAL TABLE legal_documents_fts USING fts5(
+        title,
+        body,
+        tokenize = "unicode61 remove_diacritics 0"
+    )
+    ''')
+    # Rows are added by DocumentWriter; deletions and title changes are mirrored by triggers
+    conn.execute('''
+    CREATE TRIGGER legal_documents_fts_delete AFTER DELETE ON legal_documents BEGIN
+        DELETE FROM legal_documents_fts WHERE rowid = OLD.full_text_id;
+    END
+    ''')
+    conn.execute('''
+    CREATE TRIGGER legal_documents_fts_update_title AFTER UPDATE OF title ON legal_documents BEGIN
+        UPDATE legal_documents_fts SET title = NEW.title WHERE rowid = NEW.full_text_id;
+    END
+    ''')
+    rebuild_search_index(conn)
+
+def _migrate_create_legal_sections(conn: sqlite3.Connection):
+    """Create the legal_sections table and fill it by parsing the stored XML texts."""
+    # Imported here because legal_sections imports this module
+    from legal_sections import rebuild_sections
+
+    conn.execute('''
+    CREATE TABLE legal_sections (
+        id INTEGER PRIMARY KEY,
+        full_text_id INTEGER NOT NULL,      -- legal_documents.full_text_id
+        position INTEGER NOT NULL,          -- Order of the row within the act, starting at 1
+        chapter_number TEXT,                -- From XML 'peatykkNr'
+        chapter_title TEXT,                 -- From XML 'peatykkPealkiri'
+        section_number TEXT,                -- From XML 'paragrahvNr' (§), e.g. '12' or '12^1'
+        section_title TEXT,                 -- From XML 'paragrahvPealkiri'
+        subsection_number TEXT,             -- From XML 'loigeNr' (lõige)
+        point_number TEXT,                  -- From XML 'alampunktNr' (punkt)
+        text TEXT                           -- Text of this unit; NULL for a section without text
+    )
+    ''')
+    conn.execute('''
+    CREATE INDEX idx_legal_sections_lookup
+        ON legal_sections (full_text_id, section_number, subsection_number, position)
+    ''')
+    conn.execute('''
+    CREATE TRIGGER legal_sections_delete AFTER DELETE ON legal_documents BEGIN
+        DELETE FROM legal_sections WHERE full_text_id = OLD.full_text_id;
+    END
+    ''')
+    rebuild_sections(conn)
+
+def _migrate_add_text_content_html(conn: sqlite3.Connection):
+    """Add a column for the raw HTML page of acts whose plain text was extracted from HTML."""
+    conn.execute("ALTER TABLE legal_documents ADD COLUMN text_content_html TEXT")
+
+def _migrate_create_crawl_checkpoints(conn: sqlite3.Connection):
+    """Create the tables that record crawl progress so an interrupted crawl can be resumed."""
+    conn.execute('''
+    CREATE TABLE crawl_runs (
+        run_id INTEGER PRIMARY KEY,
+        query_params TEXT NOT NULL,         -- JSON of the API query parameters without 'leht', keys sorted
+        status TEXT NOT NULL CHECK(status IN ('RUNNING', 'COMPLETED', 'INTERRUPTED', 'FAILED')),
+        last_completed_page INTEGER NOT NULL DEFAULT 0, -- Every act on this page and the pages before it is processed
+        acts_processed INTEGER NOT NULL DEFAULT 0,
+        started_at TEXT NOT NULL,           -- ISO timestamp (YYYY-MM-DD HH:MM:SS)
+        updated_at TEXT NOT NULL            -- ISO timestamp (YYYY-MM-DD HH:MM:SS) of the last checkpoint
+    )
+    ''')
+    conn.execute('''
+    CREATE TABLE crawl_checkpoints (
+        run_id INTEGER NOT NULL,            -- crawl_runs.run_id
+        full_text_id INTEGER NOT NULL,      -- From API 'terviktekstID'
+        page INTEGER NOT NULL,              -- Listing page the act was found on
+        state TEXT NOT NULL CHECK(state IN ('PENDING', 'STORED', 'SKIPPED', 'FAILED')),
+        updated_at TEXT NOT NULL,           -- ISO timestamp (YYYY-MM-DD HH:MM:SS)
+        PRIMARY KEY (run_id, full_text_id)
+    ) WITHOUT ROWID
+    ''')
+    conn.execute("CREATE INDEX idx_crawl_runs_query ON crawl_runs (query_params, status)")
+
+def _migrate_index_status_dates(conn: sqlite3.Connection):
+    """Index the dates the status is derived from, for incremental status refreshes."""
+    conn.execute("CREATE INDEX idx_legal_documents_entry_into_force ON legal_documents (entry_into_force_date)")
+    conn.execute("CREATE INDEX idx_legal_documents_repeal ON legal_documents (repeal_date)")
+
+def _migrate_create_document_blobs(conn: sqlite3.Connection):
+    """Store each distinct document text once in document_blobs and reference it by hash."""
+    # Imported here because document_blobs imports this module
+    from document_blobs import migrate_legacy_texts
+
+    conn.execute('''
+    CREATE TABLE document_blobs (
+        hash TEXT PRIMARY KEY,              -- SHA-256 (hex) of the UTF-8 text
+        codec TEXT,                         -- Storage codec of content (NULL = plain TEXT)
+        content NOT NULL,                   -- The text, encoded with codec
+        size INTEGER NOT NULL               -- Length of the UTF-8 text in bytes
+    )
+    ''')
+    for column in ('plain_text_hash', 'xml_text_hash', 'html_text_hash'):
+        conn.execute(f"ALTER TABLE legal_documents ADD COLUMN {column} TEXT REFERENCES document_blobs (hash)")
+        conn.execute(f"CREATE INDEX idx_legal_documents_{column} ON legal_documents ({column}) "
+                     f"WHERE {column} IS NOT NULL")
+    # The texts of each document with their codecs, for decompress_text() and the readers in document_blobs
+    conn.execute('''
+    CREATE VIEW legal_document_texts AS
+    SELECT d.full_text_id, d.title,
+           p.content AS text_content_plain, p.codec AS plain_codec,
+           x.content AS text_content_xml, x.codec AS xml_codec,
+           h.content AS text_content_html, h.codec AS html_codec
+    FROM legal_documents d
+    LEFT JOIN document_blobs p ON p.hash = d.plain_text_hash
+    LEFT JOIN document_blobs x ON x.hash = d.xml_text_hash
+    LEFT JOIN document_blobs h ON h.hash = d.html_text_hash
+    ''')
+    # text_content_plain, text_content_xml, text_content_html and text_codec stay
+    # in legal_documents for older databases but are NULL from here on
+    migrate_legacy_texts(conn)
+
+def _migrate_add_versions(conn: sqlite3.Connection):
+    """Group the versions of an act by lineage and allow blobs to be stored as deltas of another blob."""
+    conn.execute("ALTER TABLE legal_documents ADD COLUMN lineage_id INTEGER")  # From API 'terviktekstiGrupiID'
+    conn.execute('''
+    UPDATE legal_documents SET lineage_id = json_extract(api_response_json, '$.terviktekstiGrupiID')
+    WHERE json_valid(api_response_json)
+    ''')
+    conn.execute("CREATE INDEX idx_legal_documents_lineage ON legal_documents (lineage_id, entry_into_force_date) "
+                 "WHERE lineage_id IS NOT NULL")
+    # A blob with a base_hash holds a delta against that blob, which is always stored in full
+    conn.execute("ALTER TABLE document_blobs ADD COLUMN base_hash TEXT REFERENCES document_blobs (hash)")
+    conn.execute("CREATE INDEX idx_document_blobs_base ON document_blobs (base_hash) WHERE base_hash IS NOT NULL")
+    # Deltas cannot be decoded in SQL, so the view leaves their content out
+    conn.execute("DROP VIEW legal_document_texts")
+    conn.execute('''
+    CREATE VIEW legal_document_texts AS
+    SELECT d.full_text_id, d.title,
+           CASE WHEN p.base_hash IS NULL THEN p.content END AS text_content_plain, p.codec AS plain_codec,
+           CASE WHEN x.base_hash IS NULL THEN x.content END AS text_content_xml, x.codec AS xml_codec,
+           CASE WHEN h.base_hash IS NULL THEN h.content END AS text_content_html, h.codec AS html_codec
+    FROM legal_documents d
+    LEFT JOIN document_blobs p ON p.hash = d.plain_text_hash
+    LEFT JOIN document_blobs x ON x.hash = d.xml_text_hash
+    LEFT JOIN document_blobs h ON h.hash = d.html_text_hash
+    ''')
+
+def _change_seq_trigger_sql(columns: tuple) -> str:
+    """SQL of the trigger giving a row the next change_seq when one of the columns is updated."""
+    return f'''
+    CREATE TRIGGER legal_documents_change_seq_update AFTER UPDATE OF {', '.join(columns)} ON legal_documents BEGIN
+        UPDATE legal_documents SET change_seq = (SELECT MAX(change_seq) + 1 FROM legal_documents)
+        WHERE full_text_id = NEW.full_text_id;
+    END
     '''
 
-    # Drop the existing table (if any) and recreate it to ensure the new schema
-    cursor.execute("DROP TABLE IF EXISTS legal_documents")
-    cursor.execute(create_table_sql)
+def _migrate_add_change_seq(conn: sqlite3.Connection):
+    """Number every insert and update of legal_documents, so exports can pick up changed rows."""
+    conn.execute("ALTER TABLE legal_documents ADD COLUMN change_seq INTEGER")
+    conn.execute("UPDATE legal_documents SET change_seq = full_text_id")
+    conn.execute("CREATE UNIQUE INDEX idx_legal_documents_change_seq ON legal_documents (change_seq)")
+    # MAX(change_seq) is read from the index, so numbering a row costs two index lookups
+    conn.execute('''
+    CREATE TRIGGER legal_documents_change_seq_insert AFTER INSERT ON legal_documents BEGIN
+        UPDATE legal_documents SET change_seq = (SELECT COALESCE(MAX(change_seq), 0) + 1 FROM legal_documents)
+        WHERE full_text_id = NEW.full_text_id;
+    END
+    ''')
+    # last_checked_at is left out: every crawl touches it, and exporting all acts after each crawl
+    # would defeat incremental exports
+    conn.execute(_change_seq_trigger_sql((
+        'rt_unique_id', 'lineage_id', 'title', 'document_type', 'plain_text_hash', 'xml_text_hash', 'html_text_hash',
+        'publication_date', 'entry_into_force_date', 'repeal_date', 'status', 'source_url', 'api_response_json'
+    )))
+
+def _migrate_promote_metadata(conn: sqlite3.Connection):
+    """Promote the text and XML links out of api_response_json, index the common filters and compress the JSON."""
+    # Imported here because storage_codec imports this module
+    from storage_codec import TEXT_STORAGE_CODEC, convert_api_responses
+
+    conn.execute("ALTER TABLE legal_documents ADD COLUMN text_url TEXT")      # From API 'dokumentTekst'
+    conn.execute("ALTER TABLE legal_documents ADD COLUMN xml_url TEXT")       # From API 'dokumentXML'
+    conn.execute("ALTER TABLE legal_documents ADD COLUMN api_response_codec TEXT")  # Codec of api_response_json (NULL = plain TEXT)
+    # Neither the backfill nor re-encoding the JSON changes an act, so change_seq is left alone
+    conn.execute("DROP TRIGGER legal_documents_change_seq_update")
+    conn.execute('''
+    UPDATE legal_documents SET text_url = json_extract(api_response_json, '$.dokumentTekst'),
+                               xml_url = json_extract(api_response_json, '$.dokumentXML')
+    WHERE json_valid(api_response_json)
+    ''')
+    convert_api_responses(conn, TEXT_STORAGE_CODEC)
+    conn.execute(_change_seq_trigger_sql((
+        'rt_unique_id', 'lineage_id', 'title', 'document_type', 'plain_text_hash', 'xml_text_hash', 'html_text_hash',
+        'publication_date', 'entry_into_force_date', 'repeal_date', 'status', 'source_url', 'text_url', 'xml_url'
+    )))
+    # Listing by type, optionally narrowed by status and publication date, is answered from the index
+    conn.execute("CREATE INDEX idx_legal_documents_type_status ON legal_documents "
+                 "(document_type, status, publication_date)")
+    conn.execute("CREATE INDEX idx_legal_documents_status ON legal_documents (status, entry_into_force_date)")
+    conn.execute("CREATE INDEX idx_legal_documents_publication ON legal_documents (publication_date)")
+    # Versions are looked up by lineage and date and usually shown with their RT identifier
+    conn.execute("DROP INDEX idx_legal_documents_lineage")
+    conn.execute("CREATE INDEX idx_legal_documents_lineage ON legal_documents "
+                 "(lineage_id, entry_into_force_date, rt_unique_id) WHERE lineage_id IS NOT NULL")
+
+def _migrate_add_duplicate_state(conn: sqlite3.Connection):
+    """Allow the DUPLICATE state for acts a sharded crawl leaves to the shard that claimed them."""
+    # A CHECK constraint cannot be altered, so the table is rebuilt
+    conn.execute('''
+    CREATE TABLE crawl_checkpoints_new (
+        run_id INTEGER NOT NULL,            -- crawl_runs.run_id
+        full_text_id INTEGER NOT NULL,      -- From API 'terviktekstID'
+        page INTEGER NOT NULL,              -- Listing page the act was found on
+        state TEXT NOT NULL CHECK(state IN ('PENDING', 'STORED', 'SKIPPED', 'FAILED', 'DUPLICATE')),
+        updated_at TEXT NOT NULL,           -- ISO timestamp (YYYY-MM-DD HH:MM:SS)
+        PRIMARY KEY (run_id, full_text_id)
+    ) WITHOUT ROWID
+    ''')
+    conn.execute("INSERT INTO crawl_checkpoints_new SELECT run_id, full_text_id, page, state, updated_at "
+                 "FROM crawl_checkpoints")
+    conn.execute("DROP TABLE crawl_checkpoints")
+    conn.execute("ALTER TABLE crawl_checkpoints_new RENAME TO crawl_checkpoints")
+
+# Ordered forward migrations: (version, description, function applying it to a connection).
+# Never edit or reorder an applied migration; append a new one instead.
+MIGRATIONS = [
+    (1, "Create legal_documents table", _migrate_create_legal_documents),
+    (2, "Add text_codec column for compressed document texts", _migrate_add_text_codec),
+    (3, "Create FTS5 search index over titles and plain texts", _migrate_create_search_index),
+    (4, "Create legal_sections table parsed from the XML texts", _migrate_create_legal_sections),
+    (5, "Add text_content_html column for raw HTML pages", _migrate_add_text_content_html),
+    (6, "Create crawl_runs and crawl_checkpoints tables", _migrate_create_crawl_checkpoints),
+    (7, "Index entry_into_force_date and repeal_date for status refreshes", _migrate_index_status_dates),
+    (8, "Create document_blobs table for deduplicated document texts", _migrate_create_document_blobs),
+    (9, "Add lineage_id and delta-encoded document_blobs", _migrate_add_versions),
+    (10, "Add change_seq to legal_documents for incremental exports", _migrate_add_change_seq),
+    (11, "Promote text and XML links to columns, index common filters and compress api_response_json",
+     _migrate_promote_metadata),
+    (12, "Add the DUPLICATE state to crawl_checkpoints for sharded crawls", _migrate_add_duplicate_state),
+]
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """
+    Return the highest migration version applied to the database.
+
+    Args:
+        conn: Open database connection.
+
+    Returns:
+        int: The schema version, or 0 for an empty database.
+    """
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TEXT NOT NULL            -- ISO timestamp (YYYY-MM-DD HH:MM:SS)
+    )
+    ''')
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+def apply_migrations(conn: sqlite3.Connection) -> list[int]:
+    """
+    Apply all pending migrations in order, each in its own transaction.
+
+    Args:
+        conn: Database connection opened with isolation_level=None.
+
+    Returns:
+        list[int]: Versions that were applied.
+    """
+    current_version = get_schema_version(conn)
+    applied = []
+    for version, description, migrate in MIGRATIONS:
+        if version <= current_version:
+            continue
+        conn.execute("BEGIN")
+        try:
+            migrate(conn)
+            conn.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                (version, description, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        applied.append(version)
+    return applied
+
+def reset_database(conn: sqlite3.Connection):
+    """
+    Drop every table, view and trigger in the database.
+
+    Args:
+        conn: Database connection opened with isolation_level=None.
+    """
+    # Virtual tables go first because dropping them also removes their shadow tables
+    for object_type in ('virtual', 'view', 'table'):
+        if object_type == 'virtual':
+            query = "SELECT 'table', name FROM sqlite_master WHERE type = 'table' AND sql LIKE 'CREATE VIRTUAL TABLE%'"
+        else:
+            query = f"SELECT type, name FROM sqlite_master WHERE type = '{object_type}' AND name NOT LIKE 'sqlite_%'"
+        for sql_type, name in conn.execute(query).fetchall():
+            conn.execute(f'DROP {sql_type.upper()} IF EXISTS "{name}"')
+
+def initialize_database(reset: bool = False):
+    """
+    Create or upgrade the database schema by applying pending migrations.
+
+    Existing data is kept unless reset is True.
+
+    Args:
+        reset: Drop all tables first and rebuild the schema from scratch.
+    """
+    # Load environment variables from .env file
+    load_dotenv()
+
+    # Get the database directory and file path
+    database_dir, database_path = get_db_path()
+
+    # Ensure the database directory exists
+    os.makedirs(database_dir, exist_ok=True)
 
-    # Commit the changes and close the connection
-    conn.commit()
-    conn.close()
+    # Migrations manage their own transactions
+    conn = sqlite3.connect(database_path, isolation_level=None)
+    try:
+        if reset:
+            reset_database(conn)
+            print(f"Database '{os.path.basename(database_path)}' was reset; all tables were dropped.")
+        applied = apply_migrations(conn)
+        version = get_schema_version(conn)
+    finally:
+        conn.close()
 
-    # Print a success message
-    print(f"Database '{os.path.basename(database_path)}' initialized successfully with 'legal_documents' table in '{database_dir}'. The table uses 'rt_unique_id' as the primary key.")
+    if applied:
+        print(f"Database '{os.path.basename(database_path)}' in '{database_dir}' migrated to schema version {version} (applied: {', '.join(map(str, applied))}).")
+    else:
+        print(f"Database '{os.path.basename(database_path)}' in '{database_dir}' is up to date at schema version {version}.")
 
 if __name__ == "__main__":
-    initialize_database()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Create or upgrade the legal documents database.")
+    parser.add_argument("--reset", action="store_true",
+                        help="Drop all tables and rebuild the schema from scratch. This deletes all stored documents.")
+    args = parser.parse_args()
+    initialize_database(reset=args.reset)
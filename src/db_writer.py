@@ -0,0 +1,326 @@
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+
+# Add the src directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from document_blobs import HASH_COLUMNS, content_hash, prune_blobs, store_blobs
+from legal_sections import store_sections
+from search import index_documents
+from storage_codec import CODEC_NONE, COMPRESSED_TEXT_COLUMNS, TEXT_STORAGE_CODEC, encode_text, validate_codec
+
+DB_WRITE_BATCH_SIZE = int(os.getenv('DB_WRITE_BATCH_SIZE', 100))
+DB_SYNCHRONOUS = os.getenv('DB_SYNCHRONOUS', 'NORMAL')
+DB_CACHE_SIZE_MB = int(os.getenv('DB_CACHE_SIZE_MB', 64))
+DB_TEMP_STORE = os.getenv('DB_TEMP_STORE', 'MEMORY')
+
+INSERT_DOCUMENT_SQL = '''
+    INSERT OR IGNORE INTO legal_documents (
+        full_text_id, rt_unique_id, lineage_id, title, document_type, plain_text_hash, xml_text_hash, html_text_hash,
+        publication_date, entry_into_force_date, repeal_date, status, source_url, text_url, xml_url,
+        api_response_json, api_response_codec, retrieved_at, last_checked_at
+    ) VALUES (
+        :full_text_id, :rt_unique_id, :lineage_id, :title, :document_type, :plain_text_hash, :xml_text_hash, :html_text_hash,
+        :publication_date, :entry_into_force_date, :repeal_date, :status, :source_url, :text_url, :xml_url,
+        :api_response_json, :api_response_codec, :retrieved_at, :last_checked_at
+    )
+'''
+
+# A text missing from a new fetch keeps the stored one
+UPDATE_TEXTS_SQL = '''
+    UPDATE legal_documents SET
+        title = :title,
+        plain_text_hash = COALESCE(:plain_text_hash, plain_text_hash),
+        xml_text_hash = COALESCE(:xml_text_hash, xml_text_hash),
+        html_text_hash = COALESCE(:html_text_hash, html_text_hash),
+        retrieved_at = :retrieved_at,
+        last_checked_at = :last_checked_at
+    WHERE full_text_id = :full_text_id
+'''
+
+
+def configure_write_connection(conn: sqlite3.Connection, synchronous: str = DB_SYNCHRONOUS,
+                               cache_size_mb: int = DB_CACHE_SIZE_MB, temp_store: str = DB_TEMP_STORE):
+    """
+    Apply the pragmas used for bulk writes.
+
+    WAL mode lets readers query the database while a crawl is writing, and with
+    WAL, synchronous=NORMAL only syncs at checkpoints instead of on every commit.
+
+    Args:
+        conn: Connection to configure.
+        synchronous: Value for PRAGMA synchronous (OFF, NORMAL, FULL or EXTRA).
+        cache_size_mb: Page cache size in megabytes.
+        temp_store: Value for PRAGMA temp_store (DEFAULT, FILE or MEMORY).
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={synchronous}")
+    # A negative cache_size is interpreted by SQLite as KiB instead of pages
+    conn.execute(f"PRAGMA cache_size={-cache_size_mb * 1024}")
+    conn.execute(f"PRAGMA temp_store={temp_store}")
+
+
+class DocumentWriter:
+    """
+    Buffered writer for the legal_documents table.
+
+    Rows are collected in memory and written with one ``executemany`` per batch
+    inside a single transaction, so a crawl commits once per batch instead of
+    syncing for every act. Document texts are stored once per distinct content
+    in document_blobs, compressed with the configured storage codec, and rows
+    reference them by hash. Newly inserted documents are added to the full-text
+    search index and their XML is parsed into legal_sections in the same
+    transaction. A document fetched again with a different text replaces the
+    stored texts, and its index entry and sections are rebuilt.
+    """
+
+    def __init__(self, database_path: str, batch_size: int = DB_WRITE_BATCH_SIZE,
+                 codec: str = TEXT_STORAGE_CODEC, on_flush=None, metrics=None):
+        """
+        Open the database for writing.
+
+        Args:
+            database_path: Path to the SQLite database file.
+            batch_size: Number of rows buffered before they are flushed.
+            codec: Storage codec for the document texts and API responses ('none', 'zlib' or 'zstd').
+            on_flush: Optional callable invoked without arguments after every flush,
+                      once the batch is committed (e.g. to save crawl progress).
+            metrics: Optional MetricsRegistry receiving the flush durations and row counts.
+        """
+        self.batch_size = max(1, batch_size)
+        self.on_flush = on_flush
+        self.metrics = metrics
+        self.codec = validate_codec(codec)
+        self.text_bytes_raw = 0
+        self.text_bytes_stored = 0
+        self.blobs_reused = 0
+        self.conn = sqlite3.connect(database_path)
+        configure_write_connection(self.conn)
+        self._buffer = []
+        self.rows_written = 0
+        self.rows_ignored = 0
+        self.rows_failed = 0
+        self.rows_changed = 0
+        self.batches_flushed = 0
+        self.write_seconds = 0.0
+        self._started_at = time.monotonic()
+
+    def add(self, row: dict):
+        """
+        Queue a row for insertion, flushing when the batch is full.
+
+        Args:
+            row: Column values keyed by the named parameters of INSERT_DOCUMENT_SQL,
+                 with the document texts as str under the text_content_* keys instead
+                 of their hashes and api_response_json as str; text_content_html,
+                 lineage_id, text_url, xml_url and api_response_codec may be omitted.
+        """
+        # The texts are kept until the flush, where only new ones are compressed
+        document = {column: row.get(column) for column in ('full_text_id', 'title') + COMPRESSED_TEXT_COLUMNS}
+        row = dict(row)
+        for column in ('lineage_id', 'text_url', 'xml_url'):
+            row.setdefault(column, None)
+        api_response_json = row.get('api_response_json')
+        row['api_response_json'] = encode_text(api_response_json, self.codec)
+        row['api_response_codec'] = None if api_response_json is None or self.codec == CODEC_NONE else self.codec
+        for column in COMPRESSED_TEXT_COLUMNS:
+            text = row.pop(column, None)
+            row[HASH_COLUMNS[column]] = None if text is None else content_hash(text)
+            if text is not None:
+                self.text_bytes_raw += len(text.encode('utf-8'))
+        self._buffer.append((row, document))
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write all buffered rows in one transaction.
+
+        Returns:
+            int: Number of rows inserted; rows whose IDs already exist are ignored
+                 unless their texts changed.
+        """
+        if not self._buffer:
+            return 0
+        batch = self._buffer
+        self._buffer = []
+
+        started_at = time.monotonic()
+        failed = 0
+        try:
+            with self.conn:
+                inserted, changed = self._insert_batch(batch)
+        except sqlite3.DatabaseError as e:
+            # One bad row aborts the whole batch; retry row by row so the others are kept
+            logging.warning(f"Batch insert failed ({str(e)}); retrying {len(batch)} rows individually")
+            inserted, changed, failed = self._insert_individually(batch)
+        elapsed = time.monotonic() - started_at
+
+        ignored = len(batch) - inserted - changed - failed
+        self.rows_written += inserted
+        self.rows_changed += changed
+        self.rows_failed += failed
+        self.rows_ignored += ignored
+        self.batches_flushed += 1
+        self.write_seconds += elapsed
+        if self.metrics is not None:
+            self.metrics.observe('rt_stage_duration_seconds', elapsed, stage='insert')
+            for result, count in (('inserted', inserted), ('changed', changed), ('ignored', ignored), ('failed', failed)):
+                self.metrics.inc('rt_db_rows_total', count, result=result)
+        logging.info(f"Flushed {len(batch)} rows ({inserted} inserted, {changed} changed, {ignored} ignored, {failed} failed) "
+                     f"in {elapsed:.3f}s; {self.rows_per_second():.1f} rows/s overall")
+        if self.on_flush is not None:
+            self.on_flush()
+        return inserted
+
+    @property
+    def pending_rows(self) -> int:
+        """Number of rows buffered and not yet flushed."""
+        return len(self._buffer)
+
+    def _stored_hashes(self, full_text_ids: list) -> dict:
+        """Return the text hashes of the given full_text_id values that are present in legal_documents."""
+        return {row[0]: tuple(row[1:]) for row in self.conn.execute(
+            f"SELECT full_text_id, {', '.join(HASH_COLUMNS.values())} FROM legal_documents "
+            "WHERE full_text_id IN (SELECT value FROM json_each(?))",
+            (json.dumps(full_text_ids),)
+        )}
+
+    def _insert_batch(self, batch: list) -> tuple[int, int]:
+        """
+        Insert rows, update changed texts and maintain the derived tables inside the caller's transaction.
+
+        Args:
+            batch: (row, document) pairs as buffered by add().
+
+        Returns:
+            tuple[int, int]: Number of rows inserted and number of stored rows whose texts were replaced.
+        """
+        full_text_ids = [document['full_text_id'] for _, document in batch]
+        existing = self._stored_hashes(full_text_ids)
+        self.conn.executemany(INSERT_DOCUMENT_SQL, [row for row, _ in batch])
+        # INSERT OR IGNORE does not report which rows were skipped, so compare
+        # the stored IDs before and after the insert
+        inserted_ids = set(self._stored_hashes(full_text_ids)) - set(existing)
+        inserted_documents = []
+        changed_rows = []
+        replaced_hashes = set()
+        texts = {}
+        references = 0
+        for row, document in batch:
+            # A repeated ID within the batch was only inserted once
+            if document['full_text_id'] in inserted_ids:
+                inserted_ids.discard(document['full_text_id'])
+                inserted_documents.append(document)
+            elif document['full_text_id'] in existing:
+                stored = dict(zip(HASH_COLUMNS.values(), existing[document['full_text_id']]))
+                changed_columns = [column for column, hash_column in HASH_COLUMNS.items()
+                                   if row[hash_column] is not None and row[hash_column] != stored[hash_column]]
+                if not changed_columns:
+                    continue
+                logging.info(f"Act full_text_id={document['full_text_id']} differs from the stored version; "
+                             f"replacing {', '.join(changed_columns)}")
+                changed_rows.append((row, document, changed_columns))
+                replaced_hashes.update(stored[HASH_COLUMNS[column]] for column in changed_columns)
+                # Later rows in the batch compare against this version
+                stored.update((HASH_COLUMNS[column], row[HASH_COLUMNS[column]]) for column in changed_columns)
+                existing[document['full_text_id']] = tuple(stored.values())
+            else:
+                continue
+            for column, hash_column in HASH_COLUMNS.items():
+                if row[hash_column] is not None:
+                    texts[row[hash_column]] = document[column]
+                    references += 1
+        added, stored_bytes = store_blobs(self.conn, texts, self.codec)
+        self.blobs_reused += references - added
+        self.text_bytes_stored += stored_bytes
+
+        if changed_rows:
+            self.conn.executemany(UPDATE_TEXTS_SQL, [row for row, _, _ in changed_rows])
+            replaced_hashes.discard(None)
+            prune_blobs(self.conn, replaced_hashes)
+        index_documents(self.conn, ((document['full_text_id'], document['title'], document['text_content_plain'])
+                                    for document in inserted_documents))
+        index_documents(self.conn, ((document['full_text_id'], document['title'], document['text_content_plain'])
+                                    for _, document, _ in changed_rows if document['text_content_plain'] is not None))
+        for document in inserted_documents:
+            store_sections(self.conn, document['full_text_id'], document['text_content_xml'])
+        for _, document, columns in changed_rows:
+            if 'text_content_xml' in columns:
+                store_sections(self.conn, document['full_text_id'], document['text_content_xml'])
+        return len(inserted_documents), len(changed_rows)
+
+    def _insert_individually(self, batch: list) -> tuple[int, int, int]:
+        """
+        Insert rows one transaction at a time, logging the ones that fail.
+
+        Args:
+            batch: (row, document) pairs as buffered by add().
+
+        Returns:
+            tuple[int, int, int]: Number of rows inserted, changed and failed.
+        """
+        inserted = 0
+        changed = 0
+        failed = 0
+        for row, document in batch:
+            try:
+                with self.conn:
+                    row_inserted, row_changed = self._insert_batch([(row, document)])
+                inserted += row_inserted
+                changed += row_changed
+            except sqlite3.DatabaseError as e:
+                failed += 1
+                logging.error(f"Error inserting act full_text_id={row.get('full_text_id')}: {str(e)}")
+        return inserted, changed, failed
+
+    def rows_per_second(self) -> float:
+        """
+        Return the overall insert throughput since the writer was opened.
+
+        Returns:
+            float: Rows inserted or ignored per second of wall-clock time.
+        """
+        elapsed = time.monotonic() - self._started_at
+        if elapsed <= 0:
+            return 0.0
+        return (self.rows_written + self.rows_ignored) / elapsed
+
+    def stats(self) -> dict:
+        """
+        Return write statistics.
+
+        Returns:
+            dict: Rows inserted, changed and ignored, batches, time spent writing and throughput.
+        """
+        total_rows = self.rows_written + self.rows_ignored
+        return {
+            'rows_inserted': self.rows_written,
+            'rows_ignored': self.rows_ignored,
+            'rows_failed': self.rows_failed,
+            'batches': self.batches_flushed,
+            'write_seconds': round(self.write_seconds, 3),
+            'rows_per_second': round(self.rows_per_second(), 1),
+            'write_rows_per_second': round(total_rows / self.write_seconds, 1) if self.write_seconds > 0 else 0.0,
+            'rows_changed': self.rows_changed,
+            'text_bytes_raw': self.text_bytes_raw,
+            'text_bytes_stored': self.text_bytes_stored,
+            'blobs_reused': self.blobs_reused
+        }
+
+    def close(self):
+        """Flush remaining rows and close the connection."""
+        try:
+            self.flush()
+        finally:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,391 @@
+import argparse
+import difflib
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+# Add the src directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_setup import get_db_path, initialize_database
+from storage_codec import CODEC_NONE, COMPRESSED_TEXT_COLUMNS, decode_text, encode_text
+
+# legal_documents column referencing the blob of each text
+HASH_COLUMNS = {
+    'text_content_plain': 'plain_text_hash',
+    'text_content_xml': 'xml_text_hash',
+    'text_content_html': 'html_text_hash',
+}
+# Units a delta is made of: lines, and XML/HTML split after each tag, whose
+# documents may come on a single line
+DELTA_UNIT_PATTERN = re.compile(r'[^\n>]*[\n>]|[^\n>]+')
+
+# Number of reconstructed base texts kept in memory for reading deltas
+DELTA_BASE_CACHE_SIZE = int(os.getenv('DELTA_BASE_CACHE_SIZE', 16))
+
+# Blobs are content-addressed, so a cached text can never go stale
+_base_cache = OrderedDict()
+_base_cache_lock = threading.Lock()
+
+
+def content_hash(text: str) -> str:
+    """
+    Return the key of a document text in document_blobs.
+
+    Args:
+        text: The document text.
+
+    Returns:
+        str: Hex SHA-256 of the UTF-8 encoded text.
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def existing_hashes(conn: sqlite3.Connection, hashes) -> set:
+    """Return which of the given hashes are already stored in document_blobs."""
+    return {row[0] for row in conn.execute(
+        "SELECT hash FROM document_blobs WHERE hash IN (SELECT value FROM json_each(?))", (json.dumps(list(hashes)),)
+    )}
+
+
+def store_blobs(conn: sqlite3.Connection, texts: dict, codec: str) -> tuple[int, int]:
+    """
+    Store texts that are not yet in document_blobs, inside the caller's transaction.
+
+    Only new texts are compressed, so a body seen before costs one hash and
+    one index lookup.
+
+    Args:
+        conn: Open database connection.
+        texts: Texts keyed by their content_hash().
+        codec: Storage codec for new blobs.
+
+    Returns:
+        tuple[int, int]: Number of blobs added and their stored size in bytes.
+    """
+    new_hashes = set(texts) - existing_hashes(conn, texts)
+    rows = []
+    stored_bytes = 0
+    for text_hash in new_hashes:
+        text = texts[text_hash]
+        encoded = encode_text(text, codec)
+        stored_bytes += len(encoded.encode('utf-8')) if isinstance(encoded, str) else len(encoded)
+        rows.append((text_hash, None if codec == CODEC_NONE else codec, encoded, len(text.encode('utf-8'))))
+    conn.executemany("INSERT OR IGNORE INTO document_blobs (hash, codec, content, size) VALUES (?, ?, ?, ?)", rows)
+    return len(rows), stored_bytes
+
+
+def has_blob_columns(conn: sqlite3.Connection) -> bool:
+    """Return True once legal_documents references its texts in document_blobs (schema version 8)."""
+    return any(row[1] == 'plain_text_hash' for row in conn.execute("PRAGMA table_info(legal_documents)"))
+
+
+def make_delta(base_text: str, text: str) -> list:
+    """
+    Describe a text as ranges copied from a base text plus inserted text.
+
+    Args:
+        base_text: The text the delta refers to.
+        text: The text to describe.
+
+    Returns:
+        list: [start, end] ranges of base units to copy and str items to insert, in order.
+    """
+    base_lines = DELTA_UNIT_PATTERN.findall(base_text)
+    lines = DELTA_UNIT_PATTERN.findall(text)
+    delta = []
+    matcher = difflib.SequenceMatcher(None, base_lines, lines)
+    for tag, base_start, base_end, start, end in matcher.get_opcodes():
+        if tag == 'equal':
+            delta.append([base_start, base_end])
+        elif start < end:
+            inserted = ''.join(lines[start:end])
+            if delta and isinstance(delta[-1], str):
+                delta[-1] += inserted
+            else:
+                delta.append(inserted)
+    return delta
+
+
+def apply_delta(base_text: str, delta: list) -> str:
+    """
+    Rebuild a text from its base text and a delta made by make_delta().
+
+    Args:
+        base_text: The text the delta refers to.
+        delta: The delta.
+
+    Returns:
+        str: The text.
+    """
+    base_lines = DELTA_UNIT_PATTERN.findall(base_text)
+    return ''.join(item if isinstance(item, str) else ''.join(base_lines[item[0]:item[1]]) for item in delta)
+
+
+def _cached_base(text_hash: str) -> str | None:
+    with _base_cache_lock:
+        text = _base_cache.get(text_hash)
+        if text is not None:
+            _base_cache.move_to_end(text_hash)
+        return text
+
+
+def _cache_base(text_hash: str, text: str):
+    with _base_cache_lock:
+        _base_cache[text_hash] = text
+        _base_cache.move_to_end(text_hash)
+        while len(_base_cache) > DELTA_BASE_CACHE_SIZE:
+            _base_cache.popitem(last=False)
+
+
+def read_blobs(conn: sqlite3.Connection, hashes) -> dict:
+    """
+    Return the decoded texts of the given blobs.
+
+    Blobs stored as a delta are rebuilt from their base text; recently used
+    base texts are kept in memory, as the versions of one act share a base.
+
+    Args:
+        conn: Open database connection.
+        hashes: Blob hashes; None values are ignored.
+
+    Returns:
+        dict: Texts keyed by hash, for the hashes that are stored.
+    """
+    query = ("SELECT hash, codec, content, base_hash FROM document_blobs "
+             "WHERE hash IN (SELECT value FROM json_each(?))")
+    rows = conn.execute(query, (json.dumps([h for h in set(hashes) if h is not None]),)).fetchall()
+    texts = {text_hash: decode_text(content, codec) for text_hash, codec, content, base_hash in rows
+             if base_hash is None}
+    deltas = [(text_hash, base_hash, decode_text(content, codec))
+              for text_hash, codec, content, base_hash in rows if base_hash is not None]
+    if not deltas:
+        return texts
+
+    bases = {}
+    missing = []
+    for _, base_hash, _ in deltas:
+        base_text = texts[base_hash] if base_hash in texts else _cached_base(base_hash)
+        if base_text is None:
+            missing.append(base_hash)
+        else:
+            bases[base_hash] = base_text
+    if missing:
+        # A base is always stored in full
+        for text_hash, codec, content, _ in conn.execute(query, (json.dumps(missing),)):
+            bases[text_hash] = decode_text(content, codec)
+    for base_hash, base_text in bases.items():
+        _cache_base(base_hash, base_text)
+    for text_hash, base_hash, delta in deltas:
+        texts[text_hash] = apply_delta(bases[base_hash], json.loads(delta))
+    return texts
+
+
+def iter_text_batches(conn: sqlite3.Connection, columns: tuple = COMPRESSED_TEXT_COLUMNS, batch_size: int = 200):
+    """
+    Read documents with their decoded texts in full_text_id order, a batch at a time.
+
+    Works on both storage layouts, so the backfills of earlier migrations can
+    still read databases in which the texts are stored in legal_documents.
+
+    Args:
+        conn: Open database connection.
+        columns: Text columns to read, from COMPRESSED_TEXT_COLUMNS.
+        batch_size: Number of documents per batch.
+
+    Yields:
+        list[tuple[int, str, dict]]: full_text_id, title and the texts keyed by column name.
+    """
+    last_id = None
+    if not has_blob_columns(conn):
+        selected = ', '.join(f"{column}, text_codec" for column in columns)
+        query = (f"SELECT full_text_id, title, {selected} FROM legal_documents "
+                 "WHERE (? IS NULL OR full_text_id > ?) ORDER BY full_text_id LIMIT ?")
+        while True:
+            rows = conn.execute(query, (last_id, last_id, batch_size)).fetchall()
+            if not rows:
+                return
+            yield [(full_text_id, title, {column: decode_text(values[2 * index], values[2 * index + 1])
+                                          for index, column in enumerate(columns)})
+                   for full_text_id, title, *values in rows]
+            last_id = rows[-1][0]
+
+    query = (f"SELECT full_text_id, title, {', '.join(HASH_COLUMNS[column] for column in columns)} "
+             "FROM legal_documents WHERE (? IS NULL OR full_text_id > ?) ORDER BY full_text_id LIMIT ?")
+    while True:
+        rows = conn.execute(query, (last_id, last_id, batch_size)).fetchall()
+        if not rows:
+            return
+        texts = read_blobs(conn, (text_hash for row in rows for text_hash in row[2:]))
+        yield [(full_text_id, title, {column: texts.get(hashes[index]) for index, column in enumerate(columns)})
+               for full_text_id, title, *hashes in rows]
+        last_id = rows[-1][0]
+
+
+def load_document_texts(conn: sqlite3.Connection, full_text_id: int) -> dict | None:
+    """
+    Return the decoded texts of one document.
+
+    Args:
+        conn: Open database connection.
+        full_text_id: The document's full_text_id.
+
+    Returns:
+        dict | None: Texts keyed by column name, or None if the document does not exist.
+    """
+    row = conn.execute(
+        f"SELECT {', '.join(HASH_COLUMNS.values())} FROM legal_documents WHERE full_text_id = ?", (full_text_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    texts = read_blobs(conn, row)
+    return {column: texts.get(text_hash) for column, text_hash in zip(COMPRESSED_TEXT_COLUMNS, row)}
+
+
+def migrate_legacy_texts(conn: sqlite3.Connection, batch_size: int = 200) -> int:
+    """
+    Move texts stored in legal_documents into document_blobs.
+
+    Compressed values are moved as they are, under their row's codec; only
+    the hash needs the decoded text. The old columns are cleared.
+
+    Args:
+        conn: Open database connection, inside the migration's transaction.
+        batch_size: Number of documents moved at a time.
+
+    Returns:
+        int: Number of documents moved.
+    """
+    moved = 0
+    last_id = None
+    while True:
+        rows = conn.execute(
+            f"SELECT full_text_id, text_codec, {', '.join(COMPRESSED_TEXT_COLUMNS)} FROM legal_documents "
+            "WHERE (? IS NULL OR full_text_id > ?) ORDER BY full_text_id LIMIT ?",
+            (last_id, last_id, batch_size)
+        ).fetchall()
+        if not rows:
+            return moved
+        blobs = []
+        updates = []
+        for full_text_id, codec, *values in rows:
+            hashes = []
+            for value in values:
+                text = decode_text(value, codec)
+                if text is None:
+                    hashes.append(None)
+                    continue
+                text_hash = content_hash(text)
+                hashes.append(text_hash)
+                blob_codec = None if isinstance(value, str) or codec == CODEC_NONE else codec
+                blobs.append((text_hash, blob_codec, value, len(text.encode('utf-8'))))
+            updates.append(tuple(hashes) + (full_text_id,))
+        conn.executemany("INSERT OR IGNORE INTO document_blobs (hash, codec, content, size) VALUES (?, ?, ?, ?)",
+                         blobs)
+        conn.executemany(
+            f"UPDATE legal_documents SET {', '.join(f'{HASH_COLUMNS[column]} = ?' for column in COMPRESSED_TEXT_COLUMNS)}, "
+            f"{', '.join(f'{column} = NULL' for column in COMPRESSED_TEXT_COLUMNS)}, text_codec = NULL "
+            "WHERE full_text_id = ?", updates
+        )
+        moved += len(rows)
+        last_id = rows[-1][0]
+
+
+def prune_blobs(conn: sqlite3.Connection, hashes=None) -> int:
+    """
+    Delete blobs no document refers to any more, inside the caller's transaction.
+
+    A blob that other blobs are stored as deltas of is kept as long as they are.
+
+    Args:
+        conn: Open database connection.
+        hashes: Optional. Only consider these blobs and the bases of those stored as
+                deltas, e.g. the texts an update replaced, instead of scanning every blob.
+
+    Returns:
+        int: Number of blobs deleted.
+    """
+    references = ' UNION ALL '.join(
+        f"SELECT 1 FROM legal_documents WHERE {column} = document_blobs.hash" for column in HASH_COLUMNS.values()
+    )
+    candidates = ''
+    params = ()
+    if hashes is not None:
+        hashes = set(hashes)
+        hashes.update(row[0] for row in conn.execute(
+            "SELECT base_hash FROM document_blobs WHERE base_hash IS NOT NULL AND hash IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(hashes)),)
+        ))
+        candidates = " AND hash IN (SELECT value FROM json_each(?))"
+        params = (json.dumps(list(hashes)),)
+    # Deltas first, so the bases they leave unused go in the same call
+    deleted = conn.execute(
+        f"DELETE FROM document_blobs WHERE base_hash IS NOT NULL AND NOT EXISTS ({references}){candidates}", params
+    ).rowcount
+    return deleted + conn.execute(
+        f"DELETE FROM document_blobs WHERE NOT EXISTS ({references}) AND NOT EXISTS "
+        f"(SELECT 1 FROM document_blobs AS delta WHERE delta.base_hash = document_blobs.hash){candidates}", params
+    ).rowcount
+
+
+def blob_stats(conn: sqlite3.Connection) -> dict:
+    """
+    Summarise how much deduplication saves.
+
+    Returns:
+        dict: Number of blobs, of blobs stored as deltas and of text references, the text size
+              referenced by documents, the uncompressed and stored size of the distinct blobs.
+    """
+    blobs, deltas, unique_bytes, stored_bytes = conn.execute(
+        "SELECT COUNT(*), COUNT(base_hash), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(CAST(content AS BLOB))), 0) "
+        "FROM document_blobs"
+    ).fetchone()
+    references = 0
+    referenced_bytes = 0
+    for column in HASH_COLUMNS.values():
+        count, size = conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(b.size), 0) FROM legal_documents d "
+            f"JOIN document_blobs b ON b.hash = d.{column}"
+        ).fetchone()
+        references += count
+        referenced_bytes += size
+    return {
+        'blobs': blobs,
+        'deltas': deltas,
+        'text_references': references,
+        'referenced_bytes': referenced_bytes,
+        'unique_bytes': unique_bytes,
+        'stored_bytes': stored_bytes
+    }
+
+
+def main():
+    """Command-line entry point for inspecting and pruning the document blobs."""
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Inspect the deduplicated document texts in document_blobs.")
+    parser.add_argument("--prune", action="store_true", help="Delete blobs that no document refers to.")
+    args = parser.parse_args()
+
+    initialize_database()
+    _, database_path = get_db_path()
+    conn = sqlite3.connect(database_path)
+    try:
+        if args.prune:
+            with conn:
+                logging.info(f"Deleted {prune_blobs(conn)} unreferenced blobs")
+        print(json.dumps(blob_stats(conn), indent=2))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Add the src directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_setup import get_db_path
+from document_blobs import HASH_COLUMNS, read_blobs
+from storage_codec import COMPRESSED_TEXT_COLUMNS, decode_api_response
+
+# Read-only connections kept open by a LegalDocumentStore
+DOCUMENT_STORE_POOL_SIZE = int(os.getenv('DOCUMENT_STORE_POOL_SIZE', 4))
+# Bytes of the database file each connection maps into memory instead of reading through the page cache
+DOCUMENT_STORE_MMAP_MB = int(os.getenv('DOCUMENT_STORE_MMAP_MB', 256))
+# Memory held by decoded document texts before the least recently used are dropped
+DOCUMENT_STORE_CACHE_MB = int(os.getenv('DOCUMENT_STORE_CACHE_MB', 64))
+# Compiled statements kept per connection; the store's queries are fixed strings, so they are compiled once
+DOCUMENT_STORE_STATEMENT_CACHE = 64
+
+# Metadata columns loaded for every document; the texts are only referenced by hash
+DOCUMENT_COLUMNS = (
+    'full_text_id', 'rt_unique_id', 'lineage_id', 'title', 'document_type', 'publication_date',
+    'entry_into_force_date', 'repeal_date', 'status', 'source_url', 'text_url', 'xml_url',
+    'plain_text_hash', 'xml_text_hash', 'html_text_hash', 'retrieved_at', 'last_checked_at'
+)
+_SELECT_DOCUMENTS = f"SELECT {', '.join(DOCUMENT_COLUMNS)} FROM legal_documents"
+
+GET_DOCUMENT_SQL = f"{_SELECT_DOCUMENTS} WHERE full_text_id = ?"
+GET_DOCUMENT_BY_RT_ID_SQL = f"{_SELECT_DOCUMENTS} WHERE rt_unique_id = ?"
+GET_DOCUMENTS_SQL = f"{_SELECT_DOCUMENTS} WHERE full_text_id IN (SELECT value FROM json_each(?))"
+VERSIONS_SQL = f"{_SELECT_DOCUMENTS} WHERE lineage_id = ? ORDER BY entry_into_force_date, full_text_id"
+API_RESPONSE_SQL = "SELECT api_response_json, api_response_codec FROM legal_documents WHERE full_text_id = ?"
+
+# Filters accepted by LegalDocumentStore.find(), in the order of idx_legal_documents_type_status
+FIND_FILTERS = (
+    ('document_type', 'document_type = :document_type'),
+    ('status', 'status = :status'),
+    ('published_from', 'publication_date >= :published_from'),
+    ('published_to', 'publication_date <= :published_to'),
+    ('after_id', 'full_text_id > :after_id'),
+)
+
+
+class LegalDocument:
+    """
+    Metadata of a stored act, with its texts loaded on first access.
+
+    The metadata columns are plain attributes. text_content_plain,
+    text_content_xml and text_content_html are read from the store (and its
+    cache) only when accessed, and api_metadata decodes the raw API response.
+    """
+
+    __slots__ = DOCUMENT_COLUMNS + ('_store',)
+
+    def __init__(self, store: 'LegalDocumentStore', row: tuple):
+        self._store = store
+        for column, value in zip(DOCUMENT_COLUMNS, row):
+            setattr(self, column, value)
+
+    def __repr__(self) -> str:
+        return f"LegalDocument(full_text_id={self.full_text_id!r}, title={self.title!r})"
+
+    def to_dict(self) -> dict:
+        """Return the metadata columns, without the texts."""
+        return {column: getattr(self, column) for column in DOCUMENT_COLUMNS}
+
+    @property
+    def text_content_plain(self) -> str | None:
+        return self._store.text(self.plain_text_hash)
+
+    @property
+    def text_content_xml(self) -> str | None:
+        return self._store.text(self.xml_text_hash)
+
+    @property
+    def text_content_html(self) -> str | None:
+        return self._store.text(self.html_text_hash)
+
+    @property
+    def api_metadata(self) -> dict | None:
+        return self._store.api_metadata(self.full_text_id)
+
+
+class TextCache:
+    """Thread-safe LRU cache of decoded texts by content hash, bounded by memory size."""
+
+    def __init__(self, max_bytes: int):
+        """
+        Create an empty cache.
+
+        Args:
+            max_bytes: Memory the cached texts may take, as measured by sys.getsizeof(); 0 disables caching.
+        """
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._texts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text_hash: str) -> str | None:
+        with self._lock:
+            text = self._texts.get(text_hash)
+            if text is None:
+                self.misses += 1
+                return None
+            self._texts.move_to_end(text_hash)
+            self.hits += 1
+            return text
+
+    def put(self, text_hash: str, text: str):
+        size = sys.getsizeof(text)
+        if size > self.max_bytes:
+            # A text larger than the whole cache would only evict everything else
+            return
+        with self._lock:
+            if text_hash in self._texts:
+                self._texts.move_to_end(text_hash)
+                return
+            self._texts[text_hash] = text
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._texts.popitem(last=False)
+                self.bytes -= sys.getsizeof(evicted)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'texts': len(self._texts), 'bytes': self.bytes, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+class LegalDocumentStore:
+    """
+    Read API over the stored acts for services and scripts.
+
+    Queries return LegalDocument objects with metadata only; a text is read
+    from document_blobs when it is first accessed, and decoded texts are kept
+    in a size-bounded LRU cache shared by all documents with the same content.
+    Connections are opened read-only, with memory-mapped I/O, and kept in a
+    pool, so the store can be shared by the threads of a web service; every
+    query is a fixed statement that each connection compiles once.
+
+    Usage:
+        with LegalDocumentStore() as store:
+            document = store.get(12345)
+            print(document.title, len(document.text_content_plain or ''))
+    """
+
+    def __init__(self, database_path: str | None = None, pool_size: int = DOCUMENT_STORE_POOL_SIZE,
+                 mmap_mb: int = DOCUMENT_STORE_MMAP_MB, cache_mb: float = DOCUMENT_STORE_CACHE_MB):
+        """
+        Open the store; connections are created as they are needed.
+
+        Args:
+            database_path: Path to the SQLite database file. Default: the configured database.
+            pool_size: Maximum number of open connections; further callers wait for a free one.
+            mmap_mb: PRAGMA mmap_size of each connection, in megabytes (0 disables memory mapping).
+            cache_mb: Size of the decoded text cache, in megabytes.
+        """
+        self.database_path = database_path or get_db_path()[1]
+        self.pool_size = max(1, pool_size)
+        self.mmap_bytes = int(mmap_mb * 1024 * 1024)
+        self.cache = TextCache(int(cache_mb * 1024 * 1024))
+        self._idle = queue.LifoQueue()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        uri = f"file:{os.path.abspath(self.database_path)}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                               cached_statements=DOCUMENT_STORE_STATEMENT_CACHE)
+        conn.execute(f"PRAGMA mmap_size = {self.mmap_bytes}")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a read-only connection from the pool.
+
+        Yields:
+            sqlite3.Connection: A connection for the duration of the with block.
+        """
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                if len(self._connections) < self.pool_size:
+                    conn = self._connect()
+                    self._connections.append(conn)
+            if conn is None:
+                conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def _documents(self, query: str, parameters) -> list[LegalDocument]:
+        with self.connection() as conn:
+            rows = conn.execute(query, parameters).fetchall()
+        return [LegalDocument(self, row) for row in rows]
+
+    def get(self, full_text_id: int) -> LegalDocument | None:
+        """
+        Return a document by full_text_id.
+
+        Args:
+            full_text_id: The act's full_text_id.
+
+        Returns:
+            LegalDocument | None: The document, or None if it is not stored.
+        """
+        documents = self._documents(GET_DOCUMENT_SQL, (full_text_id,))
+        return documents[0] if documents else None
+
+    def get_by_rt_id(self, rt_unique_id: str) -> LegalDocument | None:
+        """
+        Return a document by its Riigi Teataja identifier (globaalID).
+
+        Args:
+            rt_unique_id: The act's rt_unique_id.
+
+        Returns:
+            LegalDocument | None: The document, or None if it is not stored.
+        """
+        documents = self._documents(GET_DOCUMENT_BY_RT_ID_SQL, (str(rt_unique_id),))
+        return documents[0] if documents else None
+
+    def get_many(self, full_text_ids: list[int]) -> list[LegalDocument]:
+        """
+        Return several documents in one query.
+
+        Args:
+            full_text_ids: The acts' full_text_id values.
+
+        Returns:
+            list[LegalDocument]: The stored documents, in the order of full_text_ids.
+        """
+        documents = {document.full_text_id: document
+                     for document in self._documents(GET_DOCUMENTS_SQL, (json.dumps(list(full_text_ids)),))}
+        return [documents[full_text_id] for full_text_id in full_text_ids if full_text_id in documents]
+
+    def find(self, document_type: str | None = None, status: str | None = None,
+             published_from: str | None = None, published_to: str | None = None,
+             after_id: int | None = None, limit: int = 100) -> list[LegalDocument]:
+        """
+        List documents matching the given filters, a page at a time.
+
+        Filters left as None are not applied. Pages are ordered by full_text_id;
+        pass the last full_text_id of a page as after_id to get the next one.
+
+        Args:
+            document_type: Only documents of this type.
+            status: Only documents with this status.
+            published_from: Only documents published on or after this date (YYYY-MM-DD).
+            published_to: Only documents published on or before this date (YYYY-MM-DD).
+            after_id: Only documents with a larger full_text_id.
+            limit: Maximum number of documents returned.
+
+        Returns:
+            list[LegalDocument]: The documents.
+        """
+        parameters = {'document_type': document_type, 'status': status, 'published_from': published_from,
+                      'published_to': published_to, 'after_id': after_id, 'limit': limit}
+        # One statement per combination of filters, so each stays a fixed string the
+        # connection compiles once and the planner can use the matching index
+        conditions = [condition for name, condition in FIND_FILTERS if parameters[name] is not None]
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        return self._documents(f"{_SELECT_DOCUMENTS}{where} ORDER BY full_text_id LIMIT :limit", parameters)
+
+    def versions(self, lineage_id: int) -> list[LegalDocument]:
+        """
+        Return the versions of an act.
+
+        Args:
+            lineage_id: The lineage_id shared by the versions.
+
+        Returns:
+            list[LegalDocument]: The versions ordered by entry into force.
+        """
+        return self._documents(VERSIONS_SQL, (lineage_id,))
+
+    def text(self, text_hash: str | None) -> str | None:
+        """
+        Return a decoded document text, from the cache if possible.
+
+        Args:
+            text_hash: The text's hash, as in the *_text_hash columns.
+
+        Returns:
+            str | None: The text, or None for a missing hash.
+        """
+        if text_hash is None:
+            return None
+        text = self.cache.get(text_hash)
+        if text is not None:
+            return text
+        with self.connection() as conn:
+            text = read_blobs(conn, [text_hash]).get(text_hash)
+        if text is not None:
+            self.cache.put(text_hash, text)
+        return text
+
+    def load_texts(self, documents: list[LegalDocument], columns: tuple = ('text_content_plain',)):
+        """
+        Read the given texts of several documents in one query and put them in the cache.
+
+        Args:
+            documents: The documents whose texts will be accessed.
+            columns: Text columns to load, from COMPRESSED_TEXT_COLUMNS.
+        """
+        hashes = {getattr(document, HASH_COLUMNS[column]) for document in documents for column in columns
+                  if column in COMPRESSED_TEXT_COLUMNS} - {None}
+        missing = [text_hash for text_hash in hashes if self.cache.get(text_hash) is None]
+        if not missing:
+            return
+        with self.connection() as conn:
+            texts = read_blobs(conn, missing)
+        for text_hash, text in texts.items():
+            self.cache.put(text_hash, text)
+
+    def api_metadata(self, full_text_id: int) -> dict | None:
+        """
+        Return the act's raw metadata from the search API, if it was stored.
+
+        Args:
+            full_text_id: The act's full_text_id.
+
+        Returns:
+            dict | None: The metadata.
+        """
+        with self.connection() as conn:
+            row = conn.execute(API_RESPONSE_SQL, (full_text_id,)).fetchone()
+        return None if row is None else decode_api_response(*row)
+
+    def stats(self) -> dict:
+        """
+        Return the pool and cache statistics.
+
+        Returns:
+            dict: Open connections and the text cache's size, hits, misses and evictions.
+        """
+        with self._lock:
+            connections = len(self._connections)
+        return {'connections': connections, 'cache': self.cache.stats()}
+
+    def close(self):
+        """Close all pooled connections."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._idle = queue.LifoQueue()
+
+    def __enter__(self) -> 'LegalDocumentStore':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,351 @@
+import argparse
+import difflib
+import json
+import logging
+import os
+import sqlite3
+import sys
+from datetime import date
+from dotenv import load_dotenv
+
+# Add the src directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_setup import get_db_path, initialize_database
+from document_blobs import HASH_COLUMNS, make_delta, read_blobs
+from storage_codec import CODEC_NONE, SUPPORTED_CODECS, TEXT_STORAGE_CODEC, encode_text, validate_codec
+
+VERSION_COLUMNS = ('full_text_id', 'title', 'publication_date', 'entry_into_force_date', 'repeal_date', 'status')
+
+# One line per subsection or point of a section, rendered as in legal_sections.format_section()
+SECTION_LINE_SQL = '''
+    CASE
+        WHEN text IS NULL THEN NULL
+        WHEN NULLIF(point_number, '') IS NOT NULL THEN '    ' || point_number || ') ' || text
+        WHEN NULLIF(subsection_number, '') IS NOT NULL THEN '(' || subsection_number || ') ' || text
+        ELSE text
+    END
+'''
+
+# The lines of both versions, numbered within each section. A section changed if its lines or
+# title differ; the comparison uses EXCEPT rather than a FULL OUTER JOIN (SQLite 3.39+) and
+# compares line by line, so the result does not depend on the order group_concat() would use.
+# Only the rows of changed sections leave SQLite, in document order; the full texts are never loaded.
+DIFF_SECTIONS_SQL = f'''
+    WITH section_lines AS (
+        SELECT full_text_id = :new_id AS is_new, COALESCE(section_number, '') AS section_number, section_title,
+               position, ROW_NUMBER() OVER (PARTITION BY full_text_id, COALESCE(section_number, '') ORDER BY position)
+               AS line_number, {SECTION_LINE_SQL} AS line
+        FROM legal_sections WHERE full_text_id IN (:old_id, :new_id)
+    ), changed AS (
+        SELECT section_number FROM (
+            SELECT section_number, section_title, line_number, line FROM section_lines WHERE NOT is_new
+            EXCEPT
+            SELECT section_number, section_title, line_number, line FROM section_lines WHERE is_new
+        )
+        UNION
+        SELECT section_number FROM (
+            SELECT section_number, section_title, line_number, line FROM section_lines WHERE is_new
+            EXCEPT
+            SELECT section_number, section_title, line_number, line FROM section_lines WHERE NOT is_new
+        )
+    )
+    SELECT is_new, section_number, section_title, position, line FROM section_lines
+    WHERE section_number IN (SELECT section_number FROM changed)
+    ORDER BY position
+'''
+
+
+def list_versions(conn: sqlite3.Connection, full_text_id: int) -> list[dict]:
+    """
+    List the stored versions of an act, oldest first.
+
+    Versions share the lineage_id (terviktekstiGrupiID) of the act.
+
+    Args:
+        conn: Open database connection.
+        full_text_id: Any version's full_text_id.
+
+    Returns:
+        list[dict]: The versions ordered by entry into force; only the act itself
+                    if it has no lineage, and empty if it is not stored.
+    """
+    rows = conn.execute(
+        f'''
+        SELECT {', '.join(VERSION_COLUMNS)} FROM legal_documents
+        WHERE full_text_id = :id
+           OR lineage_id = (SELECT lineage_id FROM legal_documents WHERE full_text_id = :id)
+        ORDER BY entry_into_force_date, full_text_id
+        ''',
+        {'id': full_text_id}
+    ).fetchall()
+    return [dict(zip(VERSION_COLUMNS, row)) for row in rows]
+
+
+def version_at(conn: sqlite3.Connection, full_text_id: int, as_of: str) -> int | None:
+    """
+    Return the version of an act that was in force on a date.
+
+    Args:
+        conn: Open database connection.
+        full_text_id: Any version's full_text_id.
+        as_of: Date (YYYY-MM-DD).
+
+    Returns:
+        int | None: The full_text_id of the latest version that entered into force
+                    on or before the date, or None if none had.
+    """
+    in_force = [version for version in list_versions(conn, full_text_id)
+                if version['entry_into_force_date'] and version['entry_into_force_date'] <= as_of]
+    return in_force[-1]['full_text_id'] if in_force else None
+
+
+def diff_sections(conn: sqlite3.Connection, old_id: int, new_id: int, context: int = 1) -> list[dict]:
+    """
+    Compare two versions of an act section by section.
+
+    The sections are compared inside SQLite using legal_sections, and only
+    changed sections are returned with a line diff of their text.
+
+    Args:
+        conn: Open database connection.
+        old_id: full_text_id of the earlier version.
+        new_id: full_text_id of the later version.
+        context: Unchanged lines shown around each change in the diff.
+
+    Returns:
+        list[dict]: Per changed section: section_number, change ('added', 'removed' or
+                    'modified'), old and new title and text, and the unified diff lines.
+    """
+    if old_id == new_id:
+        return []
+    # Per section and version: title, first position and lines, in document order
+    sections = {}
+    for is_new, section_number, section_title, position, line in conn.execute(
+            DIFF_SECTIONS_SQL, {'old_id': old_id, 'new_id': new_id}):
+        version = sections.setdefault(section_number, [None, None])
+        if version[is_new] is None:
+            version[is_new] = {'title': None, 'position': position, 'lines': []}
+        side = version[is_new]
+        if section_title is not None:
+            side['title'] = max(side['title'] or section_title, section_title)
+        if line is not None:
+            side['lines'].append(line)
+
+    changes = []
+    for section_number, (old, new) in sorted(sections.items(),
+                                             key=lambda item: (item[1][1] or item[1][0])['position']):
+        old_body = '\n'.join(old['lines']) if old and old['lines'] else None
+        new_body = '\n'.join(new['lines']) if new and new['lines'] else None
+        changes.append({
+            'section_number': section_number or None,
+            'change': 'added' if old is None else 'removed' if new is None else 'modified',
+            'old_title': old and old['title'],
+            'new_title': new and new['title'],
+            'old_text': old_body,
+            'new_text': new_body,
+            'diff': list(difflib.unified_diff((old_body or '').splitlines(), (new_body or '').splitlines(),
+                                              lineterm='', n=context))[2:]
+        })
+    return changes
+
+
+def changes_since(conn: sqlite3.Connection, full_text_id: int, since: str, as_of: str | None = None) -> dict:
+    """
+    Report what changed in an act between two dates.
+
+    Args:
+        conn: Open database connection.
+        full_text_id: Any version's full_text_id.
+        since: Date (YYYY-MM-DD) of the version to compare from.
+        as_of: Date of the version to compare to. Defaults to today.
+
+    Returns:
+        dict: old_id and new_id of the versions compared (None if no version was in force)
+              and the changed sections as returned by diff_sections().
+    """
+    old_id = version_at(conn, full_text_id, since)
+    new_id = version_at(conn, full_text_id, as_of or date.today().isoformat())
+    if old_id is None or new_id is None or old_id == new_id:
+        return {'old_id': old_id, 'new_id': new_id, 'sections': []}
+    return {'old_id': old_id, 'new_id': new_id, 'sections': diff_sections(conn, old_id, new_id)}
+
+
+def _store_full(conn: sqlite3.Connection, text_hash: str, text: str, codec: str):
+    conn.execute("UPDATE document_blobs SET content = ?, codec = ?, base_hash = NULL WHERE hash = ?",
+                 (encode_text(text, codec), None if codec == CODEC_NONE else codec, text_hash))
+
+
+def pack_lineage(conn: sqlite3.Connection, lineage_id: int, codec: str = TEXT_STORAGE_CODEC) -> dict:
+    """
+    Store the texts of older versions of an act as deltas against the latest version.
+
+    The latest version stays in full, so reading the current text costs
+    nothing extra, and every delta is one step from its base. A text is only
+    stored as a delta if that is smaller, and a text other blobs are deltas
+    of is kept in full. Runs inside the caller's transaction.
+
+    Args:
+        conn: Open database connection.
+        lineage_id: The act's lineage_id.
+        codec: Storage codec for the rewritten blobs.
+
+    Returns:
+        dict: Number of blobs stored as deltas, and their stored size before and after.
+    """
+    stats = {'deltas': 0, 'bytes_before': 0, 'bytes_after': 0}
+    for hash_column in HASH_COLUMNS.values():
+        hashes = [row[0] for row in conn.execute(
+            f"SELECT {hash_column} FROM legal_documents WHERE lineage_id = ? AND {hash_column} IS NOT NULL "
+            "ORDER BY entry_into_force_date, full_text_id", (lineage_id,)
+        )]
+        if len(set(hashes)) < 2:
+            continue
+        base_hash = hashes[-1]
+        blobs = {text_hash: (base, size) for text_hash, base, size in conn.execute(
+            "SELECT hash, base_hash, LENGTH(CAST(content AS BLOB)) FROM document_blobs "
+            "WHERE hash IN (SELECT value FROM json_each(?))", (json.dumps(hashes),)
+        )}
+        texts = read_blobs(conn, hashes)
+        base_text = texts[base_hash]
+        if blobs[base_hash][0] is not None:
+            _store_full(conn, base_hash, base_text, codec)
+        # Existing deltas are rebased first, so a former base is no longer needed when its turn comes
+        for text_hash in sorted(set(hashes) - {base_hash}, key=lambda h: blobs[h][0] is None):
+            current_base, stored_size = blobs[text_hash]
+            if current_base == base_hash or conn.execute(
+                    "SELECT 1 FROM document_blobs WHERE base_hash = ? LIMIT 1", (text_hash,)).fetchone():
+                continue
+            delta = encode_text(json.dumps(make_delta(base_text, texts[text_hash]), ensure_ascii=False), codec)
+            full = encode_text(texts[text_hash], codec)
+            size = len(delta.encode('utf-8')) if isinstance(delta, str) else len(delta)
+            full_size = len(full.encode('utf-8')) if isinstance(full, str) else len(full)
+            if size < full_size:
+                conn.execute("UPDATE document_blobs SET content = ?, codec = ?, base_hash = ? WHERE hash = ?",
+                             (delta, None if codec == CODEC_NONE else codec, base_hash, text_hash))
+                stats['deltas'] += 1
+                stats['bytes_before'] += stored_size
+                stats['bytes_after'] += size
+            elif current_base is not None:
+                _store_full(conn, text_hash, texts[text_hash], codec)
+    return stats
+
+
+def pack_versions(database_path: str, codec: str = TEXT_STORAGE_CODEC) -> dict:
+    """
+    Delta-encode the older versions of every act with more than one stored version.
+
+    Each act is packed in its own transaction, so packing can be interrupted and rerun.
+
+    Args:
+        database_path: Path to the SQLite database file.
+        codec: Storage codec for the rewritten blobs.
+
+    Returns:
+        dict: Number of acts packed, blobs stored as deltas, and their stored size before and after.
+    """
+    validate_codec(codec)
+    totals = {'acts': 0, 'deltas': 0, 'bytes_before': 0, 'bytes_after': 0}
+    conn = sqlite3.connect(database_path)
+    try:
+        lineage_ids = [row[0] for row in conn.execute(
+            "SELECT lineage_id FROM legal_documents WHERE lineage_id IS NOT NULL "
+            "GROUP BY lineage_id HAVING COUNT(*) > 1"
+        )]
+        for lineage_id in lineage_ids:
+            with conn:
+                stats = pack_lineage(conn, lineage_id, codec)
+            totals['acts'] += 1
+            for key, value in stats.items():
+                totals[key] += value
+    finally:
+        conn.close()
+    return totals
+
+
+def format_changes(changes: list[dict]) -> str:
+    """
+    Render changed sections as readable text.
+
+    Args:
+        changes: Changes as returned by diff_sections().
+
+    Returns:
+        str: One block per section, with the diff lines of modified sections.
+    """
+    blocks = []
+    for change in changes:
+        title = change['new_title'] or change['old_title']
+        heading = f"§ {change['section_number']}." if change['section_number'] else "(no section)"
+        if title:
+            heading += f" {title}"
+        lines = [f"{heading} [{change['change']}]"]
+        if change['change'] == 'added':
+            lines.extend(f"+{line}" for line in (change['new_text'] or '').splitlines())
+        elif change['change'] == 'removed':
+            lines.extend(f"-{line}" for line in (change['old_text'] or '').splitlines())
+        else:
+            lines.extend(change['diff'])
+        blocks.append('\n'.join(lines))
+    return '\n\n'.join(blocks)
+
+
+def main():
+    """Command-line entry point for listing, comparing and packing versions of acts."""
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Compare and compactly store the versions of the stored acts.")
+    parser.add_argument("full_text_id", type=int, nargs='?',
+                        help="The act's full_text_id (terviktekstID). Without --diff or --since, its versions are listed.")
+    parser.add_argument("--diff", type=int, metavar="NEW_ID", default=None,
+                        help="Compare the act section by section with the version NEW_ID.")
+    parser.add_argument("--since", type=str, metavar="YYYY-MM-DD", default=None,
+                        help="Show what changed in the act since the version in force on this date.")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON.")
+    parser.add_argument("--pack", action="store_true",
+                        help="Store the older versions of every act as deltas against the latest one.")
+    parser.add_argument("--codec", choices=SUPPORTED_CODECS, default=TEXT_STORAGE_CODEC,
+                        help="Codec for the blobs rewritten by --pack. Default: TEXT_STORAGE_CODEC or 'zlib'.")
+    args = parser.parse_args()
+
+    initialize_database()
+    _, database_path = get_db_path()
+    if args.pack:
+        totals = pack_versions(database_path, args.codec)
+        logging.info(f"Packed {totals['acts']} acts: {totals['deltas']} texts stored as deltas, "
+                     f"{totals['bytes_before']} -> {totals['bytes_after']} bytes")
+    if args.full_text_id is None:
+        if not args.pack:
+            parser.error("full_text_id is required")
+        return
+
+    conn = sqlite3.connect(database_path)
+    try:
+        if args.diff is not None:
+            result = diff_sections(conn, args.full_text_id, args.diff)
+        elif args.since is not None:
+            result = changes_since(conn, args.full_text_id, args.since)
+        else:
+            result = list_versions(conn, args.full_text_id)
+    finally:
+        conn.close()
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    elif args.diff is not None:
+        print(format_changes(result) or "No changes.")
+    elif args.since is not None:
+        if result['old_id'] is None:
+            print(f"No version of act {args.full_text_id} was in force on {args.since}.")
+        else:
+            print(f"Changes from version {result['old_id']} to {result['new_id']}:")
+            print(format_changes(result['sections']) or "No changes.")
+    else:
+        for version in result:
+            print(f"{version['full_text_id']}  in force {version['entry_into_force_date'] or '?'}"
+                  f" - {version['repeal_date'] or ''}  {version['status']}  {version['title']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+import argparse
+import logging
+import os
+import re
+import sqlite3
+import sys
+import time
+from html.parser import HTMLParser
+from dotenv import load_dotenv
+
+# Add the src directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_setup import get_db_path, initialize_database
+from document_blobs import content_hash, iter_text_batches, prune_blobs, store_blobs
+from search import index_documents
+from storage_codec import TEXT_STORAGE_CODEC
+
+# Keep the fetched HTML page in text_content_html next to the extracted text
+STORE_RAW_HTML = os.getenv('STORE_RAW_HTML', 'false').lower() in ('1', 'true', 'yes')
+# Sections of the synthetic act benchmarked when no files are given; about 0.9 MB of HTML,
+# the size of the Võlaõigusseadus page
+BENCHMARK_SECTIONS = 2200
+
+# Elements whose content is page chrome or code rather than document text
+SKIPPED_TAGS = frozenset({
+    'script', 'style', 'noscript', 'template', 'head', 'title', 'nav', 'header', 'footer',
+    'form', 'button', 'select', 'textarea', 'iframe', 'svg', 'object', 'aside'
+})
+# Elements that start a new line in the extracted text
+BLOCK_TAGS = frozenset({
+    'p', 'div', 'br', 'li', 'ul', 'ol', 'dl', 'dt', 'dd', 'tr', 'table', 'thead', 'tbody',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'section', 'article', 'main', 'blockquote', 'pre', 'hr'
+})
+CELL_TAGS = frozenset({'td', 'th'})
+
+_HTML_START = re.compile(r'\s*(<\?xml[^>]*>\s*)?(<!--.*?-->\s*)*<(!doctype\s+html|html|head|body)\b', re.IGNORECASE | re.DOTALL)
+_HORIZONTAL_SPACE = re.compile(r'[ \t\r\f\v\u00a0]+')
+_BLANK_LINES = re.compile(r'\n{3,}')
+
+
+class _TextExtractor(HTMLParser):
+    """HTMLParser that collects the visible text outside of SKIPPED_TAGS."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append('\n')
+        elif tag in CELL_TAGS:
+            self.parts.append('\t')
+
+    def handle_startendtag(self, tag, attrs):
+        # Self-closing tags such as <br/> never get an end tag
+        if tag in BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            # Line breaks in the source are just whitespace; only block elements break lines
+            self.parts.append(data.replace('\n', ' '))
+
+
+def looks_like_html(text: str | None) -> bool:
+    """
+    Check whether a fetched document is an HTML page rather than plain text.
+
+    Args:
+        text: The document as returned by get_full_document_text().
+
+    Returns:
+        bool: True if the text starts with a doctype or an html, head or body tag.
+    """
+    return bool(text) and _HTML_START.match(text[:4096]) is not None
+
+
+def html_to_text(html: str) -> str:
+    """
+    Extract the readable text from an HTML page.
+
+    Scripts, styles and site chrome (navigation, header, footer, forms) are
+    dropped, block elements become line breaks, entities are decoded and runs
+    of whitespace are collapsed. The page is parsed in a single streaming pass
+    without building a tree.
+
+    Args:
+        html: The HTML page.
+
+    Returns:
+        str: The plain text, with at most one blank line between paragraphs.
+    """
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    lines = (_HORIZONTAL_SPACE.sub(' ', line).strip() for line in ''.join(extractor.parts).split('\n'))
+    return _BLANK_LINES.sub('\n\n', '\n'.join(lines)).strip()
+
+
+def split_plain_and_html(text: str | None) -> tuple[str | None, str | None]:
+    """
+    Turn a fetched plain-text-or-HTML document into the values stored for it.
+
+    Args:
+        text: The document as returned by get_full_document_text().
+
+    Returns:
+        tuple[str | None, str | None]: (plain_text, raw_html). raw_html is None
+                                       for plain text documents.
+    """
+    if not looks_like_html(text):
+        return text, None
+    return html_to_text(text), text
+
+
+def clean_stored_html(conn: sqlite3.Connection, store_raw_html: bool = STORE_RAW_HTML,
+                      codec: str = TEXT_STORAGE_CODEC, batch_size: int = 200) -> int:
+    """
+    Replace HTML pages stored in text_content_plain by their extracted text.
+
+    Documents stored before extraction happened at ingest time are converted
+    in full_text_id order, one transaction per batch, and re-indexed for search.
+    Texts no document refers to any more are deleted at the end.
+
+    Args:
+        conn: Open database connection.
+        store_raw_html: Move the original page to text_content_html instead of discarding it.
+        codec: Storage codec for the new texts.
+        batch_size: Number of documents examined per transaction.
+
+    Returns:
+        int: Number of documents converted.
+    """
+    converted = 0
+    for batch in iter_text_batches(conn, ('text_content_plain', 'text_content_html'), batch_size):
+        updates = []
+        documents = []
+        texts = {}
+        for full_text_id, title, stored in batch:
+            plain_text, raw_html = split_plain_and_html(stored['text_content_plain'])
+            if raw_html is None:
+                continue
+            if not store_raw_html:
+                raw_html = stored['text_content_html']
+            hashes = []
+            for text in (plain_text, raw_html):
+                hashes.append(None if text is None else content_hash(text))
+                if text is not None:
+                    texts[hashes[-1]] = text
+            updates.append(tuple(hashes) + (full_text_id,))
+            documents.append((full_text_id, title, plain_text))
+        with conn:
+            store_blobs(conn, texts, codec)
+            conn.executemany(
+                "UPDATE legal_documents SET plain_text_hash = ?, html_text_hash = ? WHERE full_text_id = ?", updates
+            )
+            index_documents(conn, documents)
+        converted += len(updates)
+    if converted:
+        with conn:
+            prune_blobs(conn)
+    return converted
+
+
+def synthetic_act_html(sections: int = BENCHMARK_SECTIONS) -> str:
+    """
+    Generate the HTML page of a large act, as served by the mock server.
+
+    Args:
+        sections: Number of sections (paragrahv) in the act.
+
+    Returns:
+        str: The page, with navigation, chapters, sections and subsections.
+    """
+    # Imported here so that ingesting, which imports this module, does not depend on the mock server
+    from mock_rt_server import SyntheticAct
+    return SyntheticAct(1, sections, seed=1, document_type='seadus', html_only=True).html()
+
+
+def benchmark(paths: list[str] | None = None, repeat: int = 3, sections: int = BENCHMARK_SECTIONS) -> list[dict]:
+    """
+    Measure extraction throughput on saved HTML pages, or on a synthetic large act.
+
+    Args:
+        paths: HTML files, e.g. a saved Võlaõigusseadus page. Default: a page from synthetic_act_html().
+        repeat: Number of timed runs per page; the fastest is reported.
+        sections: Number of sections of the synthetic act, if no paths are given.
+
+    Returns:
+        list[dict]: Per page: input and output size, best time and MB/s.
+    """
+    if paths:
+        pages = []
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                pages.append((path, f.read()))
+    else:
+        pages = [(f"synthetic act with {sections} sections", synthetic_act_html(sections))]
+
+    results = []
+    for name, html in pages:
+        html_bytes = len(html.encode('utf-8'))
+        best = None
+        for _ in range(max(1, repeat)):
+            started_at = time.perf_counter()
+            text = html_to_text(html)
+            elapsed = time.perf_counter() - started_at
+            best = elapsed if best is None else min(best, elapsed)
+        results.append({
+            'file': name,
+            'html_bytes': html_bytes,
+            'text_bytes': len(text.encode('utf-8')),
+            'seconds': round(best, 4),
+            'mb_per_second': round(html_bytes / best / 1_000_000, 1) if best > 0 else 0.0
+        })
+    return results
+
+
+def main():
+    """Command-line entry point for extracting text from HTML pages."""
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Extract plain text from HTML pages of legal acts.")
+    parser.add_argument("files", nargs='*', help="HTML files to convert and print, or to benchmark with --benchmark.")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Report extraction throughput for the given files, or for a synthetic large act without files.")
+    parser.add_argument("--sections", type=int, default=BENCHMARK_SECTIONS,
+                        help=f"Sections of the synthetic act for --benchmark without files. Default: {BENCHMARK_SECTIONS}.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per file for --benchmark. Default: 3.")
+    parser.add_argument("--clean-database", action="store_true",
+                        help="Replace HTML pages stored as plain text in the database by their extracted text.")
+    args = parser.parse_args()
+
+    if args.clean_database:
+        initialize_database()
+        _, database_path = get_db_path()
+        conn = sqlite3.connect(database_path)
+        try:
+            converted = clean_stored_html(conn)
+        finally:
+            conn.close()
+        logging.info(f"Extracted text for {converted} documents stored as HTML"
+                     f"{' (raw HTML kept in text_content_html)' if STORE_RAW_HTML else ''}")
+        return
+    if args.benchmark:
+        for result in benchmark(args.files, repeat=args.repeat, sections=args.sections):
+            print(f"{result['file']}: {result['html_bytes']} bytes HTML -> {result['text_bytes']} bytes text "
+                  f"in {result['seconds']:.4f}s ({result['mb_per_second']} MB/s)")
+        return
+    if not args.files:
+        parser.error("at least one HTML file is required")
+    for path in args.files:
+        with open(path, encoding='utf-8') as f:
+            print(html_to_text(f.read()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Callable, Iterable, Iterator
+
+# Add the src directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from metrics import MetricsRegistry
+
+# Items each queue between two stages can hold before the stage feeding it has to wait
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', 32))
+# Number of threads deriving document rows from downloaded texts
+TRANSFORM_WORKERS = int(os.getenv('TRANSFORM_WORKERS', 2))
+
+# Seconds between checks of the stop flag while waiting on a queue
+_POLL_SECONDS = 0.1
+
+# Marks the end of the items in a queue
+_DONE = object()
+
+
+class Stage:
+    """One step of an IngestPipeline: a function applied to every item on a number of threads."""
+
+    def __init__(self, name: str, fn: Callable, workers: int = 1):
+        """
+        Define a stage.
+
+        Args:
+            name: Stage name, used in statistics and metrics labels.
+            fn: Called as fn(item, value), where item is the original source item and value
+                the previous stage's result (the item itself for the first stage).
+            workers: Number of threads running the stage.
+        """
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+
+
+class IngestPipeline:
+    """
+    Stages connected by bounded queues, each running on its own threads.
+
+    A source thread puts items into the first queue, each stage takes items
+    from its input queue and puts its results into the next one, and the
+    caller consumes the results of the last stage from results(). Every queue
+    holds at most ``queue_size`` items, so a slow stage makes the stages before
+    it wait instead of letting items pile up in memory, while the stages
+    themselves overlap: texts are downloaded while earlier acts are parsed and
+    written.
+
+    Results arrive in completion order. An exception raised by a stage fails
+    only that item: it skips the remaining stages and is handed to the caller.
+    An exception raised by the source ends the input; results() re-raises it
+    after the items already in the pipeline have been consumed.
+
+    For every stage, including the source and the caller (the sink), the
+    pipeline records the time spent working and the time spent waiting for
+    input or for room in the next queue.
+    """
+
+    def __init__(self, stages: list[Stage], queue_size: int = PIPELINE_QUEUE_SIZE,
+                 metrics: MetricsRegistry | None = None, source_name: str = 'list', sink_name: str = 'write'):
+        """
+        Set up the pipeline; results() runs it.
+
+        Args:
+            stages: The stages between the source and the caller, in order.
+            queue_size: Capacity of each queue between two stages.
+            metrics: Optional registry receiving stage durations, wait times and queue depths.
+            source_name: Name of the stage reading the source.
+            sink_name: Name of the stage consuming results(), i.e. the caller.
+        """
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.metrics = metrics
+        self.source_name = source_name
+        self.sink_name = sink_name
+        # _queues[i] feeds stages[i]; the last queue feeds the caller
+        self._queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(stages) + 1)]
+        self._consumers = [stage.name for stage in stages] + [sink_name]
+        self._running = [stage.workers for stage in stages]
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._source_error = None
+        self._stats = {name: {'workers': workers, 'items': 0, 'errors': 0, 'busy_seconds': 0.0,
+                              'input_wait_seconds': 0.0, 'output_wait_seconds': 0.0}
+                       for name, workers in [(source_name, 1)] + [(stage.name, stage.workers) for stage in stages]
+                       + [(sink_name, 1)]}
+
+    def _record(self, name: str, busy: float = 0.0, input_wait: float = 0.0, output_wait: float = 0.0,
+                items: int = 0, errors: int = 0):
+        with self._lock:
+            stats = self._stats[name]
+            stats['items'] += items
+            stats['errors'] += errors
+            stats['busy_seconds'] += busy
+            stats['input_wait_seconds'] += input_wait
+            stats['output_wait_seconds'] += output_wait
+        if self.metrics is not None:
+            if items:
+                self.metrics.observe('rt_stage_duration_seconds', busy, stage=name)
+            if input_wait:
+                self.metrics.inc('rt_stage_wait_seconds_total', input_wait, stage=name, waiting_for='input')
+            if output_wait:
+                self.metrics.inc('rt_stage_wait_seconds_total', output_wait, stage=name, waiting_for='output')
+
+    def _report_depth(self, index: int):
+        if self.metrics is not None:
+            self.metrics.set_gauge('rt_queue_depth', self._queues[index].qsize(), queue=self._consumers[index])
+
+    def _put(self, index: int, envelope) -> bool:
+        """Put an item into a queue, waiting for room; False if the pipeline was stopped meanwhile."""
+        while not self._stop.is_set():
+            try:
+                self._queues[index].put(envelope, timeout=_POLL_SECONDS)
+                self._report_depth(index)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, index: int):
+        """Take an item from a queue, waiting for one; None if the pipeline was stopped meanwhile."""
+        while not self._stop.is_set():
+            try:
+                envelope = self._queues[index].get(timeout=_POLL_SECONDS)
+                self._report_depth(index)
+                return envelope
+            except queue.Empty:
+                continue
+        return None
+
+    def _feed(self, source: Iterable):
+        """Source thread: move the source's items into the first queue."""
+        items = iter(source)
+        try:
+            while True:
+                started_at = time.monotonic()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    break
+                produced_at = time.monotonic()
+                delivered = self._put(0, [item, item, None])
+                self._record(self.source_name, busy=produced_at - started_at,
+                             output_wait=time.monotonic() - produced_at, items=1)
+                if not delivered:
+                    break
+        except Exception as e:
+            self._source_error = e
+        finally:
+            close = getattr(items, 'close', None)
+            if close is not None:
+                close()
+            for _ in range(self.stages[0].workers if self.stages else 1):
+                self._put(0, _DONE)
+
+    def _work(self, index: int):
+        """Stage thread: apply the stage to items until the previous stage is done."""
+        stage = self.stages[index]
+        while True:
+            waiting_since = time.monotonic()
+            envelope = self._get(index)
+            if envelope is None or envelope is _DONE:
+                break
+            started_at = time.monotonic()
+            item, value, error = envelope
+            if error is None:
+                try:
+                    envelope[1] = stage.fn(item, value)
+                except Exception as e:
+                    envelope[2] = e
+            finished_at = time.monotonic()
+            delivered = self._put(index + 1, envelope)
+            self._record(stage.name, busy=finished_at - started_at if error is None else 0.0,
+                         input_wait=started_at - waiting_since, output_wait=time.monotonic() - finished_at,
+                         items=1 if error is None else 0, errors=1 if error is None and envelope[2] else 0)
+            if not delivered:
+                break
+        # The last thread of a stage to finish tells every thread of the next stage
+        with self._lock:
+            self._running[index] -= 1
+            last = self._running[index] == 0
+        if last:
+            for _ in range(self.stages[index + 1].workers if index + 1 < len(self.stages) else 1):
+                self._put(index + 1, _DONE)
+
+    def results(self, source: Iterable) -> Iterator[tuple]:
+        """
+        Run the pipeline over a source and yield what comes out of the last stage.
+
+        Closing the iterator early, or an exception in the caller, stops all
+        stages; threads finish the item they are working on before they exit.
+
+        Args:
+            source: Iterable of items; it is consumed on a separate thread.
+
+        Yields:
+            tuple: (item, value, error) with the source item, the last stage's result and
+                   None, or the exception that failed the item (value is then undefined).
+
+        Raises:
+            Exception: Whatever the source raised, once the pipeline has been drained.
+        """
+        threads = [threading.Thread(target=self._feed, args=(source,), name=self.source_name, daemon=True)]
+        for index, stage in enumerate(self.stages):
+            threads.extend(threading.Thread(target=self._work, args=(index,), name=f"{stage.name}-{number}",
+                                            daemon=True)
+                           for number in range(1, stage.workers + 1))
+        for thread in threads:
+            thread.start()
+        last = len(self.stages)
+        try:
+            while True:
+                waiting_since = time.monotonic()
+                envelope = self._get(last)
+                if envelope is None or envelope is _DONE:
+                    break
+                received_at = time.monotonic()
+                yield tuple(envelope)
+                self._record(self.sink_name, busy=time.monotonic() - received_at,
+                             input_wait=received_at - waiting_since, items=1)
+            if self._source_error is not None:
+                raise self._source_error
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            for index in range(len(self._queues)):
+                if self.metrics is not None:
+                    self.metrics.set_gauge('rt_queue_depth', 0, queue=self._consumers[index])
+
+    def stats(self) -> dict:
+        """
+        Return the timing of every stage so far.
+
+        Returns:
+            dict: Per stage name: workers, items, errors, and the seconds spent working
+                  and waiting for input and for room in the next queue, summed over its threads.
+        """
+        with self._lock:
+            return {name: {key: round(value, 3) if isinstance(value, float) else value
+                           for key, value in stats.items()}
+                    for name, stats in self._stats.items()}
@@ -0,0 +1,255 @@
+import argparse
+import io
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import xml.etree.ElementTree as ET
+from dotenv import load_dotenv
+
+# Add the src directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_setup import get_db_path, initialize_database
+from document_blobs import iter_text_batches
+
+SECTION_COLUMNS = (
+    'position', 'chapter_number', 'chapter_title', 'section_number', 'section_title',
+    'subsection_number', 'point_number', 'text'
+)
+
+INSERT_SECTION_SQL = '''
+    INSERT INTO legal_sections (
+        full_text_id, position, chapter_number, chapter_title, section_number, section_title,
+        subsection_number, point_number, text
+    ) VALUES (
+        :full_text_id, :position, :chapter_number, :chapter_title, :section_number, :section_title,
+        :subsection_number, :point_number, :text
+    )
+'''
+
+# Riigi Teataja XML elements (namespace stripped) and the fields they set
+NUMBER_AND_TITLE_FIELDS = {
+    'peatykkNr': 'chapter_number',
+    'peatykkPealkiri': 'chapter_title',
+    'paragrahvNr': 'section_number',
+    'paragrahvPealkiri': 'section_title',
+    'loigeNr': 'subsection_number',
+    'alampunktNr': 'point_number',
+}
+# Fields cleared when a new structural unit starts
+RESET_FIELDS = {
+    'peatykk': ('chapter_number', 'chapter_title', 'section_number', 'section_title',
+                'subsection_number', 'point_number'),
+    'paragrahv': ('section_number', 'section_title', 'subsection_number', 'point_number'),
+    'loige': ('subsection_number', 'point_number'),
+    'alampunkt': ('point_number',),
+}
+# Units whose own sisuTekst becomes a row
+TEXT_OWNERS = ('paragrahv', 'loige', 'alampunkt')
+
+
+def _local_name(tag: str) -> str:
+    """Strip the XML namespace from an element tag."""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _element_text(element: ET.Element) -> str:
+    """Return the element's text including inline children, with whitespace collapsed."""
+    return re.sub(r'\s+', ' ', ''.join(element.itertext())).strip()
+
+
+def iter_sections(xml_text: str):
+    """
+    Stream the structural units of a Riigi Teataja act XML.
+
+    The XML is parsed with iterparse and each section (§) is cleared once it
+    has been read, so memory use does not grow with the size of the act. One
+    row is produced for every text-bearing unit: a section with its own text,
+    a subsection (lõige) and a point (punkt). A section without any text, such
+    as a repealed one, produces a single row with text None.
+
+    Args:
+        xml_text: The act's XML as returned by get_full_document_text().
+
+    Yields:
+        dict: Row with the keys in SECTION_COLUMNS; numbers are kept as text
+              (e.g. '12', '12^1').
+
+    Raises:
+        xml.etree.ElementTree.ParseError: If the XML is malformed.
+    """
+    current = dict.fromkeys(NUMBER_AND_TITLE_FIELDS.values())
+    stack = []
+    position = 0
+    section_has_rows = False
+
+    def make_row(text):
+        nonlocal position, section_has_rows
+        position += 1
+        section_has_rows = True
+        return dict(current, position=position, text=text)
+
+    for event, element in ET.iterparse(io.BytesIO(xml_text.encode('utf-8')), events=('start', 'end')):
+        name = _local_name(element.tag)
+        if event == 'start':
+            stack.append(name)
+            for field in RESET_FIELDS.get(name, ()):
+                current[field] = None
+            if name == 'paragrahv':
+                section_has_rows = False
+            continue
+
+        stack.pop()
+        if name in NUMBER_AND_TITLE_FIELDS:
+            current[NUMBER_AND_TITLE_FIELDS[name]] = _element_text(element) or None
+        elif name == 'sisuTekst' and stack and stack[-1] in TEXT_OWNERS:
+            yield make_row(_element_text(element))
+            element.clear()
+        elif name == 'paragrahv':
+            if not section_has_rows:
+                yield make_row(None)
+            element.clear()
+
+
+def store_sections(conn: sqlite3.Connection, full_text_id: int, xml_text: str | None) -> int:
+    """
+    Replace the stored sections of one act with those parsed from its XML.
+
+    Malformed XML is logged and leaves the act without sections.
+
+    Args:
+        conn: Open database connection; the caller manages the transaction.
+        full_text_id: The act's full_text_id.
+        xml_text: The act's XML, or None.
+
+    Returns:
+        int: Number of section rows stored.
+    """
+    conn.execute("DELETE FROM legal_sections WHERE full_text_id = ?", (full_text_id,))
+    if not xml_text:
+        return 0
+    try:
+        rows = [dict(row, full_text_id=full_text_id) for row in iter_sections(xml_text)]
+    except ET.ParseError as e:
+        logging.warning(f"Could not parse XML of act full_text_id={full_text_id} into sections: {str(e)}")
+        return 0
+    conn.executemany(INSERT_SECTION_SQL, rows)
+    return len(rows)
+
+
+def rebuild_sections(conn: sqlite3.Connection, batch_size: int = 50) -> int:
+    """
+    Parse the stored XML of every document into legal_sections.
+
+    Args:
+        conn: Open database connection.
+        batch_size: Number of documents decoded and parsed at a time.
+
+    Returns:
+        int: Number of section rows stored.
+    """
+    conn.execute("DELETE FROM legal_sections")
+    stored = 0
+    for batch in iter_text_batches(conn, ('text_content_xml',), batch_size):
+        for full_text_id, _, texts in batch:
+            stored += store_sections(conn, full_text_id, texts['text_content_xml'])
+    return stored
+
+
+def get_section(conn: sqlite3.Connection, full_text_id: int, section_number: str,
+                subsection_number: str | None = None) -> list[dict]:
+    """
+    Look up one section (§) of an act, optionally narrowed to a subsection.
+
+    Args:
+        conn: Open database connection.
+        full_text_id: The act's full_text_id.
+        section_number: Section number as it appears in the act, e.g. '12' or '12^1'.
+        subsection_number: Optional subsection (lõige) number.
+
+    Returns:
+        list[dict]: The section's rows in document order; empty if not found.
+    """
+    rows = conn.execute(
+        f'''
+        SELECT {', '.join(SECTION_COLUMNS)} FROM legal_sections
+        WHERE full_text_id = ? AND section_number = ? AND (? IS NULL OR subsection_number = ?)
+        ORDER BY position
+        ''',
+        (full_text_id, str(section_number), subsection_number, subsection_number)
+    ).fetchall()
+    return [dict(zip(SECTION_COLUMNS, row)) for row in rows]
+
+
+def format_section(rows: list[dict]) -> str:
+    """
+    Render section rows as readable text.
+
+    Args:
+        rows: Rows as returned by get_section().
+
+    Returns:
+        str: The section heading followed by its subsections and points.
+    """
+    if not rows:
+        return ''
+    first = rows[0]
+    heading = f"§ {first['section_number']}."
+    if first['section_title']:
+        heading += f" {first['section_title']}"
+    lines = [heading]
+    for row in rows:
+        if row['text'] is None:
+            continue
+        if row['point_number']:
+            lines.append(f"    {row['point_number']}) {row['text']}")
+        elif row['subsection_number']:
+            lines.append(f"({row['subsection_number']}) {row['text']}")
+        else:
+            lines.append(row['text'])
+    return '\n'.join(lines)
+
+
+def main():
+    """Command-line entry point for looking up sections and rebuilding the section table."""
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Look up sections (§) of the stored acts.")
+    parser.add_argument("full_text_id", type=int, nargs='?', help="The act's full_text_id (terviktekstID).")
+    parser.add_argument("section", nargs='?', help="Section number, e.g. '12'.")
+    parser.add_argument("--subsection", type=str, default=None, help="Optional. Only return this subsection (lõige).")
+    parser.add_argument("--json", action="store_true", help="Print the rows as JSON.")
+    parser.add_argument("--rebuild", action="store_true", help="Re-parse the stored XML of all documents into sections.")
+    args = parser.parse_args()
+
+    initialize_database()
+    _, database_path = get_db_path()
+    conn = sqlite3.connect(database_path)
+    try:
+        if args.rebuild:
+            with conn:
+                stored = rebuild_sections(conn)
+            logging.info(f"Stored {stored} section rows")
+        if args.full_text_id is None or args.section is None:
+            if not args.rebuild:
+                parser.error("full_text_id and section are required")
+            return
+
+        rows = get_section(conn, args.full_text_id, args.section, args.subsection)
+    finally:
+        conn.close()
+
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+    elif rows:
+        print(format_section(rows))
+    else:
+        print(f"§ {args.section} not found in act {args.full_text_id}.")
+
+
+if __name__ == "__main__":
+    main()
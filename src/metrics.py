@@ -0,0 +1,342 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Output files for the crawl metrics; empty disables the output
+METRICS_TEXTFILE = os.getenv('METRICS_TEXTFILE', '')
+METRICS_JSON_FILE = os.getenv('METRICS_JSON_FILE', '')
+# Seconds between two writes of the metrics files during a crawl
+METRICS_INTERVAL_SECONDS = float(os.getenv('METRICS_INTERVAL_SECONDS', 30))
+
+# Upper bounds of the latency histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Help text of every metric recorded by the crawler, shown in the Prometheus output
+METRIC_DESCRIPTIONS = {
+    'rt_http_requests_total': 'HTTP requests sent, by endpoint and status code (error: no response).',
+    'rt_http_request_duration_seconds': 'Time until a response arrived, by endpoint.',
+    'rt_http_response_bytes_total': 'Response body bytes downloaded, by endpoint.',
+    'rt_http_retries_total': 'Requests retried after a transient failure, by endpoint.',
+    'rt_http_cache_hits_total': 'Requests answered from the response cache, by endpoint and result.',
+    'rt_rate_limit_wait_seconds_total': 'Time spent waiting for the rate limiter.',
+    'rt_circuit_breaker_wait_seconds_total': 'Time spent waiting for the circuit breaker to close.',
+    'rt_request_rate': 'Current request rate of the rate limiter, in requests per second.',
+    'rt_stage_duration_seconds': 'Time spent per act in the list, fetch, parse and write stages and per batch in the insert stage.',
+    'rt_stage_wait_seconds_total': 'Time pipeline stages spent waiting for input or for room in the next queue, by stage.',
+    'rt_acts_total': 'Acts handled by the crawl, by result.',
+    'rt_db_rows_total': 'Rows written to legal_documents, by result.',
+    'rt_acts_per_second': 'Acts handled per second since the crawl started.',
+    'rt_queue_depth': 'Items waiting in a crawl queue.',
+    'rt_crawl_start_time_seconds': 'Unix time at which the crawl started.',
+}
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(label_key: tuple, extra: tuple = ()) -> str:
+    pairs = label_key + extra
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of counters, gauges and latency histograms.
+
+    Metrics are identified by name and an optional set of labels, e.g.
+    ``inc('rt_http_requests_total', endpoint='search', status=200)``. Gauges
+    that are cheaper to read than to keep up to date (rates, buffer sizes) can
+    be registered as collectors, which are called before every snapshot.
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        """
+        Create an empty registry.
+
+        Args:
+            buckets: Upper bounds of the histogram buckets, in ascending order.
+        """
+        self.buckets = tuple(buckets)
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """
+        Increase a counter.
+
+        Args:
+            name: Metric name.
+            amount: Amount to add.
+            **labels: Label values.
+        """
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels):
+        """
+        Set a gauge to a value.
+
+        Args:
+            name: Metric name.
+            value: Current value.
+            **labels: Label values.
+        """
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name: str, value: float, **labels):
+        """
+        Record one observation in a histogram.
+
+        Args:
+            name: Metric name.
+            value: Observed value, usually a duration in seconds.
+            **labels: Label values.
+        """
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            histogram['counts'][bisect_left(self.buckets, value)] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """
+        Observe the duration of a ``with`` block in a histogram.
+
+        Args:
+            name: Metric name.
+            **labels: Label values.
+        """
+        started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - started_at, **labels)
+
+    def add_collector(self, collector):
+        """
+        Register a callable that updates gauges before every snapshot.
+
+        Args:
+            collector: Callable taking the registry as its only argument.
+        """
+        self._collectors.append(collector)
+
+    def _collect(self):
+        for collector in self._collectors:
+            try:
+                collector(self)
+            except Exception as e:
+                logging.warning(f"Metrics collector failed: {str(e)}")
+
+    def merge(self, snapshot: dict):
+        """
+        Add the metrics of another registry, e.g. one kept by a worker process.
+
+        Counters and histograms are added up; gauges take the other registry's value.
+
+        Args:
+            snapshot: A snapshot() of a registry with the same histogram buckets.
+        """
+        with self._lock:
+            for name, samples in snapshot.get('counters', {}).items():
+                for sample in samples:
+                    key = (name, _label_key(sample['labels']))
+                    self._counters[key] = self._counters.get(key, 0) + sample['value']
+            for name, samples in snapshot.get('gauges', {}).items():
+                for sample in samples:
+                    self._gauges[(name, _label_key(sample['labels']))] = sample['value']
+            for name, samples in snapshot.get('histograms', {}).items():
+                for sample in samples:
+                    key = (name, _label_key(sample['labels']))
+                    histogram = self._histograms.get(key)
+                    if histogram is None:
+                        histogram = self._histograms[key] = {'counts': [0] * (len(self.buckets) + 1),
+                                                             'sum': 0.0, 'count': 0}
+                    # The snapshot's bucket counts are cumulative
+                    previous = 0
+                    for index, cumulative in enumerate(sample['buckets'].values()):
+                        histogram['counts'][index] += cumulative - previous
+                        previous = cumulative
+                    histogram['sum'] += sample['sum']
+                    histogram['count'] += sample['count']
+
+    def snapshot(self) -> dict:
+        """
+        Return the current values of all metrics.
+
+        Returns:
+            dict: 'counters', 'gauges' and 'histograms', each mapping a metric name
+                  to a list of samples with their labels.
+        """
+        self._collect()
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {key: {'counts': list(value['counts']), 'sum': value['sum'], 'count': value['count']}
+                          for key, value in self._histograms.items()}
+
+        result = {'counters': {}, 'gauges': {}, 'histograms': {}}
+        for kind, values in (('counters', counters), ('gauges', gauges)):
+            for (name, label_key), value in sorted(values.items()):
+                result[kind].setdefault(name, []).append({'labels': dict(label_key), 'value': value})
+        for (name, label_key), histogram in sorted(histograms.items()):
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(self.buckets + (float('inf'),), histogram['counts']):
+                cumulative += count
+                buckets[_format_value(bound)] = cumulative
+            result['histograms'].setdefault(name, []).append({
+                'labels': dict(label_key),
+                'count': histogram['count'],
+                'sum': round(histogram['sum'], 6),
+                'buckets': buckets
+            })
+        return result
+
+    def to_prometheus(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text.
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def header(name: str, kind: str):
+            if name in METRIC_DESCRIPTIONS:
+                lines.append(f"# HELP {name} {METRIC_DESCRIPTIONS[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for kind, prometheus_type in (('counters', 'counter'), ('gauges', 'gauge')):
+            for name, samples in snapshot[kind].items():
+                header(name, prometheus_type)
+                for sample in samples:
+                    label_key = _label_key(sample['labels'])
+                    lines.append(f"{name}{_format_labels(label_key)} {_format_value(sample['value'])}")
+        for name, samples in snapshot['histograms'].items():
+            header(name, 'histogram')
+            for sample in samples:
+                label_key = _label_key(sample['labels'])
+                for bound, count in sample['buckets'].items():
+                    lines.append(f"{name}_bucket{_format_labels(label_key, (('le', bound),))} {count}")
+                lines.append(f"{name}_sum{_format_labels(label_key)} {_format_value(float(sample['sum']))}")
+                lines.append(f"{name}_count{_format_labels(label_key)} {sample['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path: str):
+        """
+        Write the metrics in Prometheus format, e.g. for node_exporter's textfile collector.
+
+        The file is replaced atomically so the collector never reads a partial file.
+
+        Args:
+            path: Target file, conventionally ending in '.prom'.
+        """
+        _write_atomically(path, self.to_prometheus())
+
+    def write_json(self, path: str):
+        """
+        Write a JSON dump of all metrics.
+
+        Args:
+            path: Target file.
+        """
+        _write_atomically(path, json.dumps(self.snapshot(), indent=2) + '\n')
+
+
+def _write_atomically(path: str, content: str):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(temp_path, path)
+
+
+class MetricsReporter:
+    """
+    Background thread writing a registry's metrics files at a fixed interval.
+
+    The files are written once more when the reporter stops, so a finished
+    run always leaves its final numbers behind.
+    """
+
+    def __init__(self, registry: MetricsRegistry, textfile: str | None = None, json_file: str | None = None,
+                 interval_seconds: float = METRICS_INTERVAL_SECONDS):
+        """
+        Create a reporter.
+
+        Args:
+            registry: The registry to export.
+            textfile: Path of the Prometheus textfile, or None.
+            json_file: Path of the JSON dump, or None.
+            interval_seconds: Seconds between two writes; <= 0 only writes on stop().
+        """
+        self.registry = registry
+        self.textfile = textfile or None
+        self.json_file = json_file or None
+        self.interval_seconds = interval_seconds
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def enabled(self) -> bool:
+        """True if at least one output file is configured."""
+        return self.textfile is not None or self.json_file is not None
+
+    def write(self):
+        """Write the configured files now; errors are logged, not raised."""
+        try:
+            if self.textfile:
+                self.registry.write_textfile(self.textfile)
+            if self.json_file:
+                self.registry.write_json(self.json_file)
+        except OSError as e:
+            logging.warning(f"Could not write metrics: {str(e)}")
+
+    def _run(self):
+        while not self._stopped.wait(self.interval_seconds):
+            self.write()
+
+    def start(self):
+        """Start writing the files periodically in a daemon thread."""
+        if not self.enabled or self.interval_seconds <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='metrics', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the thread and write the final metrics."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.enabled:
+            self.write()
@@ -0,0 +1,334 @@
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from datetime import date, timedelta
+from html import escape as escape_html
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape as escape_xml
+
+SEARCH_PATH = '/api/oigusakt_otsing/1/otsi'
+XML_NAMESPACE = 'tyviseadus_1_10.02.2010'
+
+# Vocabulary of the synthetic acts, so that texts exercise the same UTF-8
+# characters and word lengths as real Estonian legislation
+WORDS = (
+    'seadus', 'säte', 'õigus', 'kohustus', 'isik', 'asutus', 'menetlus', 'otsus', 'taotlus', 'järelevalve',
+    'riik', 'omavalitsus', 'leping', 'vastutus', 'tähtaeg', 'kohaldamine', 'käesolev', 'põhjendatud',
+    'ülesanne', 'pädevus', 'määrus', 'nõue', 'andmed', 'töötlemine', 'ühing', 'liige', 'juhatus',
+    'hüvitis', 'toetus', 'maks', 'trahv', 'väärtegu', 'kohus', 'kaebus', 'vaidlus', 'lahendamine',
+    'teavitama', 'esitama', 'kehtestama', 'tagama', 'rakendama', 'kontrollima', 'määrama', 'lõpetama',
+    'avalik', 'eraõiguslik', 'füüsiline', 'juriidiline', 'pädev', 'asjakohane', 'nimetatud', 'vastav',
+)
+TITLE_NOUNS = ('Ehitus', 'Keskkonna', 'Toote', 'Liiklus', 'Tervishoiu', 'Maksu', 'Hariduse', 'Andmekaitse',
+               'Töölepingu', 'Perekonna', 'Karistus', 'Äriühingu', 'Jäätmete', 'Põllumajanduse')
+
+
+class SyntheticAct:
+    """
+    A generated act: its listing metadata and its text as plain text, HTML and XML.
+
+    The content depends only on the act number and the seed, so every request
+    for the same act returns the same bytes and nothing has to be kept in memory.
+    """
+
+    def __init__(self, number: int, sections: int, seed: int, document_type: str, html_only: bool):
+        """
+        Generate an act.
+
+        Args:
+            number: Position of the act in the result list, starting at 1.
+            sections: Number of sections (paragrahv) in the act.
+            seed: Seed of the generator.
+            document_type: Value of 'liik', e.g. 'seadus'.
+            html_only: Leave out the plain text link, so clients fall back to the HTML page.
+        """
+        self.number = number
+        self.rt_unique_id = 100000 + number
+        self.full_text_id = 200000 + number
+        rng = random.Random(f"{seed}-{number}")
+        self.title = f"{rng.choice(TITLE_NOUNS)}seadus {number}"
+        publication_date = date(2000, 1, 1) + timedelta(days=rng.randrange(9000))
+        self.metadata = {
+            'globaalID': self.rt_unique_id,
+            'terviktekstID': self.full_text_id,
+            'terviktekstiGrupiID': 300000 + number,
+            'pealkiri': self.title,
+            'liik': document_type,
+            'avaldamiseKuupaev': publication_date.isoformat(),
+            'kehtivus': {
+                'algus': (publication_date + timedelta(days=10)).isoformat(),
+                'lopp': (publication_date + timedelta(days=4000)).isoformat() if rng.random() < 0.2 else None
+            },
+            'dokumentHtml': f"/akt/{self.rt_unique_id}",
+            'dokumentXML': f"/akt/{self.rt_unique_id}.xml"
+        }
+        if not html_only:
+            self.metadata['dokumentTekst'] = f"/akt/{self.rt_unique_id}/tekst"
+
+        # Chapters of five sections, each section with one to three subsections
+        self.chapters = []
+        for section in range(1, sections + 1):
+            if (section - 1) % 5 == 0:
+                self.chapters.append((len(self.chapters) + 1, self._sentence(rng, 2, 4).rstrip('.').upper(), []))
+            subsections = [self._sentence(rng, 8, 30) for _ in range(rng.randint(1, 3))]
+            self.chapters[-1][2].append((section, self._sentence(rng, 2, 5).rstrip('.'), subsections))
+
+    @staticmethod
+    def _sentence(rng: random.Random, min_words: int, max_words: int) -> str:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))]
+        return ' '.join(words).capitalize() + '.'
+
+    def plain_text(self) -> str:
+        """Return the act as plain text."""
+        lines = [self.title, '']
+        for chapter_number, chapter_title, sections in self.chapters:
+            lines += [f"{chapter_number}. peatükk", chapter_title, '']
+            for section_number, section_title, subsections in sections:
+                lines.append(f"§ {section_number}. {section_title}")
+                lines += [f"({number}) {text}" for number, text in enumerate(subsections, start=1)]
+                lines.append('')
+        return '\n'.join(lines)
+
+    def html(self) -> str:
+        """Return the act as an HTML page with navigation around the text."""
+        parts = [f"<!DOCTYPE html><html lang=\"et\"><head><meta charset=\"utf-8\"><title>{escape_html(self.title)}"
+                 "</title><script>window.rt = {};</script></head><body><nav><a href=\"/\">Avaleht</a></nav>"
+                 f"<article><h1>{escape_html(self.title)}</h1>"]
+        for chapter_number, chapter_title, sections in self.chapters:
+            parts.append(f"<h2>{chapter_number}. peatükk<br>{escape_html(chapter_title)}</h2>")
+            for section_number, section_title, subsections in sections:
+                parts.append(f"<h3>§ {section_number}. {escape_html(section_title)}</h3>")
+                parts += [f"<p>({number}) {escape_html(text)}</p>" for number, text in enumerate(subsections, start=1)]
+        parts.append("</article><footer>Riigi Teataja</footer></body></html>")
+        return ''.join(parts)
+
+    def xml(self) -> str:
+        """Return the act in the structure of Riigi Teataja's act XML."""
+        parts = [f'<?xml version="1.0" encoding="UTF-8"?><oigusakt xmlns="{XML_NAMESPACE}">'
+                 f'<aktinimi><nimi><pealkiri>{escape_xml(self.title)}</pealkiri></nimi></aktinimi><sisu>']
+        for chapter_number, chapter_title, sections in self.chapters:
+            parts.append(f'<peatykk><peatykkNr>{chapter_number}</peatykkNr>'
+                         f'<peatykkPealkiri>{escape_xml(chapter_title)}</peatykkPealkiri>')
+            for section_number, section_title, subsections in sections:
+                parts.append(f'<paragrahv><paragrahvNr>{section_number}</paragrahvNr>'
+                             f'<paragrahvPealkiri>{escape_xml(section_title)}</paragrahvPealkiri>')
+                parts += [f'<loige><loigeNr>{number}</loigeNr><sisuTekst><tavatekst>{escape_xml(text)}</tavatekst>'
+                          '</sisuTekst></loige>' for number, text in enumerate(subsections, start=1)]
+                parts.append('</paragrahv>')
+            parts.append('</peatykk>')
+        parts.append('</sisu></oigusakt>')
+        return ''.join(parts)
+
+
+class MockRTServer:
+    """
+    Local stand-in for the Riigi Teataja search API and document endpoints.
+
+    Serves ``acts`` synthetic acts through the paginated search endpoint
+    (``leht``/``limiit``, with the total in ``metaandmed.kokku``) and their
+    texts under ``/akt/<globaalID>/tekst``, ``/akt/<globaalID>`` (HTML) and
+    ``/akt/<globaalID>.xml``. Every request can be delayed, and a share of
+    requests can be answered with an error status, to exercise retries.
+    """
+
+    def __init__(self, acts: int = 1000, sections: int = 20, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 503, html_fraction: float = 0.0,
+                 seed: int = 1, host: str = '127.0.0.1', port: int = 0):
+        """
+        Configure the server; start() begins serving.
+
+        Args:
+            acts: Number of acts in the search results.
+            sections: Number of sections per act, which sets the document size.
+            latency: Delay in seconds added to every response.
+            jitter: Upper bound of a random delay added on top of the latency, in seconds.
+            error_rate: Share of requests (0-1) answered with error_status.
+            error_status: Status code of injected errors.
+            html_fraction: Share of acts (0-1) without a plain text link.
+            seed: Seed for the generated content and the injected errors.
+            host: Interface to listen on.
+            port: Port to listen on; 0 picks a free port.
+        """
+        self.acts = acts
+        self.sections = sections
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.html_fraction = html_fraction
+        self.seed = seed
+        self.requests_served = 0
+        self.errors_injected = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL of the server, used as RT_DOCUMENT_BASE_URL."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self) -> str:
+        """URL of the search endpoint, used as API_BASE_URL."""
+        return f"{self.base_url}{SEARCH_PATH}"
+
+    def act(self, number: int, document_type: str = 'seadus') -> SyntheticAct:
+        """
+        Generate the act at a position in the results.
+
+        Args:
+            number: Position of the act, starting at 1.
+            document_type: Value of 'liik'.
+
+        Returns:
+            SyntheticAct: The act.
+        """
+        html_only = random.Random(f"{self.seed}-html-{number}").random() < self.html_fraction
+        return SyntheticAct(number, self.sections, self.seed, document_type, html_only)
+
+    def search_page(self, params: dict) -> dict:
+        """
+        Build a page of search results.
+
+        Args:
+            params: Query parameters; 'leht' (default 1), 'limiit' (default 100) and 'dokument' are used.
+
+        Returns:
+            dict: The response body with 'aktid' and 'metaandmed'.
+        """
+        page = max(1, int(params.get('leht', 1)))
+        limit = max(1, int(params.get('limiit', 100)))
+        document_type = params.get('dokument', 'seadus')
+        first = (page - 1) * limit + 1
+        numbers = range(first, min(first + limit - 1, self.acts) + 1)
+        return {
+            'aktid': [self.act(number, document_type).metadata for number in numbers],
+            'metaandmed': {'kokku': self.acts, 'leht': page, 'limiit': limit}
+        }
+
+    def _inject_failure(self) -> bool:
+        with self._lock:
+            self.requests_served += 1
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter > 0 else 0.0)
+            failed = self.error_rate > 0 and self._rng.random() < self.error_rate
+            if failed:
+                self.errors_injected += 1
+        if delay > 0:
+            time.sleep(delay)
+        return failed
+
+    def _route(self, path: str, params: dict) -> tuple[int, str, bytes]:
+        """Return the status, content type and body for a request."""
+        if path == SEARCH_PATH:
+            return 200, 'application/json', json.dumps(self.search_page(params), ensure_ascii=False).encode('utf-8')
+        if path.startswith('/akt/'):
+            name = path[len('/akt/'):]
+            kind = 'html'
+            if name.endswith('.xml'):
+                name, kind = name[:-len('.xml')], 'xml'
+            elif name.endswith('/tekst'):
+                name, kind = name[:-len('/tekst')], 'text'
+            if name.isdigit() and 1 <= int(name) - 100000 <= self.acts:
+                act = self.act(int(name) - 100000)
+                if kind == 'xml':
+                    return 200, 'application/xml', act.xml().encode('utf-8')
+                if kind == 'text':
+                    return 200, 'text/plain; charset=utf-8', act.plain_text().encode('utf-8')
+                return 200, 'text/html; charset=utf-8', act.html().encode('utf-8')
+        return 404, 'text/plain; charset=utf-8', b'Not found'
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are written separately; without this, keep-alive
+            # responses wait for the client's delayed ACK
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+                if server._inject_failure():
+                    status, content_type, body = server.error_status, 'text/plain; charset=utf-8', b'Injected error'
+                else:
+                    status, content_type, body = server._route(url.path, params)
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logging.debug(f"{self.address_string()} {format % args}")
+
+        return Handler
+
+    def serve_forever(self):
+        """Serve requests in the calling thread until the process is interrupted."""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def start(self) -> 'MockRTServer':
+        """Serve requests in a background thread."""
+        # A short poll interval lets stop() return quickly
+        self._thread = threading.Thread(target=self._httpd.serve_forever, kwargs={'poll_interval': 0.05},
+                                        name='mock-rt-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main():
+    """Run the mock server in the foreground."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Serve synthetic Riigi Teataja acts for local crawls and benchmarks.")
+    parser.add_argument("--host", default='127.0.0.1', help="Interface to listen on. Default: 127.0.0.1.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on. Default: 8765.")
+    parser.add_argument("--acts", type=int, default=1000, help="Number of acts in the search results. Default: 1000.")
+    parser.add_argument("--sections", type=int, default=20, help="Sections per act; sets the document size. Default: 20.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response. Default: 0.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Upper bound of an extra random delay in seconds. Default: 0.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with --error-status. Default: 0.")
+    parser.add_argument("--error-status", type=int, default=503, help="Status code of injected errors. Default: 503.")
+    parser.add_argument("--html-fraction", type=float, default=0.0, help="Share of acts without a plain text link. Default: 0.")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the generated content. Default: 1.")
+    args = parser.parse_args()
+
+    server = MockRTServer(acts=args.acts, sections=args.sections, latency=args.latency, jitter=args.jitter,
+                          error_rate=args.error_rate, error_status=args.error_status,
+                          html_fraction=args.html_fraction, seed=args.seed, host=args.host, port=args.port)
+    logging.info(f"Serving {args.acts} acts; set API_BASE_URL={server.api_url} RT_DOCUMENT_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logging.info(f"Served {server.requests_served} requests ({server.errors_injected} injected errors)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+from datetime import date, datetime
+from urllib.parse import quote
+from dotenv import load_dotenv
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet export is optional; the crawler does not need pyarrow
+    pyarrow = None
+
+# Add the src directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_setup import get_db_path, initialize_database
+from document_blobs import HASH_COLUMNS, read_blobs
+from storage_codec import COMPRESSED_TEXT_COLUMNS, decode_text
+
+# Rows read from the database per query
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+# Rows buffered in memory, over all partitions, before the largest partition is written out
+EXPORT_BUFFER_ROWS = int(os.getenv('EXPORT_BUFFER_ROWS', 100000))
+# Text buffered in memory, in megabytes (counted in characters), before the partition holding most of it is written out
+EXPORT_BUFFER_MB = int(os.getenv('EXPORT_BUFFER_MB', 256))
+# Parquet compression: zstd, snappy, gzip, brotli, lz4 or none
+PARQUET_COMPRESSION = os.getenv('PARQUET_COMPRESSION', 'zstd')
+
+TEXT_MODES = ('none', 'separate', 'inline')
+STATE_FILENAME = '_export_state.json'
+DOCUMENTS_DIR = 'documents'
+TEXTS_DIR = 'texts'
+# Partition value for acts without a publication date, as used by Hive and Spark
+NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+# Metadata columns in the order they are exported; document_type and the
+# publication year are the partition keys and only appear in the directory names
+EXPORT_SQL = '''
+    SELECT change_seq, full_text_id, rt_unique_id, lineage_id, title, document_type, publication_date,
+           entry_into_force_date, repeal_date, status, source_url, text_url, xml_url, retrieved_at, last_checked_at,
+           plain_text_hash, xml_text_hash, html_text_hash{json_columns}
+    FROM legal_documents
+    WHERE change_seq > :after AND change_seq <= :until
+    ORDER BY change_seq
+    LIMIT :limit
+'''
+
+
+def _require_pyarrow():
+    if pyarrow is None:
+        raise ValueError("The Parquet export requires the pyarrow package (pip install pyarrow)")
+
+
+def _document_schema(include_json: bool, text_columns: tuple = ()) -> 'pyarrow.Schema':
+    """Arrow schema of the exported metadata, optionally followed by the JSON and text columns."""
+    fields = [
+        ('change_seq', pyarrow.int64()), ('full_text_id', pyarrow.int64()), ('rt_unique_id', pyarrow.string()),
+        ('lineage_id', pyarrow.int64()), ('title', pyarrow.string()), ('publication_date', pyarrow.date32()),
+        ('entry_into_force_date', pyarrow.date32()), ('repeal_date', pyarrow.date32()), ('status', pyarrow.string()),
+        ('source_url', pyarrow.string()), ('text_url', pyarrow.string()), ('xml_url', pyarrow.string()),
+        ('retrieved_at', pyarrow.timestamp('s')),
+        ('last_checked_at', pyarrow.timestamp('s')), ('plain_text_hash', pyarrow.string()),
+        ('xml_text_hash', pyarrow.string()), ('html_text_hash', pyarrow.string())
+    ]
+    if include_json:
+        fields.append(('api_response_json', pyarrow.string()))
+    fields.extend((column, pyarrow.large_string()) for column in text_columns)
+    return pyarrow.schema(fields)
+
+
+def _text_schema() -> 'pyarrow.Schema':
+    """Arrow schema of the separate text files."""
+    return pyarrow.schema([('change_seq', pyarrow.int64()), ('full_text_id', pyarrow.int64())]
+                          + [(column, pyarrow.large_string()) for column in COMPRESSED_TEXT_COLUMNS])
+
+
+def _parse_date(value: str | None) -> date | None:
+    """Convert a stored YYYY-MM-DD date; malformed dates are exported as null."""
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def _parse_timestamp(value: str | None) -> datetime | None:
+    """Convert a stored YYYY-MM-DD HH:MM:SS timestamp; malformed values are exported as null."""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d %H:%M:%S') if value else None
+    except ValueError:
+        return None
+
+
+def partition_path(document_type: str, publication_date: str | None) -> str:
+    """
+    Return the Hive-style directory of an act inside the documents/ and texts/ directories.
+
+    Args:
+        document_type: The act's document type.
+        publication_date: The act's publication date (YYYY-MM-DD) or None.
+
+    Returns:
+        str: E.g. 'document_type=seadus/year=2024'.
+    """
+    publication = _parse_date(publication_date)
+    year = str(publication.year) if publication else NULL_PARTITION
+    return f"document_type={quote(document_type or NULL_PARTITION, safe='')}/year={year}"
+
+
+class _PartitionBuffers:
+    """Rows waiting to be written, per partition, for one kind of file (metadata or texts)."""
+
+    def __init__(self, root: str, schema: 'pyarrow.Schema', export_id: int, compression: str):
+        self.root = root
+        self.schema = schema
+        self.export_id = export_id
+        self.compression = None if compression == 'none' else compression
+        self.rows = {}
+        self.text_sizes = {}
+        self.files_written = 0
+        self.rows_written = 0
+
+    def add(self, partition: str, row: dict, text_size: int = 0):
+        self.rows.setdefault(partition, []).append(row)
+        self.text_sizes[partition] = self.text_sizes.get(partition, 0) + text_size
+
+    @property
+    def buffered_rows(self) -> int:
+        return sum(len(rows) for rows in self.rows.values())
+
+    @property
+    def buffered_text_size(self) -> int:
+        return sum(self.text_sizes.values())
+
+    def write(self, partition: str):
+        """Write the buffered rows of a partition as a new part file."""
+        rows = self.rows.pop(partition, None)
+        self.text_sizes.pop(partition, None)
+        if not rows:
+            return
+        directory = os.path.join(self.root, partition)
+        os.makedirs(directory, exist_ok=True)
+        self.files_written += 1
+        path = os.path.join(directory, f"part-{self.export_id:05d}-{self.files_written:05d}.parquet")
+        table = pyarrow.Table.from_pylist(rows, schema=self.schema)
+        pyarrow.parquet.write_table(table, path, compression=self.compression)
+        self.rows_written += len(rows)
+
+    def write_largest(self):
+        """Write out the partition with the most buffered text, or else the most rows."""
+        partition = max(self.rows, key=lambda name: (self.text_sizes.get(name, 0), len(self.rows[name])))
+        self.write(partition)
+
+    def write_all(self):
+        for partition in list(self.rows):
+            self.write(partition)
+
+
+def load_export_state(output_dir: str) -> dict | None:
+    """
+    Read the state left by the last export into a directory.
+
+    Args:
+        output_dir: The export directory.
+
+    Returns:
+        dict | None: 'last_change_seq', 'text_mode', 'include_json' and the list of 'exports',
+                     or None if nothing was exported there yet.
+    """
+    path = os.path.join(output_dir, STATE_FILENAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_export_state(output_dir: str, state: dict):
+    path = os.path.join(output_dir, STATE_FILENAME)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def export_documents(conn: sqlite3.Connection, output_dir: str, text_mode: str = 'separate',
+                     include_json: bool = False, incremental: bool = False, batch_size: int = EXPORT_BATCH_SIZE,
+                     compression: str = PARQUET_COMPRESSION) -> dict:
+    """
+    Export legal_documents as Parquet files partitioned by document type and publication year.
+
+    The table is read in keyset-paginated batches ordered by change_seq, so
+    memory use is bounded by the write buffers, not by the table. Metadata goes
+    to <output_dir>/documents/document_type=<type>/year=<year>/part-*.parquet.
+    With text_mode 'separate', the texts go to the same partitions under
+    <output_dir>/texts/, keyed by full_text_id and change_seq; with 'inline'
+    they are extra columns of the metadata files; with 'none' they are left out
+    and never read. The export reads one snapshot of the database, so a crawl
+    running at the same time does not make it inconsistent.
+
+    An incremental export writes only the acts inserted or changed since the
+    previous export into the directory, as new part files next to the old
+    ones; readers keep the row with the highest change_seq per full_text_id.
+    Acts deleted from the database are only removed by a full export, which
+    replaces the documents/ and texts/ directories.
+
+    Args:
+        conn: Open database connection.
+        output_dir: Directory of the exported dataset.
+        text_mode: 'none', 'separate' or 'inline'.
+        include_json: Also export api_response_json.
+        incremental: Export only changes since the previous export into output_dir
+                     (a full export if there was none).
+        batch_size: Rows read per query.
+        compression: Parquet compression codec.
+
+    Returns:
+        dict: Export number, change_seq range, acts, files and text characters written.
+
+    Raises:
+        ValueError: If pyarrow is missing, the text mode is unknown, or an incremental export
+                    uses other text or JSON options than the export it continues.
+    """
+    _require_pyarrow()
+    if text_mode not in TEXT_MODES:
+        raise ValueError(f"Unknown text mode '{text_mode}'. Supported: {', '.join(TEXT_MODES)}")
+    state = load_export_state(output_dir)
+    continues = incremental and state is not None
+    if continues:
+        if (state['text_mode'], state['include_json']) != (text_mode, include_json):
+            raise ValueError(f"Incremental export must use the options of the previous export "
+                             f"(text mode '{state['text_mode']}', include JSON {state['include_json']})")
+        after = state['last_change_seq']
+    else:
+        state = {'last_change_seq': 0, 'text_mode': text_mode, 'include_json': include_json,
+                 'exports': (state or {}).get('exports', [])}
+        after = 0
+        for directory in (DOCUMENTS_DIR, TEXTS_DIR):
+            shutil.rmtree(os.path.join(output_dir, directory), ignore_errors=True)
+    export_id = len(state['exports']) + 1
+
+    inline_columns = COMPRESSED_TEXT_COLUMNS if text_mode == 'inline' else ()
+    documents = _PartitionBuffers(os.path.join(output_dir, DOCUMENTS_DIR),
+                                  _document_schema(include_json, inline_columns), export_id, compression)
+    texts = _PartitionBuffers(os.path.join(output_dir, TEXTS_DIR), _text_schema(), export_id, compression)
+    buffer_size = EXPORT_BUFFER_MB * 1024 * 1024
+    query = EXPORT_SQL.format(json_columns=', api_response_json, api_response_codec' if include_json else '')
+    text_characters = 0
+
+    # One read transaction for the whole export
+    in_transaction = conn.in_transaction
+    if not in_transaction:
+        conn.execute("BEGIN")
+    try:
+        until = conn.execute("SELECT COALESCE(MAX(change_seq), 0) FROM legal_documents").fetchone()[0]
+        last = after
+        while True:
+            cursor = conn.execute(query, {'after': last, 'until': until, 'limit': batch_size})
+            columns = [description[0] for description in cursor.description]
+            rows = [dict(zip(columns, values)) for values in cursor.fetchall()]
+            if not rows:
+                break
+            last = rows[-1]['change_seq']
+            bodies = {}
+            if text_mode != 'none':
+                bodies = read_blobs(conn, {row[HASH_COLUMNS[column]] for row in rows
+                                           for column in COMPRESSED_TEXT_COLUMNS} - {None})
+            for row in rows:
+                partition = partition_path(row.pop('document_type'), row['publication_date'])
+                for column in ('publication_date', 'entry_into_force_date', 'repeal_date'):
+                    row[column] = _parse_date(row[column])
+                for column in ('retrieved_at', 'last_checked_at'):
+                    row[column] = _parse_timestamp(row[column])
+                if include_json:
+                    row['api_response_json'] = decode_text(row['api_response_json'], row.pop('api_response_codec'))
+                row_texts = {column: bodies.get(row[HASH_COLUMNS[column]]) for column in COMPRESSED_TEXT_COLUMNS}
+                row_text_size = sum(len(text) for text in row_texts.values() if text is not None)
+                text_characters += row_text_size
+                if text_mode == 'inline':
+                    documents.add(partition, {**row, **row_texts}, row_text_size)
+                else:
+                    documents.add(partition, row)
+                if text_mode == 'separate':
+                    texts.add(partition, {'change_seq': row['change_seq'], 'full_text_id': row['full_text_id'],
+                                          **row_texts}, row_text_size)
+            for buffers in (documents, texts):
+                while buffers.rows and (buffers.buffered_rows > EXPORT_BUFFER_ROWS
+                                        or buffers.buffered_text_size > buffer_size):
+                    buffers.write_largest()
+            logging.info(f"Exported {documents.rows_written + documents.buffered_rows} acts "
+                         f"(change_seq up to {last} of {until})")
+        documents.write_all()
+        texts.write_all()
+    finally:
+        if not in_transaction:
+            conn.rollback()
+
+    summary = {
+        'export_id': export_id,
+        'incremental': continues,
+        'from_change_seq': after,
+        'to_change_seq': until,
+        'acts': documents.rows_written,
+        'files': documents.files_written + texts.files_written,
+        'text_characters': text_characters,
+        'exported_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    state['last_change_seq'] = until
+    state['exports'].append(summary)
+    _save_export_state(output_dir, state)
+    return summary
+
+
+def main():
+    """Command-line entry point for exporting the stored acts as Parquet files."""
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(
+        description="Export the stored acts as Parquet files partitioned by document type and publication year."
+    )
+    parser.add_argument("output_dir", help="Directory of the exported dataset.")
+    parser.add_argument("--text", choices=TEXT_MODES, default='separate',
+                        help="Optional. 'separate' writes the texts to texts/ next to the metadata in documents/, "
+                             "'inline' adds them to the metadata files, 'none' leaves them out. Default: separate.")
+    parser.add_argument("--include-json", action="store_true",
+                        help="Optional. Also export the raw API metadata (api_response_json).")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Optional. Export only acts inserted or changed since the previous export into the directory.")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE,
+                        help="Optional. Rows read per query. Default: EXPORT_BATCH_SIZE or 1000.")
+    parser.add_argument("--compression", default=PARQUET_COMPRESSION,
+                        help="Optional. Parquet compression codec (zstd, snappy, gzip, brotli, lz4, none). Default: PARQUET_COMPRESSION or zstd.")
+    args = parser.parse_args()
+
+    initialize_database()
+    _, database_path = get_db_path()
+    conn = sqlite3.connect(database_path)
+    try:
+        summary = export_documents(conn, args.output_dir, text_mode=args.text, include_json=args.include_json,
+                                   incremental=args.incremental, batch_size=args.batch_size,
+                                   compression=args.compression)
+    except ValueError as e:
+        logging.error(str(e))
+        sys.exit(1)
+    finally:
+        conn.close()
+    logging.info(f"Export {summary['export_id']} wrote {summary['acts']} acts in {summary['files']} files "
+                 f"(change_seq {summary['from_change_seq']}..{summary['to_change_seq']}) to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import logging
+import threading
+import time
+
+
+class TokenBucketRateLimiter:
+    """
+    Thread-safe token bucket shared by all workers that talk to one server.
+
+    Tokens refill continuously at ``rate`` per second up to ``burst``. Each
+    request takes one token; when the bucket is empty the caller reserves the
+    next token and sleeps until it becomes available, so concurrent callers are
+    spaced out evenly instead of all waking up at once.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Create a rate limiter.
+
+        Args:
+            rate: Sustained number of requests per second. A value <= 0 disables limiting.
+            burst: Maximum number of requests that may be made back to back.
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """
+        Take one token and return how long the caller must wait for it.
+
+        Returns:
+            float: Seconds to wait before the reserved token is valid.
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated_at
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated_at = now
+            # The balance may go negative: that is the queue of callers that
+            # have already reserved future tokens.
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        """
+        Block until a request may be made.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        if self.rate <= 0:
+            return 0.0
+        wait_seconds = self._reserve()
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+        return wait_seconds
+
+    def set_rate(self, rate: float):
+        """
+        Change the sustained rate; tokens earned so far are kept.
+
+        Args:
+            rate: New number of requests per second.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.rate > 0:
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self.rate = rate
+
+    def record_response(self, latency_seconds: float, status_code: int | None):
+        """
+        Report the outcome of a request. The fixed-rate limiter ignores it.
+
+        Args:
+            latency_seconds: Time until the response arrived.
+            status_code: HTTP status, or None if the request failed without a response.
+        """
+
+    def stats(self) -> dict:
+        """
+        Return the limiter's current settings.
+
+        Returns:
+            dict: The current rate in requests per second and the burst size.
+        """
+        return {'mode': 'fixed', 'current_rate': self.rate, 'burst': self.burst}
+
+
+class AdaptiveRateLimiter(TokenBucketRateLimiter):
+    """
+    Token bucket whose rate follows the server's health (AIMD).
+
+    While responses are fast and successful, the rate grows by ``increase_step``
+    requests per second at most once per ``adjust_interval`` (additive increase).
+    A 429, a 5xx, a failed request or a smoothed latency above ``latency_target``
+    multiplies the rate by ``decrease_factor`` (multiplicative decrease). After a
+    decrease the rate is not lowered again within ``adjust_interval``, so the
+    failures of requests that were already in flight count only once. The rate
+    always stays between ``floor`` and ``ceiling``.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, floor: float = 0.1, ceiling: float = 2.0,
+                 increase_step: float = 0.1, decrease_factor: float = 0.5,
+                 latency_target: float = 2.0, adjust_interval: float = 5.0):
+        """
+        Create an adaptive rate limiter.
+
+        Args:
+            rate: Starting number of requests per second; clamped to [floor, ceiling].
+            burst: Maximum number of requests that may be made back to back.
+            floor: Lowest rate in requests per second.
+            ceiling: Highest rate in requests per second.
+            increase_step: Requests per second added after a healthy interval.
+            decrease_factor: Factor applied to the rate when the server struggles.
+            latency_target: Smoothed response time in seconds above which responses count as slow.
+            adjust_interval: Minimum seconds between two rate changes of the same kind.
+        """
+        self.floor = max(floor, 1e-6)
+        self.ceiling = max(ceiling, self.floor)
+        super().__init__(min(max(rate, self.floor), self.ceiling), burst)
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_target = latency_target
+        self.adjust_interval = adjust_interval
+        self.latency_ewma = None
+        self.increases = 0
+        self.decreases = 0
+        self.min_rate_seen = self.rate
+        self.max_rate_seen = self.rate
+        self._last_increase_at = time.monotonic()
+        self._last_decrease_at = float('-inf')
+        self._feedback_lock = threading.Lock()
+
+    def record_response(self, latency_seconds: float, status_code: int | None):
+        """
+        Adjust the rate after a request.
+
+        Args:
+            latency_seconds: Time until the response arrived.
+            status_code: HTTP status, or None if the request failed without a response.
+        """
+        with self._feedback_lock:
+            now = time.monotonic()
+            if self.latency_ewma is None:
+                self.latency_ewma = latency_seconds
+            else:
+                self.latency_ewma = 0.2 * latency_seconds + 0.8 * self.latency_ewma
+
+            overloaded = status_code is None or status_code == 429 or status_code >= 500
+            if overloaded or self.latency_ewma > self.latency_target:
+                if now - self._last_decrease_at < self.adjust_interval:
+                    return
+                new_rate = max(self.floor, self.rate * self.decrease_factor)
+                self._last_decrease_at = now
+                self._last_increase_at = now
+                if new_rate < self.rate:
+                    self.decreases += 1
+                    logging.info(f"Lowering request rate to {new_rate:.2f}/s (status={status_code}, "
+                                 f"latency={self.latency_ewma:.2f}s)")
+            else:
+                if now - self._last_increase_at < self.adjust_interval or self.rate >= self.ceiling:
+                    return
+                new_rate = min(self.ceiling, self.rate + self.increase_step)
+                self._last_increase_at = now
+                self.increases += 1
+            self.set_rate(new_rate)
+            self.min_rate_seen = min(self.min_rate_seen, new_rate)
+            self.max_rate_seen = max(self.max_rate_seen, new_rate)
+
+    def stats(self) -> dict:
+        """
+        Return the current rate and how it has changed.
+
+        Returns:
+            dict: Current, lowest and highest rate, the configured bounds, the number
+                  of increases and decreases and the smoothed latency.
+        """
+        with self._feedback_lock:
+            return {
+                'mode': 'adaptive',
+                'current_rate': round(self.rate, 3),
+                'min_rate': round(self.min_rate_seen, 3),
+                'max_rate': round(self.max_rate_seen, 3),
+                'floor': self.floor,
+                'ceiling': self.ceiling,
+                'increases': self.increases,
+                'decreases': self.decreases,
+                'latency_ewma_seconds': round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+                'burst': self.burst
+            }
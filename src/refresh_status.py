@@ -0,0 +1,138 @@
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+from datetime import date, datetime
+from dotenv import load_dotenv
+
+# Add the src directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_setup import get_db_path, initialize_database
+
+
+def _invalid_date_sql(column: str) -> str:
+    """SQL that is true when a non-empty date column does not hold a valid YYYY-MM-DD date."""
+    # date() alone passes days past the end of the month through; '+0 days' normalises them
+    return f"(NULLIF({column}, '') IS NOT NULL AND date({column}, '+0 days') IS NOT {column})"
+
+
+# The rules of determine_document_status() in data_retriever.py as one SQL
+# expression over the stored dates, evaluated against the :as_of parameter.
+# ISO dates compare correctly as text, and a comparison with NULL is never true.
+STATUS_SQL = f'''
+    CASE
+        WHEN {_invalid_date_sql('publication_date')} OR {_invalid_date_sql('entry_into_force_date')}
+             OR {_invalid_date_sql('repeal_date')} THEN 'UNKNOWN'
+        WHEN NULLIF(repeal_date, '') < :as_of THEN 'EXPIRED'
+        WHEN NULLIF(entry_into_force_date, '') <= :as_of THEN 'VALID'
+        WHEN NULLIF(entry_into_force_date, '') > :as_of THEN 'PENDING_VALIDITY'
+        ELSE 'UNKNOWN'
+    END
+'''
+
+# Between two refreshes, only acts that entered into force or were repealed
+# in between can change status; both ranges are looked up in the date indexes.
+SINCE_FILTER_SQL = '''
+    AND (entry_into_force_date > :window_start AND entry_into_force_date <= :window_end
+         OR repeal_date >= :window_start AND repeal_date < :window_end)
+'''
+
+
+def _parameters(as_of: str | None, since: str | None) -> tuple[str, dict]:
+    """Return the WHERE clause and the parameters for a refresh."""
+    as_of = as_of or date.today().isoformat()
+    where = f"WHERE status IS NOT ({STATUS_SQL})"
+    parameters = {'as_of': as_of}
+    if since is not None:
+        # The window is the same whichever way the as-of date moved
+        parameters['window_start'], parameters['window_end'] = min(since, as_of), max(since, as_of)
+        where += SINCE_FILTER_SQL
+    return where, parameters
+
+
+def refresh_status(conn: sqlite3.Connection, as_of: str | None = None, since: str | None = None) -> int:
+    """
+    Recompute the status of the stored acts in one set-based UPDATE.
+
+    Only rows whose status actually changes are written. Commit is left to the caller.
+
+    Args:
+        conn: Open database connection.
+        as_of: Date (YYYY-MM-DD) the status is evaluated at. Defaults to today.
+        since: Date of the previous refresh. If given, only acts that entered into force
+               or were repealed between since and as_of are considered.
+
+    Returns:
+        int: Number of rows whose status changed.
+    """
+    where, parameters = _parameters(as_of, since)
+    cursor = conn.execute(f"UPDATE legal_documents SET status = ({STATUS_SQL}) {where}", parameters)
+    return cursor.rowcount
+
+
+def status_changes(conn: sqlite3.Connection, as_of: str | None = None, since: str | None = None) -> list[dict]:
+    """
+    List the status changes a refresh would make, without writing them.
+
+    Args:
+        conn: Open database connection.
+        as_of: Date (YYYY-MM-DD) the status is evaluated at. Defaults to today.
+        since: Date of the previous refresh, as for refresh_status().
+
+    Returns:
+        list[dict]: 'from', 'to' and 'count' for every kind of change.
+    """
+    where, parameters = _parameters(as_of, since)
+    rows = conn.execute(
+        f"SELECT status, {STATUS_SQL} AS new_status, COUNT(*) FROM legal_documents {where} "
+        "GROUP BY status, new_status ORDER BY COUNT(*) DESC", parameters
+    ).fetchall()
+    return [{'from': old, 'to': new, 'count': count} for old, new, count in rows]
+
+
+def _iso_date(value: str) -> str:
+    """argparse type for YYYY-MM-DD dates."""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a date in YYYY-MM-DD format")
+
+
+def main():
+    """Command-line entry point for refreshing the status of all stored acts."""
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(
+        description="Recompute the status (VALID, EXPIRED, PENDING_VALIDITY) of all stored acts from their dates."
+    )
+    parser.add_argument("--as-of", type=_iso_date, default=None,
+                        help="Optional. Evaluate the status at this date (YYYY-MM-DD). Default: today.")
+    parser.add_argument("--since", type=_iso_date, default=None,
+                        help="Optional. Date of the previous refresh; only acts that entered into force or were repealed since then are checked.")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Optional. Only report the changes, without writing them.")
+    args = parser.parse_args()
+
+    initialize_database()
+    _, database_path = get_db_path()
+    as_of = args.as_of or date.today().isoformat()
+    conn = sqlite3.connect(database_path)
+    try:
+        if args.dry_run:
+            changes = status_changes(conn, as_of, args.since)
+            for change in changes:
+                logging.info(f"{change['from']} -> {change['to']}: {change['count']} acts")
+            logging.info(f"Dry run: {sum(change['count'] for change in changes)} acts would change status as of {as_of}")
+            return
+        with conn:
+            changed = refresh_status(conn, as_of, args.since)
+        logging.info(f"Refreshed status as of {as_of}: {changed} acts changed")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+class CacheMissError(requests.exceptions.RequestException):
+    """Raised in replay-only mode when a response is not in the cache."""
+
+
+class CachedResponse:
+    """A response body and its validators as stored in the cache."""
+
+    def __init__(self, cache_key: str, url: str, body: bytes, content_type: str | None,
+                 etag: str | None, last_modified: str | None, fetched_at: float):
+        self.cache_key = cache_key
+        self.url = url
+        self.body = body
+        self.content_type = content_type
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def validator_headers(self) -> dict:
+        """
+        Build the conditional request headers for revalidating this entry.
+
+        Returns:
+            dict: If-None-Match and/or If-Modified-Since headers.
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_response(self) -> requests.Response:
+        """
+        Rebuild a requests.Response so callers cannot tell a cache hit from a network response.
+
+        Returns:
+            requests.Response: A 200 response carrying the cached body.
+        """
+        response = requests.Response()
+        response.status_code = 200
+        response._content = self.body
+        response.url = self.url
+        response.headers = CaseInsensitiveDict()
+        if self.content_type:
+            response.headers['Content-Type'] = self.content_type
+        if self.etag:
+            response.headers['ETag'] = self.etag
+        if self.last_modified:
+            response.headers['Last-Modified'] = self.last_modified
+        return response
+
+
+class ResponseCache:
+    """
+    Persistent HTTP response cache with content-addressed body storage.
+
+    Bodies are stored once per SHA-256 digest under ``bodies/`` and an SQLite
+    index maps each request (URL, query parameters and Accept header) to its
+    body and validators. Entries older than the TTL are revalidated with a
+    conditional GET. When the total body size exceeds the limit, the least
+    recently used entries are evicted.
+
+    Several processes may share a cache directory: bodies are written to
+    unique temporary files before being moved into place, and the total size
+    of the stored bodies is kept in the shared index (``cache_stats``),
+    updated in the same transaction as the entries.
+    """
+
+    def __init__(self, cache_dir: str, max_size_bytes: int, ttl_seconds: float, replay_only: bool = False):
+        """
+        Open or create a response cache.
+
+        Args:
+            cache_dir: Directory holding the index and the bodies.
+            max_size_bytes: Upper bound for the total size of stored bodies.
+            ttl_seconds: Age after which an entry must be revalidated.
+            replay_only: Serve only from the cache and never touch the network.
+        """
+        self.cache_dir = cache_dir
+        self.bodies_dir = os.path.join(cache_dir, 'bodies')
+        self.max_size_bytes = max_size_bytes
+        self.ttl_seconds = ttl_seconds
+        self.replay_only = replay_only
+        self._lock = threading.Lock()
+
+        os.makedirs(self.bodies_dir, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite'), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                cache_key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                content_type TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_accessed_at REAL NOT NULL
+            )
+        ''')
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_last_accessed ON cache_entries (last_accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_content_hash ON cache_entries (content_hash)")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_stats (
+                id INTEGER PRIMARY KEY CHECK(id = 1),
+                stored_size INTEGER NOT NULL    -- Bytes of the distinct bodies referenced by cache_entries
+            )
+        ''')
+        self._conn.commit()
+        if self._conn.execute("SELECT 1 FROM cache_stats").fetchone() is None:
+            # Indexes created before cache_stats existed are summed once
+            self._conn.execute(
+                "INSERT OR IGNORE INTO cache_stats (id, stored_size) "
+                "SELECT 1, COALESCE(SUM(size), 0) FROM (SELECT DISTINCT content_hash, size FROM cache_entries)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(url: str, params: dict | None, accept: str) -> str:
+        """
+        Build the cache key for a request.
+
+        Args:
+            url: Request URL without query parameters.
+            params: Query parameters, if any.
+            accept: Accept header of the request.
+
+        Returns:
+            str: Hex digest identifying the request.
+        """
+        query = urlencode(sorted((params or {}).items()))
+        return hashlib.sha256(f"{url}?{query}\n{accept}".encode('utf-8')).hexdigest()
+
+    def _body_path(self, content_hash: str) -> str:
+        return os.path.join(self.bodies_dir, content_hash[:2], content_hash)
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        """
+        Check whether an entry can be served without revalidation.
+
+        Args:
+            entry: The cached response.
+
+        Returns:
+            bool: True if the entry is younger than the TTL.
+        """
+        return time.time() - entry.fetched_at < self.ttl_seconds
+
+    def get(self, cache_key: str) -> CachedResponse | None:
+        """
+        Look up a cached response and mark it as recently used.
+
+        Args:
+            cache_key: Key from make_key().
+
+        Returns:
+            CachedResponse | None: The entry, or None if it is not cached.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, content_hash, size, content_type, etag, last_modified, fetched_at "
+                "FROM cache_entries WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if row is None:
+                return None
+            url, content_hash, size, content_type, etag, last_modified, fetched_at = row
+            try:
+                with open(self._body_path(content_hash), 'rb') as f:
+                    body = f.read()
+            except FileNotFoundError:
+                logging.warning(f"Cache body {content_hash} is missing; dropping entry for {url}")
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._conn.execute("DELETE FROM cache_entries WHERE cache_key = ?", (cache_key,))
+                self._release_body(content_hash, size)
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE cache_entries SET last_accessed_at = ? WHERE cache_key = ?", (time.time(), cache_key)
+            )
+            self._conn.commit()
+        return CachedResponse(cache_key, url, body, content_type, etag, last_modified, fetched_at)
+
+    def put(self, cache_key: str, url: str, response: requests.Response):
+        """
+        Store a successful response.
+
+        Args:
+            cache_key: Key from make_key().
+            url: Request URL.
+            response: The 200 response to store.
+        """
+        body = response.content
+        content_hash = hashlib.sha256(body).hexdigest()
+        now = time.time()
+        with self._lock:
+            body_path = self._body_path(content_hash)
+            if not os.path.exists(body_path):
+                os.makedirs(os.path.dirname(body_path), exist_ok=True)
+                # A unique name per writer: other threads or crawl processes may store the same body
+                fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(body_path), suffix='.tmp')
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(body)
+                os.replace(temp_path, body_path)
+
+            # Other processes write to the same index; take the write lock before reading what to count
+            self._conn.execute("BEGIN IMMEDIATE")
+            previous = self._conn.execute(
+                "SELECT content_hash, size FROM cache_entries WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            body_indexed = self._conn.execute(
+                "SELECT 1 FROM cache_entries WHERE content_hash = ? LIMIT 1", (content_hash,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (cache_key, url, content_hash, size, content_type, "
+                "etag, last_modified, fetched_at, last_accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (cache_key, url, content_hash, len(body), response.headers.get('Content-Type'),
+                 response.headers.get('ETag'), response.headers.get('Last-Modified'), now, now)
+            )
+            if not body_indexed:
+                self._add_stored_size(len(body))
+            if previous and previous[0] != content_hash:
+                self._release_body(*previous)
+            self._evict()
+            self._conn.commit()
+
+    def mark_revalidated(self, entry: CachedResponse, response: requests.Response):
+        """
+        Record a 304 Not Modified answer for an entry.
+
+        Args:
+            entry: The revalidated entry.
+            response: The 304 response, whose validators replace the stored ones if present.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE cache_entries SET fetched_at = ?, etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified) WHERE cache_key = ?",
+                (time.time(), response.headers.get('ETag'), response.headers.get('Last-Modified'), entry.cache_key)
+            )
+            self._conn.commit()
+
+    def _add_stored_size(self, size: int):
+        self._conn.execute("UPDATE cache_stats SET stored_size = stored_size + ?", (size,))
+
+    def _stored_size(self) -> int:
+        """Total size of the bodies referenced by the index, including entries written by other processes."""
+        return self._conn.execute("SELECT stored_size FROM cache_stats").fetchone()[0]
+
+    def _release_body(self, content_hash: str, size: int):
+        """Delete a body file once no entry references it. Must be called with the lock held, in a transaction."""
+        still_used = self._conn.execute(
+            "SELECT 1 FROM cache_entries WHERE content_hash = ? LIMIT 1", (content_hash,)
+        ).fetchone()
+        if still_used:
+            return
+        self._add_stored_size(-size)
+        body_path = self._body_path(content_hash)
+        try:
+            os.remove(body_path)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """Evict least recently used entries until the size limit holds. Must be called in a transaction."""
+        excess = self._stored_size() - self.max_size_bytes
+        while excess > 0:
+            # Read the oldest entries from the index until their sizes cover the excess
+            victims = []
+            freed = 0
+            for row in self._conn.execute(
+                    "SELECT cache_key, content_hash, size FROM cache_entries ORDER BY last_accessed_at"):
+                victims.append(row)
+                freed += row[2]
+                if freed >= excess:
+                    break
+            if not victims:
+                break
+            self._conn.executemany("DELETE FROM cache_entries WHERE cache_key = ?",
+                                   [(cache_key,) for cache_key, _, _ in victims])
+            for content_hash, size in {(content_hash, size) for _, content_hash, size in victims}:
+                self._release_body(content_hash, size)
+            # Bodies still referenced by newer entries free nothing; evict further in that case
+            excess = self._stored_size() - self.max_size_bytes
+
+    @property
+    def total_size(self) -> int:
+        """Total size in bytes of the stored bodies."""
+        with self._lock:
+            return self._stored_size()
+
+    def close(self):
+        """Close the cache index."""
+        with self._lock:
+            self._conn.close()
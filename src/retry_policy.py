@@ -0,0 +1,197 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+
+# 408 Request Timeout, 425 Too Early, 429 Too Many Requests and the 5xx codes
+# that signal an overloaded or restarting server are worth retrying; any other
+# status is permanent for the request (e.g. 404 for a missing document format).
+RETRYABLE_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+RETRYABLE_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+
+def parse_retry_after(value) -> float | None:
+    """
+    Parse a Retry-After header value.
+
+    Args:
+        value: The header value: a number of seconds or an HTTP date.
+
+    Returns:
+        float | None: Seconds to wait, or None if the value is missing or invalid.
+    """
+    if not isinstance(value, str) or not value.strip():
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy:
+    """
+    Decides which failed requests are retried and how long to wait in between.
+
+    Waits grow exponentially with the attempt number and use full jitter, so
+    workers that failed together do not retry together. A Retry-After header
+    sent by the server is honoured as the minimum wait.
+    """
+
+    def __init__(self, max_attempts: int = 5, backoff_base: float = 1.0, backoff_max: float = 60.0):
+        """
+        Create a retry policy.
+
+        Args:
+            max_attempts: Total number of attempts per request, including the first one.
+            backoff_base: Upper bound of the wait before the first retry, in seconds.
+            backoff_max: Cap on the exponential wait, in seconds.
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    @staticmethod
+    def is_retryable_status(status_code) -> bool:
+        """Return True if a response with this status code should be retried."""
+        return status_code in RETRYABLE_STATUS_CODES
+
+    @staticmethod
+    def is_retryable_exception(error: Exception) -> bool:
+        """Return True if a request that raised this error should be retried."""
+        return isinstance(error, RETRYABLE_EXCEPTIONS)
+
+    def backoff_seconds(self, attempt: int, retry_after: float | None = None) -> float:
+        """
+        Return how long to wait before the next attempt.
+
+        Args:
+            attempt: Number of the attempt that just failed, starting at 1.
+            retry_after: Wait requested by the server, if any.
+
+        Returns:
+            float: Seconds to wait.
+        """
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        wait_seconds = random.uniform(0, ceiling)
+        if retry_after is not None:
+            wait_seconds = max(wait_seconds, retry_after)
+        return wait_seconds
+
+    def sleep(self, seconds: float):
+        """Sleep between attempts."""
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class CircuitBreaker:
+    """
+    Thread-safe breaker that pauses every worker while the server is degraded.
+
+    After ``failure_threshold`` consecutive failed requests, across all threads,
+    the breaker opens and every request waits for ``cooldown_seconds``. The
+    breaker then turns half-open: a single request is let through as a probe
+    while the others keep waiting. If the probe fails, the breaker opens again;
+    if it succeeds, the breaker closes and the waiting requests proceed. A probe
+    that reports nothing within ``probe_timeout_seconds`` is given up and the
+    next waiting request probes instead. A server-sent Retry-After also pauses all
+    workers for the requested time.
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown_seconds: float = 30.0,
+                 probe_timeout_seconds: float | None = None):
+        """
+        Create a circuit breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the breaker. A value <= 0 disables it.
+            cooldown_seconds: How long the breaker stays open.
+            probe_timeout_seconds: How long other requests wait for the probe's outcome. Default: cooldown_seconds.
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.probe_timeout_seconds = cooldown_seconds if probe_timeout_seconds is None else probe_timeout_seconds
+        self.consecutive_failures = 0
+        self.times_opened = 0
+        self._open_until = 0.0
+        # Set while the breaker is open or half-open because of consecutive failures
+        self._tripped = False
+        # Thread sending the probe request, and when its probe is given up
+        self._probe_thread = None
+        self._probe_deadline = 0.0
+        self._condition = threading.Condition()
+
+    def record_success(self):
+        """Record a successful request, closing the breaker."""
+        with self._condition:
+            self.consecutive_failures = 0
+            if self._tripped:
+                self._tripped = False
+                self._probe_thread = None
+                self._condition.notify_all()
+
+    def record_failure(self, retry_after: float | None = None):
+        """
+        Record a failed request.
+
+        Args:
+            retry_after: Wait requested by the server; pauses all workers for that long.
+        """
+        with self._condition:
+            self.consecutive_failures += 1
+            now = time.monotonic()
+            if retry_after:
+                self._open_until = max(self._open_until, now + retry_after)
+            if 0 < self.failure_threshold <= self.consecutive_failures:
+                if self._open_until <= now:
+                    self.times_opened += 1
+                    logging.warning(f"Circuit breaker opened after {self.consecutive_failures} consecutive failures; "
+                                    f"pausing requests for {self.cooldown_seconds:.0f}s")
+                self._open_until = max(self._open_until, now + self.cooldown_seconds)
+                self._tripped = True
+            if self._probe_thread == threading.get_ident():
+                # The probe failed; the breaker is open again and the next probe follows the cooldown
+                self._probe_thread = None
+            self._condition.notify_all()
+
+    def is_open(self) -> bool:
+        """Return True while requests are paused."""
+        with self._condition:
+            return self._open_until > time.monotonic()
+
+    def wait(self) -> float:
+        """
+        Block while the breaker is open, and while another thread's probe is in flight.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        started_at = time.monotonic()
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                if self._open_until > now:
+                    self._condition.wait(self._open_until - now)
+                    continue
+                if not self._tripped or self._probe_thread == threading.get_ident():
+                    break
+                if self._probe_thread is None or self._probe_deadline <= now:
+                    # Half-open: this request is the probe
+                    self._probe_thread = threading.get_ident()
+                    self._probe_deadline = now + self.probe_timeout_seconds
+                    break
+                self._condition.wait(self._probe_deadline - now)
+        return time.monotonic() - started_at
@@ -1,10 +1,24 @@
 import requests
-import time
 import os
+import sys
 import json
 import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
+# Add the src directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from metrics import MetricsRegistry
+from rate_limiter import AdaptiveRateLimiter, TokenBucketRateLimiter
+from response_cache import CacheMissError, ResponseCache
+from retry_policy import CircuitBreaker, RetryPolicy, parse_retry_after
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -15,244 +29,692 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 API_BASE_URL = os.getenv('API_BASE_URL', "https://www.riigiteataja.ee/api/oigusakt_otsing/1/otsi")
 DEFAULT_REQUEST_DELAY_SECONDS = float(os.getenv('DEFAULT_REQUEST_DELAY_SECONDS', 2.0))
 USER_AGENT = os.getenv('USER_AGENT', "est-lawyer-data-retriever/0.1 (Non-commercial research project)")
-
-def fetch_acts_list(api_params: dict) -> dict | None:
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))
+HTTP_TIMEOUT_SECONDS = float(os.getenv('HTTP_TIMEOUT_SECONDS', 30))
+# Without an explicit rate, keep the politeness budget of the old fixed delay
+REQUESTS_PER_SECOND = float(os.getenv('REQUESTS_PER_SECOND', 1.0 / DEFAULT_REQUEST_DELAY_SECONDS if DEFAULT_REQUEST_DELAY_SECONDS > 0 else 0))
+RATE_LIMIT_BURST = int(os.getenv('RATE_LIMIT_BURST', 1))
+# 'adaptive' adjusts the rate between the floor and ceiling to the server's health (AIMD); 'fixed' keeps REQUESTS_PER_SECOND
+RATE_LIMIT_MODE = os.getenv('RATE_LIMIT_MODE', 'adaptive')
+RATE_LIMIT_FLOOR = float(os.getenv('RATE_LIMIT_FLOOR', 0.1))
+RATE_LIMIT_CEILING = float(os.getenv('RATE_LIMIT_CEILING', 2.0))
+RATE_INCREASE_STEP = float(os.getenv('RATE_INCREASE_STEP', 0.1))
+RATE_DECREASE_FACTOR = float(os.getenv('RATE_DECREASE_FACTOR', 0.5))
+RATE_LATENCY_TARGET_SECONDS = float(os.getenv('RATE_LATENCY_TARGET_SECONDS', 2.0))
+RATE_ADJUST_INTERVAL_SECONDS = float(os.getenv('RATE_ADJUST_INTERVAL_SECONDS', 5.0))
+# Retries of failed requests: total attempts and the exponential backoff bounds in seconds
+HTTP_MAX_ATTEMPTS = int(os.getenv('HTTP_MAX_ATTEMPTS', 5))
+RETRY_BACKOFF_BASE_SECONDS = float(os.getenv('RETRY_BACKOFF_BASE_SECONDS', 1.0))
+RETRY_BACKOFF_MAX_SECONDS = float(os.getenv('RETRY_BACKOFF_MAX_SECONDS', 60.0))
+# Consecutive failures after which all requests pause, and for how long
+CIRCUIT_BREAKER_THRESHOLD = int(os.getenv('CIRCUIT_BREAKER_THRESHOLD', 5))
+CIRCUIT_BREAKER_COOLDOWN_SECONDS = float(os.getenv('CIRCUIT_BREAKER_COOLDOWN_SECONDS', 30.0))
+# Threads fetching listing pages once the total number of results is known
+PAGE_FETCH_WORKERS = int(os.getenv('PAGE_FETCH_WORKERS', 4))
+
+JSON_ACCEPT_HEADER = 'application/json'
+DOCUMENT_ACCEPT_HEADER = 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
+
+
+def create_rate_limiter(mode: str = RATE_LIMIT_MODE, rate: float = REQUESTS_PER_SECOND,
+                        burst: int = RATE_LIMIT_BURST) -> TokenBucketRateLimiter:
     """
-    Fetch a list of legal acts from the API based on the provided parameters.
+    Create the rate limiter shared by all requests of a crawl.
 
-    Parameters:
-    - api_params (dict): A dictionary of query parameters to send to the API
-                         (e.g., {'leht': 1, 'limiit': 10, 'dokument': 'seadus', 'kehtiv': '2024-05-01'}).
+    Args:
+        mode: 'fixed' for a constant rate, or 'adaptive' to start at the given rate and
+              adjust it between RATE_LIMIT_FLOOR and RATE_LIMIT_CEILING.
+        rate: Requests per second; the starting rate in adaptive mode.
+        burst: Maximum number of requests that may be made back to back.
 
     Returns:
-    - dict | None: The parsed JSON response if successful, None otherwise.
+        TokenBucketRateLimiter: The limiter.
+
+    Raises:
+        ValueError: If the mode is unknown.
     """
-    # Ensure we have a delay between requests
-    time.sleep(DEFAULT_REQUEST_DELAY_SECONDS)
+    if mode == 'fixed':
+        return TokenBucketRateLimiter(rate, burst)
+    if mode == 'adaptive':
+        return AdaptiveRateLimiter(
+            rate, burst, floor=RATE_LIMIT_FLOOR, ceiling=RATE_LIMIT_CEILING,
+            increase_step=RATE_INCREASE_STEP, decrease_factor=RATE_DECREASE_FACTOR,
+            latency_target=RATE_LATENCY_TARGET_SECONDS, adjust_interval=RATE_ADJUST_INTERVAL_SECONDS
+        )
+    raise ValueError(f"Unknown rate limit mode '{mode}'. Supported: fixed, adaptive")
 
-    try:
-        # Construct the full request URL
-        request_url = f"{API_BASE_URL}"
 
-        # Log the request being made
-        logging.info(f"Making request to {request_url} with params: {json.dumps(api_params)}")
+class PageFetchError(requests.exceptions.RequestException):
+    """Raised when a listing page still cannot be fetched after all retries."""
 
-        # Set headers including User-Agent
-        headers = {
-            'User-Agent': USER_AGENT,
-            'Accept': 'application/json'
-        }
 
-        # Make the GET request to the API
-        response = requests.get(request_url, params=api_params, headers=headers, timeout=30)
+class RTApiClient:
+    """
+    Client for the Riigi Teataja API and document endpoints.
+
+    All requests go through a single pooled ``requests.Session`` so that TCP and
+    TLS connections to riigiteataja.ee are kept alive and reused across pages
+    and document formats instead of being re-established for every request.
+    Every request first takes a token from the client's rate limiter, which may
+    be shared between clients and worker threads. With a response cache, fresh
+    entries are served locally and stale ones are revalidated with conditional GETs.
+    Transient failures are retried with exponential backoff, and a circuit
+    breaker pauses all requests of the client while the server is degraded.
+    Requests, retries, latencies and downloaded bytes are recorded per endpoint
+    in the client's metrics registry.
+    """
+
+    def __init__(self, base_url: str | None = None, document_base_url: str | None = None,
+                 user_agent: str | None = None, pool_size: int | None = None,
+                 timeout: float | None = None,
+                 rate_limiter: TokenBucketRateLimiter | None = None,
+                 cache: ResponseCache | None = None, page_workers: int | None = None,
+                 retry_policy: RetryPolicy | None = None,
+                 circuit_breaker: CircuitBreaker | None = None,
+                 metrics: MetricsRegistry | None = None):
+        """
+        Create a client with its own connection pool.
+
+        Args:
+            base_url: Search API endpoint. Defaults to API_BASE_URL.
+            document_base_url: Base URL for relative document links. Defaults to
+                the RT_DOCUMENT_BASE_URL environment variable at request time.
+            user_agent: User-Agent header sent with every request. Defaults to USER_AGENT.
+            pool_size: Maximum number of pooled connections per host. Defaults to HTTP_POOL_SIZE.
+            timeout: Per-request timeout in seconds. Defaults to HTTP_TIMEOUT_SECONDS.
+            rate_limiter: Limiter applied to every request. Defaults to a new limiter
+                using REQUESTS_PER_SECOND and RATE_LIMIT_BURST.
+            cache: Optional on-disk response cache.
+            page_workers: Threads fetching listing pages concurrently. Defaults to PAGE_FETCH_WORKERS;
+                1 walks the pages one after another.
+            retry_policy: Retry policy for failed requests. Defaults to HTTP_MAX_ATTEMPTS
+                attempts with RETRY_BACKOFF_BASE_SECONDS/RETRY_BACKOFF_MAX_SECONDS backoff.
+            circuit_breaker: Breaker shared by all requests of this client. Defaults to
+                CIRCUIT_BREAKER_THRESHOLD and CIRCUIT_BREAKER_COOLDOWN_SECONDS.
+            metrics: Registry receiving the request metrics. Defaults to a new registry.
+        """
+        self.base_url = base_url or API_BASE_URL
+        self.document_base_url = document_base_url
+        self.user_agent = user_agent or USER_AGENT
+        self.pool_size = pool_size or HTTP_POOL_SIZE
+        self.timeout = timeout if timeout is not None else HTTP_TIMEOUT_SECONDS
+        self.rate_limiter = rate_limiter or TokenBucketRateLimiter(REQUESTS_PER_SECOND, RATE_LIMIT_BURST)
+        self.cache = cache
+        self.page_workers = max(1, page_workers if page_workers is not None else PAGE_FETCH_WORKERS)
+        self.retry_policy = retry_policy or RetryPolicy(HTTP_MAX_ATTEMPTS, RETRY_BACKOFF_BASE_SECONDS,
+                                                        RETRY_BACKOFF_MAX_SECONDS)
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(CIRCUIT_BREAKER_THRESHOLD,
+                                                                 CIRCUIT_BREAKER_COOLDOWN_SECONDS)
+        self.metrics = metrics or MetricsRegistry()
+        self.metrics.add_collector(self._collect_rate)
+        self.session = self._create_session()
+
+    def _collect_rate(self, registry: MetricsRegistry):
+        """Publish the rate limiter's current rate as a gauge."""
+        registry.set_gauge('rt_request_rate', self.rate_limiter.stats()['current_rate'])
+
+    def _create_session(self) -> requests.Session:
+        """
+        Build a keep-alive session with a connection pool sized for this client.
+
+        Returns:
+            requests.Session: The configured session.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'User-Agent': self.user_agent,
+            'Connection': 'keep-alive'
+        })
+        return session
+
+    def close(self):
+        """Close the session and release all pooled connections."""
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _get(self, url: str, accept: str, params: dict | None = None,
+             endpoint: str = 'document') -> requests.Response:
+        """
+        Perform a GET request, going through the response cache if one is configured.
+
+        Args:
+            url: Absolute URL to request.
+            accept: Value of the Accept header.
+            params: Optional query parameters.
+            endpoint: Name under which the request is recorded in the metrics.
+
+        Returns:
+            requests.Response: The HTTP response. Cache hits and successful
+                revalidations are returned as 200 responses with the cached body.
+
+        Raises:
+            CacheMissError: In replay-only mode, if the response is not cached.
+        """
+        if self.cache is None:
+            return self._send(url, accept, params, endpoint=endpoint)
+
+        cache_key = self.cache.make_key(url, params, accept)
+        entry = self.cache.get(cache_key)
+        if entry is not None and (self.cache.replay_only or self.cache.is_fresh(entry)):
+            self.metrics.inc('rt_http_cache_hits_total', endpoint=endpoint, result='fresh')
+            return entry.to_response()
+        if self.cache.replay_only:
+            raise CacheMissError(f"No cached response for {url} {params or ''}")
+
+        response = self._send(url, accept, params, extra_headers=entry.validator_headers() if entry else None,
+                              endpoint=endpoint)
+        if response.status_code == 304 and entry is not None:
+            self.cache.mark_revalidated(entry, response)
+            self.metrics.inc('rt_http_cache_hits_total', endpoint=endpoint, result='revalidated')
+            return entry.to_response()
+        if response.status_code == 200:
+            self.cache.put(cache_key, url, response)
+        return response
+
+    def _send(self, url: str, accept: str, params: dict | None = None,
+              extra_headers: dict | None = None, endpoint: str = 'document') -> requests.Response:
+        """
+        Perform a rate-limited GET request over the pooled session, with retries.
+
+        Connection errors, timeouts and retryable status codes (429, 5xx, ...)
+        are retried according to the client's retry policy, waiting at least
+        as long as a Retry-After header asks. Every failure is reported to the
+        circuit breaker, which pauses all requests while the server is degraded.
+
+        Args:
+            url: Absolute URL to request.
+            accept: Value of the Accept header.
+            params: Optional query parameters.
+            extra_headers: Optional additional request headers.
+            endpoint: Name under which the request is recorded in the metrics.
+
+        Returns:
+            requests.Response: The HTTP response; the last one if every attempt failed
+                with a retryable status.
+
+        Raises:
+            requests.exceptions.RequestException: If the last attempt failed with a
+                connection error or timeout, or on a non-retryable request error.
+        """
+        headers = {'Accept': accept}
+        if extra_headers:
+            headers.update(extra_headers)
+        request_kwargs = {'headers': headers, 'timeout': self.timeout}
+        if params is not None:
+            request_kwargs['params'] = params
+
+        attempt = 1
+        while True:
+            self.metrics.inc('rt_circuit_breaker_wait_seconds_total', self.circuit_breaker.wait())
+            self.metrics.inc('rt_rate_limit_wait_seconds_total', self.rate_limiter.acquire())
+            started_at = time.monotonic()
+            try:
+                response = self.session.get(url, **request_kwargs)
+            except requests.exceptions.RequestException as e:
+                latency = time.monotonic() - started_at
+                self.rate_limiter.record_response(latency, None)
+                self.metrics.inc('rt_http_requests_total', endpoint=endpoint, status='error')
+                self.metrics.observe('rt_http_request_duration_seconds', latency, endpoint=endpoint)
+                if not self.retry_policy.is_retryable_exception(e):
+                    raise
+                self.circuit_breaker.record_failure()
+                if attempt >= self.retry_policy.max_attempts:
+                    raise
+                wait_seconds = self.retry_policy.backoff_seconds(attempt)
+                logging.warning(f"Request to {url} failed ({str(e)}); retry {attempt}/{self.retry_policy.max_attempts - 1} "
+                                f"in {wait_seconds:.1f}s")
+            else:
+                latency = time.monotonic() - started_at
+                self.rate_limiter.record_response(latency, response.status_code)
+                self.metrics.inc('rt_http_requests_total', endpoint=endpoint, status=response.status_code)
+                self.metrics.observe('rt_http_request_duration_seconds', latency, endpoint=endpoint)
+                self.metrics.inc('rt_http_response_bytes_total', len(response.content), endpoint=endpoint)
+                if not self.retry_policy.is_retryable_status(response.status_code):
+                    self.circuit_breaker.record_success()
+                    return response
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                self.circuit_breaker.record_failure(retry_after)
+                if attempt >= self.retry_policy.max_attempts:
+                    # The caller sees the last error response, e.g. through raise_for_status()
+                    return response
+                wait_seconds = self.retry_policy.backoff_seconds(attempt, retry_after)
+                logging.warning(f"Request to {url} returned {response.status_code}; "
+                                f"retry {attempt}/{self.retry_policy.max_attempts - 1} in {wait_seconds:.1f}s")
+            self.metrics.inc('rt_http_retries_total', endpoint=endpoint)
+            self.retry_policy.sleep(wait_seconds)
+            attempt += 1
+
+    def _resolve_document_url(self, url: str) -> str:
+        """
+        Turn a possibly relative document link into an absolute URL.
+
+        Args:
+            url: Document link from the act metadata.
+
+        Returns:
+            str: Absolute URL.
+        """
+        if url.startswith('http'):
+            return url
+        document_base_url = self.document_base_url or os.getenv('RT_DOCUMENT_BASE_URL', 'https://www.riigiteataja.ee')
+        return f"{document_base_url}{url}"
+
+    @staticmethod
+    def _decode_body(response: requests.Response) -> str:
+        """
+        Decode a document response body as UTF-8.
+
+        Riigi Teataja serves documents in UTF-8 but does not always declare a
+        charset, so the raw bytes are decoded explicitly instead of relying on
+        the encoding guessed by requests.
+
+        Args:
+            response: The HTTP response.
+
+        Returns:
+            str: Decoded body.
+        """
+        return response.content.decode('utf-8', errors='replace')
+
+    def fetch_acts_list(self, api_params: dict) -> dict | None:
+        """
+        Fetch a list of legal acts from the API based on the provided parameters.
+
+        Args:
+            api_params: A dictionary of query parameters to send to the API
+                        (e.g., {'leht': 1, 'limiit': 10, 'dokument': 'seadus', 'kehtiv': '2024-05-01'}).
+
+        Returns:
+            dict | None: The parsed JSON response if successful, None otherwise.
+        """
+        try:
+            logging.info(f"Making request to {self.base_url} with params: {json.dumps(api_params)}")
 
-        # Check for HTTP errors
-        response.raise_for_status()
+            response = self._get(self.base_url, JSON_ACCEPT_HEADER, params=api_params, endpoint='search')
+            response.raise_for_status()
+            response_data = response.json()
 
-        # Parse the JSON response
-        response_data = response.json()
+            logging.info(f"Successfully fetched data for params: {json.dumps(api_params)}")
+            return response_data
 
-        # Log success
-        logging.info(f"Successfully fetched data for params: {json.dumps(api_params)}")
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Request failed: {str(e)}")
+        except json.JSONDecodeError as e:
+            logging.error(f"Error parsing JSON response: {str(e)}")
+        except Exception as e:
+            logging.error(f"An unexpected error occurred: {str(e)}")
+
+        return None
+
+    @staticmethod
+    def _total_results(page_data: dict) -> int | None:
+        """
+        Read the total number of results of a query from a listing response.
+
+        Args:
+            page_data: Parsed JSON of a listing page.
+
+        Returns:
+            int | None: The value of 'kokku' in 'metaandmed' (or at the top level), if present.
+        """
+        for container in (page_data.get('metaandmed'), page_data):
+            if not isinstance(container, dict):
+                continue
+            total = container.get('kokku')
+            if isinstance(total, int) or (isinstance(total, str) and total.isdigit()):
+                return int(total)
+        return None
+
+    def _fetch_page(self, initial_params: dict, page: int) -> dict | None:
+        """Fetch one listing page of a query."""
+        params_with_page = initial_params.copy()
+        params_with_page['leht'] = page
+        return self.fetch_acts_list(params_with_page)
 
-        # Return the parsed JSON
-        return response_data
+    def _fetch_pages_concurrently(self, initial_params: dict, pages: range) -> Iterator[tuple[int, dict | None]]:
+        """
+        Fetch listing pages on a pool of worker threads, yielding them in page order.
 
-    except requests.exceptions.RequestException as e:
-        # Log any request exceptions
-        logging.error(f"Request failed: {str(e)}")
-    except json.JSONDecodeError as e:
-        # Log JSON decoding errors
-        logging.error(f"Error parsing JSON response: {str(e)}")
-    except Exception as e:
-        # Log any other exceptions
-        logging.error(f"An unexpected error occurred: {str(e)}")
+        At most ``2 * page_workers`` pages are requested ahead of the consumer,
+        and pages not yet started are cancelled when the consumer stops.
 
-    # Return None if there was an error
-    return None
+        Args:
+            initial_params: Query parameters without 'leht'.
+            pages: Page numbers to fetch.
+
+        Yields:
+            tuple[int, dict | None]: The page number and its parsed JSON (None on failure).
+        """
+        executor = ThreadPoolExecutor(max_workers=self.page_workers, thread_name_prefix='pages')
+        page_numbers = iter(pages)
+        pending = deque()
+
+        def submit_next():
+            page = next(page_numbers, None)
+            if page is not None:
+                pending.append((page, executor.submit(self._fetch_page, initial_params, page)))
+
+        try:
+            for _ in range(self.page_workers * 2):
+                submit_next()
+            while pending:
+                page, future = pending.popleft()
+                page_data = future.result()
+                submit_next()
+                self.metrics.set_gauge('rt_queue_depth', len(pending), queue='pages')
+                yield page, page_data
+        finally:
+            self.metrics.set_gauge('rt_queue_depth', 0, queue='pages')
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def iter_pages(self, initial_params: dict, max_pages: int | None = None,
+                   start_page: int = 1) -> Iterator[tuple[int, list[dict]]]:
+        """
+        Yield the listing pages of a query in page order.
+
+        The first page is fetched on its own. If it reports the total number of
+        results ('kokku'), the remaining pages are fetched concurrently on
+        ``page_workers`` threads under the client's rate limiter; otherwise
+        pages are requested one after another until a short page is returned.
+
+        Args:
+            initial_params: The initial set of query parameters
+                            (e.g., {'dokument': 'seadus', 'kehtiv': 'YYYY-MM-DD', 'limiit': 100}).
+                            Do not include 'leht' (page number) in this parameter.
+            max_pages: Optional. Number of the last page to fetch. If None, fetch all pages.
+            start_page: Page to start from, e.g. to resume an interrupted crawl.
+
+        Yields:
+            tuple[int, list[dict]]: The page number and the acts on that page.
+
+        Raises:
+            PageFetchError: If a page cannot be fetched even after retries.
+        """
+        limit = initial_params.get('limiit', 100)
+        total_acts = 0
+        next_page = start_page
+        concurrent_pages = None
+
+        while True:
+            if max_pages is not None and next_page > max_pages:
+                logging.info(f"Reached max_pages limit ({max_pages}). Stopping pagination.")
+                return
+
+            if concurrent_pages is not None:
+                try:
+                    current_page, page_data = next(concurrent_pages)
+                except StopIteration:
+                    # The count may have grown since the first page; keep walking until a short page
+                    concurrent_pages = None
+                    continue
+            else:
+                current_page = next_page
+                page_data = self._fetch_page(initial_params, current_page)
+            next_page = current_page + 1
+
+            if page_data is None:
+                # Stopping here would silently truncate the results
+                raise PageFetchError(f"Page {current_page} could not be fetched; "
+                                     f"{total_acts} acts were retrieved before it")
+
+            # Based on the API response structure, the acts are under the 'aktid' key
+            acts_on_page = page_data.get('aktid', [])
+
+            if not acts_on_page:
+                logging.info(f"No more results found after page {current_page}. Total acts retrieved: {total_acts}")
+                return
+
+            total_acts += len(acts_on_page)
+            logging.info(f"Page {current_page}: Retrieved {len(acts_on_page)} acts. Total: {total_acts}")
+
+            yield current_page, acts_on_page
+
+            # If the number of results is less than the limit, it's likely the last page
+            if len(acts_on_page) < limit:
+                logging.info(f"Page {current_page} returned fewer results than the limit, assuming last page.")
+                return
+
+            if current_page == start_page and self.page_workers > 1:
+                total_results = self._total_results(page_data)
+                if total_results is not None:
+                    last_page = -(-total_results // limit)
+                    if max_pages is not None:
+                        last_page = min(last_page, max_pages)
+                    logging.info(f"Query has {total_results} results; fetching pages {next_page}-{last_page} "
+                                 f"on {self.page_workers} workers")
+                    concurrent_pages = self._fetch_pages_concurrently(initial_params, range(next_page, last_page + 1))
+
+    def iter_acts(self, initial_params: dict, max_pages: int | None = None) -> Iterator[dict]:
+        """
+        Yield legal acts for a query in page order.
+
+        Only a bounded number of pages is held in memory at a time, and no
+        further pages are requested once the caller stops consuming the generator.
+
+        Args:
+            initial_params: The initial set of query parameters
+                            (e.g., {'dokument': 'seadus', 'kehtiv': 'YYYY-MM-DD', 'limiit': 100}).
+                            Do not include 'leht' (page number) in this parameter.
+            max_pages: Optional. Maximum number of pages to fetch. If None, fetch all pages.
+
+        Yields:
+            dict: Metadata of a single act.
+        """
+        for _, acts_on_page in self.iter_pages(initial_params, max_pages=max_pages):
+            yield from acts_on_page
+
+    def get_all_acts_for_query(self, initial_params: dict, max_pages: int | None = None) -> list[dict]:
+        """
+        Retrieve all legal acts for a given query by handling pagination.
+
+        Prefer iter_acts() for large result sets; this collects every page into one list.
+
+        Args:
+            initial_params: The initial set of query parameters. Do not include 'leht' (page number).
+            max_pages: Optional. Maximum number of pages to fetch. If None, fetch all pages.
+
+        Returns:
+            list[dict]: A list of all retrieved act metadata.
+        """
+        return list(self.iter_acts(initial_params, max_pages=max_pages))
+
+    def get_full_document_text(self, act_metadata: dict) -> tuple[str | None, str | None]:
+        """
+        Retrieve the full text of a legal act, either in plain text or XML format.
+
+        Args:
+            act_metadata: A dictionary representing a single act's metadata,
+                          as retrieved from get_all_acts_for_query().
+                          This dictionary should contain URLs for the document in various formats.
+
+        Returns:
+            tuple[str | None, str | None]: A tuple containing (plain_text, xml_text).
+                                           Returns (None, None) if URLs are not available or retrieval fails.
+        """
+        act_id = act_metadata.get('globaalID', 'unknown')
+        act_title = act_metadata.get('pealkiri', 'untitled')
+
+        plain_text_content = None
+        xml_content = None
+
+        logging.info(f"Starting full text retrieval for act ID {act_id} ('{act_title}')")
+
+        # Try to fetch plain text content first (from dokumentTekst URL)
+        try:
+            text_url = act_metadata.get('dokumentTekst')
+            if text_url:
+                full_text_url = self._resolve_document_url(text_url)
+                logging.info(f"Attempting to fetch plain text from: {full_text_url}")
+
+                response = self._get(full_text_url, DOCUMENT_ACCEPT_HEADER, endpoint='text')
+                response.raise_for_status()
+
+                plain_text_content = self._decode_body(response)
+                logging.info(f"Successfully retrieved plain text for act ID {act_id}")
+            else:
+                logging.info(f"No plain text URL (dokumentTekst) found for act ID {act_id}")
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Error fetching plain text for act ID {act_id}: {str(e)}")
+        except Exception as e:
+            logging.error(f"Unexpected error fetching plain text for act ID {act_id}: {str(e)}")
+
+        # If no plain text was retrieved, try HTML content (from dokumentHtml URL)
+        if plain_text_content is None:
+            try:
+                html_url = act_metadata.get('dokumentHtml')
+                if html_url:
+                    full_html_url = self._resolve_document_url(html_url)
+                    logging.info(f"Attempting to fetch HTML content from: {full_html_url}")
+
+                    response = self._get(full_html_url, DOCUMENT_ACCEPT_HEADER, endpoint='html')
+
+                    if response.status_code < 400:
+                        plain_text_content = self._decode_body(response)
+                        logging.info(f"Successfully retrieved HTML content for act ID {act_id}")
+                    else:
+                        logging.warning(f"HTML content retrieval failed with status code {response.status_code} for act ID {act_id}")
+                else:
+                    logging.info(f"No HTML URL (dokumentHtml) found for act ID {act_id}")
+            except requests.exceptions.RequestException as e:
+                logging.error(f"Error fetching HTML content for act ID {act_id}: {str(e)}")
+            except Exception as e:
+                logging.error(f"Unexpected error fetching HTML content for act ID {act_id}: {str(e)}")
+
+        # Try to fetch XML content (from dokumentXML URL, then from 'url' field)
+        xml_url = act_metadata.get('dokumentXML')
+        if not xml_url:
+            xml_url = act_metadata.get('url')
+            if xml_url:
+                logging.info(f"Using fallback 'url' field for XML content for act ID {act_id}")
+
+        if xml_url:
+            full_xml_url = self._resolve_document_url(xml_url)
+            logging.info(f"Attempting to fetch XML content from: {full_xml_url}")
+
+            try:
+                response = self._get(full_xml_url, DOCUMENT_ACCEPT_HEADER, endpoint='xml')
+                response.raise_for_status()
+
+                xml_content = self._decode_body(response)
+                logging.info(f"Successfully retrieved XML content for act ID {act_id}")
+            except requests.exceptions.RequestException as e:
+                logging.error(f"Error fetching XML content for act ID {act_id}: {str(e)}")
+            except Exception as e:
+                logging.error(f"Unexpected error fetching XML content for act ID {act_id}: {str(e)}")
+        else:
+            logging.info(f"No XML URL found for act ID {act_id}")
+
+        text_type = "HTML" if plain_text_content and "html" in plain_text_content.lower() else "Plain text"
+        logging.info(f"Retrieval complete for act ID {act_id}: {text_type}={plain_text_content is not None}, XML={xml_content is not None}")
+
+        return plain_text_content, xml_content
 
-def get_all_acts_for_query(initial_params: dict, max_pages: int | None = None) -> list[dict]:
-    """
-    Retrieve all legal acts for a given query by handling pagination.
 
-    Parameters:
-    - initial_params (dict): The initial set of query parameters
-                             (e.g., {'dokument': 'seadus', 'kehtiv': 'YYYY-MM-DD', 'limiit': 100}).
-                             Do not include 'leht' (page number) in this parameter.
-    - max_pages (int | None): Optional. Maximum number of pages to fetch. If None, fetch all pages.
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> RTApiClient:
+    """
+    Return the shared module-level client, creating it on first use.
 
     Returns:
-    - list[dict]: A list of all retrieved act metadata.
+        RTApiClient: The shared client.
     """
-    # Initialize list to store all acts
-    all_acts = []
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = RTApiClient()
+        return _default_client
 
-    # Start with the first page
-    current_page = 1
 
-    # Loop to handle pagination
-    while True:
-        # Check if we've reached the max_pages limit
-        if max_pages is not None and current_page > max_pages:
-            logging.info(f"Reached max_pages limit ({max_pages}). Stopping pagination.")
-            break
+def set_default_client(client: RTApiClient | None):
+    """
+    Replace the shared module-level client used by the wrapper functions.
 
-        # Create a copy of initial_params and add/update the 'leht' parameter
-        params_with_page = initial_params.copy()
-        params_with_page['leht'] = current_page
+    Args:
+        client: The client to use, or None to create a fresh default on next use.
+    """
+    global _default_client
+    with _default_client_lock:
+        _default_client = client
 
-        # Fetch acts for the current page
-        page_data = fetch_acts_list(params_with_page)
 
-        # If fetch failed, log the issue and return what we've got so far
-        if page_data is None:
-            logging.warning(f"No data returned for page {current_page}. Stopping pagination.")
-            break
+def fetch_acts_list(api_params: dict) -> dict | None:
+    """
+    Fetch a list of legal acts using the shared client.
 
-        # Extract the list of acts from the response
-        # Based on the API response structure, the acts are under the 'aktid' key
-        acts_on_page = page_data.get('aktid', [])
+    Args:
+        api_params: Query parameters to send to the API.
 
-        # If no acts are returned, we've reached the end
-        if not acts_on_page:
-            logging.info(f"No more results found after page {current_page}. Total acts retrieved: {len(all_acts)}")
-            break
+    Returns:
+        dict | None: The parsed JSON response if successful, None otherwise.
+    """
+    return get_default_client().fetch_acts_list(api_params)
 
-        # Add the acts from this page to our total list
-        all_acts.extend(acts_on_page)
 
-        # Log progress
-        logging.info(f"Page {current_page}: Retrieved {len(acts_on_page)} acts. Total: {len(all_acts)}")
+def iter_pages(initial_params: dict, max_pages: int | None = None,
+               start_page: int = 1) -> Iterator[tuple[int, list[dict]]]:
+    """
+    Yield the listing pages of a query in page order using the shared client.
 
-        # Increment the page number
-        current_page += 1
+    Args:
+        initial_params: Query parameters without 'leht' (page number).
+        max_pages: Optional. Number of the last page to fetch.
+        start_page: Page to start from.
 
-        # Optional: Check if we've reached the last page
-        # This depends on the API's response structure
-        # For example, if the number of results is less than the limit, it's likely the last page
-        limit = params_with_page.get('limiit', 100)
-        if len(acts_on_page) < limit:
-            logging.info(f"Page {current_page - 1} returned fewer results than the limit, assuming last page.")
-            break
+    Yields:
+        tuple[int, list[dict]]: The page number and the acts on that page.
+    """
+    yield from get_default_client().iter_pages(initial_params, max_pages=max_pages, start_page=start_page)
 
-    # Return all retrieved acts
-    return all_acts
 
-def get_full_document_text(act_metadata: dict) -> tuple[str | None, str | None]:
+def iter_acts(initial_params: dict, max_pages: int | None = None) -> Iterator[dict]:
     """
-    Retrieve the full text of a legal act, either in plain text or XML format.
+    Yield legal acts for a query page by page using the shared client.
 
-    Parameters:
-    - act_metadata (dict): A dictionary representing a single act's metadata,
-                           as retrieved from get_all_acts_for_query().
-                           This dictionary should contain URLs for the document in various formats.
+    Args:
+        initial_params: Query parameters without 'leht' (page number).
+        max_pages: Optional. Maximum number of pages to fetch.
 
-    Returns:
-    - tuple[str | None, str | None]: A tuple containing (plain_text, xml_text).
-                                     Returns (None, None) if URLs are not available or retrieval fails.
+    Yields:
+        dict: Metadata of a single act.
     """
-    # Ensure we have a delay between requests
-    time.sleep(DEFAULT_REQUEST_DELAY_SECONDS)
-
-    # Get the act ID or title for logging purposes
-    act_id = act_metadata.get('globaalID', 'unknown')
-    act_title = act_metadata.get('pealkiri', 'untitled')
-
-    # Load the document base URL from environment variables
-    document_base_url = os.getenv('RT_DOCUMENT_BASE_URL', 'https://www.riigiteataja.ee')
-
-    # Initialize content variables
-    plain_text_content = None
-    xml_content = None
-
-    # Set up headers for requests
-    headers = {
-        'User-Agent': USER_AGENT,
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
-    }
-
-    # Log the start of document retrieval
-    logging.info(f"Starting full text retrieval for act ID {act_id} ('{act_title}')")
-
-    # Try to fetch plain text content first (from dokumentTekst URL)
-    try:
-        text_url = act_metadata.get('dokumentTekst')
-        if text_url:
-            # Construct full URL if it's relative
-            full_text_url = text_url if text_url.startswith('http') else f"{document_base_url}{text_url}"
-            logging.info(f"Attempting to fetch plain text from: {full_text_url}")
-
-            # Make the request
-            response = requests.get(full_text_url, headers=headers, timeout=30)
-            response.raise_for_status()
+    yield from get_default_client().iter_acts(initial_params, max_pages=max_pages)
 
-            # Store the content
-            plain_text_content = response.content.decode('utf-8', errors='replace')
-            logging.info(f"Successfully retrieved plain text for act ID {act_id}")
-        else:
-            logging.info(f"No plain text URL (dokumentTekst) found for act ID {act_id}")
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Error fetching plain text for act ID {act_id}: {str(e)}")
-    except Exception as e:
-        logging.error(f"Unexpected error fetching plain text for act ID {act_id}: {str(e)}")
-
-    # If no plain text was retrieved, try HTML content (from dokumentHtml URL)
-    if plain_text_content is None:
-        try:
-            html_url = act_metadata.get('dokumentHtml')
-            if html_url:
-                # Construct full URL if it's relative
-                full_html_url = html_url if html_url.startswith('http') else f"{document_base_url}{html_url}"
-                logging.info(f"Attempting to fetch HTML content from: {full_html_url}")
-
-                # Make the request
-                response = requests.get(full_html_url, headers=headers, timeout=30)
-
-                # Check if we got a successful response (status code < 400)
-                if response.status_code < 400:
-                    # Store the content
-                    plain_text_content = response.text
-                    logging.info(f"Successfully retrieved HTML content for act ID {act_id}")
-                else:
-                    logging.warning(f"HTML content retrieval failed with status code {response.status_code} for act ID {act_id}")
-            else:
-                logging.info(f"No HTML URL (dokumentHtml) found for act ID {act_id}")
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Error fetching HTML content for act ID {act_id}: {str(e)}")
-        except Exception as e:
-            logging.error(f"Unexpected error fetching HTML content for act ID {act_id}: {str(e)}")
 
-    # Try to fetch XML content (from dokumentXML URL, then from 'url' field)
-    xml_url = act_metadata.get('dokumentXML')
-    if not xml_url:
-        # Fall back to the 'url' field if present
-        xml_url = act_metadata.get('url')
-        if xml_url:
-            logging.info(f"Using fallback 'url' field for XML content for act ID {act_id}")
+def get_all_acts_for_query(initial_params: dict, max_pages: int | None = None) -> list[dict]:
+    """
+    Retrieve all legal acts for a query using the shared client.
 
-    if xml_url:
-        # Construct full URL if it's relative
-        full_xml_url = xml_url if xml_url.startswith('http') else f"{document_base_url}{xml_url}"
-        logging.info(f"Attempting to fetch XML content from: {full_xml_url}")
+    Args:
+        initial_params: Query parameters without 'leht' (page number).
+        max_pages: Optional. Maximum number of pages to fetch.
 
-        try:
-            # Make the request
-            response = requests.get(full_xml_url, headers=headers, timeout=30)
-            response.raise_for_status()
+    Returns:
+        list[dict]: A list of all retrieved act metadata.
+    """
+    return get_default_client().get_all_acts_for_query(initial_params, max_pages=max_pages)
 
-            # Store the content
-            xml_content = response.text
-            logging.info(f"Successfully retrieved XML content for act ID {act_id}")
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Error fetching XML content for act ID {act_id}: {str(e)}")
-        except Exception as e:
-            logging.error(f"Unexpected error fetching XML content for act ID {act_id}: {str(e)}")
-    else:
-        logging.info(f"No XML URL found for act ID {act_id}")
 
-    # Log the result of the retrieval
-    text_type = "HTML" if plain_text_content and "html" in plain_text_content.lower() else "Plain text"
-    logging.info(f"Retrieval complete for act ID {act_id}: {text_type}={plain_text_content is not None}, XML={xml_content is not None}")
+def get_full_document_text(act_metadata: dict) -> tuple[str | None, str | None]:
+    """
+    Retrieve the full text of a legal act using the shared client.
+
+    Args:
+        act_metadata: A single act's metadata from the search API.
 
-    # Return the retrieved content
-    return plain_text_content, xml_content
\ No newline at end of file
+    Returns:
+        tuple[str | None, str | None]: A tuple containing (plain_text, xml_text).
+    """
+    return get_default_client().get_full_document_text(act_metadata)
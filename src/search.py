@@ -0,0 +1,161 @@
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+from dotenv import load_dotenv
+
+# Add the src directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_setup import get_db_path, initialize_database
+from document_blobs import iter_text_batches
+
+# Title matches weigh more than body matches in the bm25 ranking
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+SNIPPET_TOKENS = 16
+
+
+def build_match_query(query: str) -> str:
+    """
+    Turn free text into an FTS5 query that matches documents containing every word.
+
+    Words are quoted so that characters with a meaning in the FTS5 query syntax
+    (e.g. '-', ':', '§') cannot break the query. A trailing '*' on a word is kept
+    as a prefix search, so 'võlaõigus*' matches 'võlaõigusseadus'.
+
+    Args:
+        query: Free-text search query.
+
+    Returns:
+        str: FTS5 MATCH expression.
+    """
+    terms = []
+    for word in query.split():
+        prefix = word.endswith('*')
+        word = re.sub(r'[^\w]', ' ', word).strip()
+        for part in word.split():
+            terms.append(f'"{part}"')
+        if prefix and terms:
+            terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def index_documents(conn: sqlite3.Connection, documents):
+    """
+    Add or replace documents in the full-text search index.
+
+    Args:
+        conn: Open database connection.
+        documents: Iterable of (full_text_id, title, plain_text) tuples.
+    """
+    conn.executemany(
+        "INSERT OR REPLACE INTO legal_documents_fts (rowid, title, body) VALUES (?, ?, ?)",
+        ((full_text_id, title, plain_text or '') for full_text_id, title, plain_text in documents)
+    )
+
+
+def rebuild_search_index(conn: sqlite3.Connection, batch_size: int = 200) -> int:
+    """
+    Rebuild the full-text search index from the stored documents.
+
+    Args:
+        conn: Open database connection.
+        batch_size: Number of documents decoded and indexed at a time.
+
+    Returns:
+        int: Number of documents indexed.
+    """
+    conn.execute("DELETE FROM legal_documents_fts")
+    indexed = 0
+    for batch in iter_text_batches(conn, ('text_content_plain',), batch_size):
+        index_documents(conn, ((full_text_id, title, texts['text_content_plain'])
+                               for full_text_id, title, texts in batch))
+        indexed += len(batch)
+    return indexed
+
+
+def search(conn: sqlite3.Connection, query: str, limit: int = 20, document_type: str | None = None,
+           raw_query: bool = False) -> list[dict]:
+    """
+    Search titles and texts, returning bm25-ranked hits with snippets.
+
+    Args:
+        conn: Open database connection.
+        query: Search words, or an FTS5 query if raw_query is True.
+        limit: Maximum number of hits.
+        document_type: Optional document type filter (e.g. 'seadus').
+        raw_query: Pass the query to FTS5 unchanged (allows OR, NEAR, column filters, ...).
+
+    Returns:
+        list[dict]: Hits ordered from best to worst, with full_text_id, title,
+                    document_type, status, source_url, score and snippet.
+    """
+    match_query = query if raw_query else build_match_query(query)
+    if not match_query:
+        return []
+    rows = conn.execute(
+        f'''
+        SELECT d.full_text_id, d.title, d.document_type, d.status, d.source_url,
+               bm25(legal_documents_fts, {TITLE_WEIGHT}, {BODY_WEIGHT}) AS score,
+               snippet(legal_documents_fts, -1, '[', ']', '…', {SNIPPET_TOKENS}) AS snippet
+        FROM legal_documents_fts
+        JOIN legal_documents d ON d.full_text_id = legal_documents_fts.rowid
+        WHERE legal_documents_fts MATCH ? AND (? IS NULL OR d.document_type = ?)
+        ORDER BY score
+        LIMIT ?
+        ''',
+        (match_query, document_type, document_type, limit)
+    ).fetchall()
+    columns = ('full_text_id', 'title', 'document_type', 'status', 'source_url', 'score', 'snippet')
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def main():
+    """Command-line entry point for searching the stored documents."""
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Full-text search over the stored legal documents.")
+    parser.add_argument("query", nargs='?', help="Search words, e.g. 'töölepingu ülesütlemine'. A trailing * searches by prefix.")
+    parser.add_argument("--limit", type=int, default=20, help="Maximum number of hits. Default: 20.")
+    parser.add_argument("--document-type", type=str, default=None, help="Optional. Only return documents of this type.")
+    parser.add_argument("--raw", action="store_true", help="Treat the query as FTS5 query syntax.")
+    parser.add_argument("--json", action="store_true", help="Print the hits as JSON.")
+    parser.add_argument("--rebuild-index", action="store_true", help="Rebuild the search index from the stored documents.")
+    args = parser.parse_args()
+
+    initialize_database()
+    _, database_path = get_db_path()
+    conn = sqlite3.connect(database_path)
+    try:
+        if args.rebuild_index:
+            with conn:
+                indexed = rebuild_search_index(conn)
+            logging.info(f"Indexed {indexed} documents")
+        if not args.query:
+            if not args.rebuild_index:
+                parser.error("a search query is required")
+            return
+
+        hits = search(conn, args.query, limit=args.limit, document_type=args.document_type, raw_query=args.raw)
+    finally:
+        conn.close()
+
+    if args.json:
+        print(json.dumps(hits, ensure_ascii=False, indent=2))
+        return
+    for rank, hit in enumerate(hits, start=1):
+        print(f"{rank}. {hit['title']} ({hit['document_type']}, {hit['status']}) - full_text_id={hit['full_text_id']}")
+        print(f"   {hit['snippet']}")
+        if hit['source_url']:
+            print(f"   {hit['source_url']}")
+    if not hits:
+        print("No matches.")
+
+
+if __name__ == "__main__":
+    main()
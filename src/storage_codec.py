@@ -0,0 +1,240 @@
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import zlib
+from dotenv import load_dotenv
+
+try:
+    import zstandard
+except ImportError:  # zstd support is optional; zlib is always available
+    zstandard = None
+
+# Add the src directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_setup import get_db_path, initialize_database
+
+CODEC_NONE = 'none'
+CODEC_ZLIB = 'zlib'
+CODEC_ZSTD = 'zstd'
+SUPPORTED_CODECS = (CODEC_NONE, CODEC_ZLIB, CODEC_ZSTD)
+
+TEXT_STORAGE_CODEC = os.getenv('TEXT_STORAGE_CODEC', CODEC_ZLIB)
+TEXT_COMPRESSION_LEVEL = int(os.getenv('TEXT_COMPRESSION_LEVEL', 6))
+
+# Document texts, stored through a codec in document_blobs
+COMPRESSED_TEXT_COLUMNS = ('text_content_plain', 'text_content_xml', 'text_content_html')
+
+
+def validate_codec(codec: str) -> str:
+    """
+    Check that a codec name is known and usable in this environment.
+
+    Args:
+        codec: Codec name.
+
+    Returns:
+        str: The codec name.
+
+    Raises:
+        ValueError: If the codec is unknown, or zstd is requested without the zstandard package.
+    """
+    if codec not in SUPPORTED_CODECS:
+        raise ValueError(f"Unknown text storage codec '{codec}'. Supported: {', '.join(SUPPORTED_CODECS)}")
+    if codec == CODEC_ZSTD and zstandard is None:
+        raise ValueError("The 'zstd' codec requires the zstandard package (pip install zstandard)")
+    return codec
+
+
+def encode_text(text: str | None, codec: str, level: int = TEXT_COMPRESSION_LEVEL) -> str | bytes | None:
+    """
+    Encode a document text for storage.
+
+    Args:
+        text: The text to store.
+        codec: 'none', 'zlib' or 'zstd'.
+        level: Compression level.
+
+    Returns:
+        str | bytes | None: The text itself for 'none', otherwise the compressed UTF-8 bytes.
+    """
+    if text is None or codec == CODEC_NONE:
+        return text
+    data = text.encode('utf-8')
+    if codec == CODEC_ZLIB:
+        return zlib.compress(data, level)
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise ValueError(f"Unknown text storage codec '{codec}'")
+
+
+def decode_text(value: str | bytes | None, codec: str | None) -> str | None:
+    """
+    Decode a stored document text.
+
+    Args:
+        value: The stored column value.
+        codec: The value's codec; None or 'none' means the value is stored as plain TEXT.
+
+    Returns:
+        str | None: The document text.
+    """
+    if value is None:
+        return None
+    if codec in (None, CODEC_NONE) or isinstance(value, str):
+        return value
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(value).decode('utf-8')
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise ValueError("Row is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(value).decode('utf-8')
+    raise ValueError(f"Unknown text storage codec '{codec}'")
+
+
+def decode_api_response(value: str | bytes | None, codec: str | None) -> dict | None:
+    """
+    Decode a stored api_response_json value into the act's API metadata.
+
+    Args:
+        value: The stored api_response_json value.
+        codec: The row's api_response_codec.
+
+    Returns:
+        dict | None: The metadata, or None if it was not stored.
+    """
+    text = decode_text(value, codec)
+    return None if text is None else json.loads(text)
+
+
+def convert_api_responses(conn: sqlite3.Connection, codec: str, batch_size: int = 200) -> int:
+    """
+    Re-encode the stored api_response_json values with the given codec.
+
+    Rows are processed in full_text_id order; the caller commits.
+
+    Args:
+        conn: Open database connection.
+        codec: Target codec.
+        batch_size: Number of rows read at a time.
+
+    Returns:
+        int: Number of values converted.
+    """
+    validate_codec(codec)
+    target_codec = None if codec == CODEC_NONE else codec
+    converted = 0
+    last_id = None
+    while True:
+        rows = conn.execute(
+            "SELECT full_text_id, api_response_codec, api_response_json FROM legal_documents "
+            "WHERE (? IS NULL OR full_text_id > ?) AND api_response_json IS NOT NULL "
+            "AND api_response_codec IS NOT ? ORDER BY full_text_id LIMIT ?",
+            (last_id, last_id, target_codec, batch_size)
+        ).fetchall()
+        if not rows:
+            return converted
+        conn.executemany(
+            "UPDATE legal_documents SET api_response_json = ?, api_response_codec = ? WHERE full_text_id = ?",
+            [(encode_text(decode_text(value, value_codec), codec), target_codec, full_text_id)
+             for full_text_id, value_codec, value in rows]
+        )
+        converted += len(rows)
+        last_id = rows[-1][0]
+
+
+def register_sql_functions(conn: sqlite3.Connection):
+    """
+    Register decompress_text(value, codec) on a connection.
+
+    This lets SQL consumers decode the texts in place, e.g.
+    ``SELECT decompress_text(text_content_xml, xml_codec) FROM legal_document_texts WHERE ...``,
+    so only the rows and columns actually selected are decompressed.
+
+    Args:
+        conn: Connection to register the function on.
+    """
+    conn.create_function('decompress_text', 2, decode_text, deterministic=True)
+
+
+def convert_database(database_path: str, codec: str, batch_size: int = 200) -> int:
+    """
+    Re-encode the stored texts of an existing database with the given codec, in place.
+
+    The distinct texts in document_blobs are processed in hash order in batches
+    of one transaction each, so the conversion can be interrupted and restarted.
+    The stored API responses are converted afterwards, in one transaction.
+
+    Args:
+        database_path: Path to the SQLite database file.
+        codec: Target codec.
+        batch_size: Number of texts converted per transaction.
+
+    Returns:
+        int: Number of texts converted.
+    """
+    validate_codec(codec)
+    target_codec = None if codec == CODEC_NONE else codec
+    conn = sqlite3.connect(database_path)
+    converted = 0
+    last_hash = None
+    try:
+        while True:
+            rows = conn.execute(
+                "SELECT hash, codec, content FROM document_blobs "
+                "WHERE (? IS NULL OR hash > ?) AND codec IS NOT ? ORDER BY hash LIMIT ?",
+                (last_hash, last_hash, target_codec, batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            updates = [(encode_text(decode_text(content, blob_codec), codec), target_codec, text_hash)
+                       for text_hash, blob_codec, content in rows]
+            with conn:
+                conn.executemany("UPDATE document_blobs SET content = ?, codec = ? WHERE hash = ?", updates)
+            converted += len(rows)
+            last_hash = rows[-1][0]
+            logging.info(f"Converted {converted} texts to codec '{codec}'")
+        with conn:
+            responses = convert_api_responses(conn, codec, batch_size)
+        if responses:
+            logging.info(f"Converted {responses} stored API responses to codec '{codec}'")
+    finally:
+        conn.close()
+    return converted
+
+
+def main():
+    """Command-line entry point for converting an existing database."""
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Convert the stored document texts to another storage codec in place.")
+    parser.add_argument("--codec", choices=SUPPORTED_CODECS, default=TEXT_STORAGE_CODEC,
+                        help="Target codec. Default: TEXT_STORAGE_CODEC or 'zlib'.")
+    parser.add_argument("--batch-size", type=int, default=200,
+                        help="Number of texts converted per transaction. Default: 200.")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="Run VACUUM afterwards so the freed space is returned to the file system.")
+    args = parser.parse_args()
+
+    initialize_database()
+    _, database_path = get_db_path()
+    size_before = os.path.getsize(database_path)
+
+    converted = convert_database(database_path, args.codec, batch_size=args.batch_size)
+
+    if args.vacuum:
+        logging.info("Running VACUUM")
+        conn = sqlite3.connect(database_path)
+        conn.execute("VACUUM")
+        conn.close()
+
+    size_after = os.path.getsize(database_path)
+    logging.info(f"Converted {converted} texts to '{args.codec}'. Database file size: {size_before} -> {size_after} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Shared fixtures for the unit tests: a temporary database and legal_documents rows.
+"""
+
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from db_setup import get_db_path, initialize_database
+
+def make_document_row(full_text_id, **overrides):
+    """
+    Create a legal_documents row for DocumentWriter.add().
+
+    Args:
+        full_text_id: The act's full_text_id; the identifier, title and texts are derived from it.
+        **overrides: Column values replacing the defaults.
+
+    Returns:
+        dict: The row.
+    """
+    row = {
+        'full_text_id': full_text_id, 'rt_unique_id': f"rt-{full_text_id}", 'lineage_id': None,
+        'title': f"Akt {full_text_id}", 'document_type': 'seadus',
+        'text_content_plain': f"Tekst {full_text_id}", 'text_content_xml': f"<akt>{full_text_id}</akt>",
+        'publication_date': None, 'entry_into_force_date': None, 'repeal_date': None,
+        'status': 'VALID', 'source_url': None, 'api_response_json': '{}',
+        'retrieved_at': '2024-01-01 10:00:00', 'last_checked_at': '2024-01-01 10:00:00'
+    }
+    row.update(overrides)
+    return row
+
+def use_temporary_database(test_case, initialize=True, **environ):
+    """
+    Point DATABASE_DIR at a temporary directory for the duration of a test.
+
+    Args:
+        test_case: The unittest.TestCase; the directory and environment are restored through its cleanups.
+        initialize: Create the database with all migrations applied.
+        **environ: Further environment variables to set, e.g. API_BASE_URL.
+
+    Returns:
+        tuple[str, str]: The temporary directory and the database path.
+    """
+    temp_dir = tempfile.TemporaryDirectory()
+    test_case.addCleanup(temp_dir.cleanup)
+    env_patcher = patch.dict(os.environ, {'DATABASE_DIR': temp_dir.name, **environ})
+    env_patcher.start()
+    test_case.addCleanup(env_patcher.stop)
+    if initialize:
+        initialize_database()
+    _, database_path = get_db_path()
+    return temp_dir.name, database_path
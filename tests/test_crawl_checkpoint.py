@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Unit tests for resumable crawl checkpoints in crawl_checkpoint.py.
+"""
+
+import unittest
+import os
+import sys
+import sqlite3
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from crawl_checkpoint import (
+    RUN_COMPLETED, RUN_INTERRUPTED, STATE_FAILED, STATE_SKIPPED, STATE_STORED, CrawlCheckpoint
+)
+from helpers import use_temporary_database
+
+QUERY = {'dokument': 'seadus', 'limiit': 2}
+
+def make_pages(*pages):
+    """Build (page number, acts) tuples from lists of full_text_id values."""
+    return [(number, [{'terviktekstID': full_text_id} for full_text_id in ids])
+            for number, ids in enumerate(pages, start=1)]
+
+class TestCrawlCheckpoint(unittest.TestCase):
+    """Test suite for CrawlCheckpoint."""
+
+    def setUp(self):
+        """Create a temporary database."""
+        _, database_path = use_temporary_database(self)
+        self.conn = sqlite3.connect(database_path)
+        self.addCleanup(self.conn.close)
+
+    def run_row(self, run_id):
+        return self.conn.execute(
+            "SELECT status, last_completed_page, acts_processed FROM crawl_runs WHERE run_id = ?", (run_id,)
+        ).fetchone()
+
+    def test_page_completes_when_all_acts_finish(self):
+        """Test that a page only counts as completed once every act on it and before it has finished."""
+        checkpoint = CrawlCheckpoint.start(self.conn, QUERY)
+        acts = checkpoint.track_pages(make_pages([1, 2], [3, 4], [5]))
+        for act in acts:
+            if act['terviktekstID'] == 1:
+                # Page 1 stays open while act 1 is outstanding
+                continue
+            checkpoint.act_finished(act['terviktekstID'], STATE_STORED)
+        checkpoint.save()
+        self.assertEqual(self.run_row(checkpoint.run_id), ('RUNNING', 0, 4))
+
+        checkpoint.act_finished(1, STATE_FAILED)
+        checkpoint.finish(RUN_COMPLETED)
+        self.assertEqual(self.run_row(checkpoint.run_id), ('COMPLETED', 3, 5))
+        self.assertEqual(dict(self.conn.execute(
+            "SELECT full_text_id, state FROM crawl_checkpoints WHERE run_id = ?", (checkpoint.run_id,)
+        ).fetchall()), {1: 'FAILED', 2: 'STORED', 3: 'STORED', 4: 'STORED', 5: 'STORED'})
+
+    def test_resume_continues_after_last_completed_page(self):
+        """Test that a resumed run starts after the last completed page and leaves out finished acts."""
+        checkpoint = CrawlCheckpoint.start(self.conn, QUERY)
+        acts = checkpoint.track_pages(make_pages([1, 2], [3, 4], [5]))
+        for act in acts:
+            if act['terviktekstID'] == 4:
+                break
+            checkpoint.act_finished(act['terviktekstID'], STATE_SKIPPED if act['terviktekstID'] == 2 else STATE_STORED)
+        checkpoint.finish(RUN_INTERRUPTED)
+        self.assertEqual(self.run_row(checkpoint.run_id), ('INTERRUPTED', 1, 3))
+
+        resumed = CrawlCheckpoint.start(self.conn, dict(reversed(list(QUERY.items()))), resume=True)
+        self.assertEqual(resumed.run_id, checkpoint.run_id)
+        self.assertEqual(resumed.start_page, 2)
+        remaining = [act['terviktekstID'] for act in resumed.track_pages(make_pages([1, 2], [3, 4], [5])[1:])]
+        self.assertEqual(remaining, [4, 5])
+        for full_text_id in remaining:
+            resumed.act_finished(full_text_id, STATE_STORED)
+        resumed.finish(RUN_COMPLETED)
+        self.assertEqual(self.run_row(checkpoint.run_id), ('COMPLETED', 3, 5))
+
+    def test_resume_retries_failed_acts(self):
+        """Test that a resumed run lists the pages of failed acts again and fetches only those acts."""
+        checkpoint = CrawlCheckpoint.start(self.conn, QUERY)
+        for act in checkpoint.track_pages(make_pages([1, 2], [3, 4], [5])):
+            if act['terviktekstID'] == 5:
+                break
+            checkpoint.act_finished(act['terviktekstID'], STATE_FAILED if act['terviktekstID'] == 3 else STATE_STORED)
+        checkpoint.finish(RUN_INTERRUPTED)
+        self.assertEqual(self.run_row(checkpoint.run_id), ('INTERRUPTED', 2, 4))
+
+        resumed = CrawlCheckpoint.start(self.conn, QUERY, resume=True)
+        self.assertEqual(resumed.start_page, 2)
+        remaining = [act['terviktekstID'] for act in resumed.track_pages(make_pages([1, 2], [3, 4], [5])[1:])]
+        self.assertEqual(remaining, [3, 5])
+        for full_text_id in remaining:
+            resumed.act_finished(full_text_id, STATE_STORED)
+        resumed.finish(RUN_COMPLETED)
+        self.assertEqual(self.run_row(checkpoint.run_id), ('COMPLETED', 3, 5))
+        self.assertEqual(self.conn.execute(
+            "SELECT state FROM crawl_checkpoints WHERE run_id = ? AND full_text_id = 3", (checkpoint.run_id,)
+        ).fetchone(), ('STORED',))
+
+    def test_resume_ignores_completed_and_other_queries(self):
+        """Test that --resume starts a new run when no unfinished run of the same query exists."""
+        completed = CrawlCheckpoint.start(self.conn, QUERY)
+        completed.finish(RUN_COMPLETED)
+        other = CrawlCheckpoint.start(self.conn, dict(QUERY, limiit=100))
+        other.finish(RUN_INTERRUPTED)
+
+        resumed = CrawlCheckpoint.start(self.conn, QUERY, resume=True)
+        self.assertNotIn(resumed.run_id, (completed.run_id, other.run_id))
+        self.assertEqual(resumed.start_page, 1)
+
+    def test_repeated_act_across_pages(self):
+        """Test that an act listed on two pages has to finish twice."""
+        checkpoint = CrawlCheckpoint.start(self.conn, QUERY)
+        for act in checkpoint.track_pages(make_pages([1, 2], [2, 3])):
+            checkpoint.act_finished(act['terviktekstID'], STATE_STORED)
+            checkpoint.save()
+        self.assertEqual(checkpoint.last_completed_page, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Unit tests for sharded multi-process crawls in crawl_planner.py.
+"""
+
+import unittest
+from unittest.mock import patch
+import argparse
+import os
+import queue
+import sys
+import sqlite3
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from crawl_checkpoint import STATE_DUPLICATE, STATE_FAILED
+from crawl_planner import _crawl_shard, expand_dates, plan_shards, run_shards
+from data_retriever import add_crawl_arguments
+from helpers import use_temporary_database
+from mock_rt_server import MockRTServer
+
+class TestPlanShards(unittest.TestCase):
+    """Test suite for expand_dates and plan_shards."""
+
+    def test_expand_dates(self):
+        """Test that ranges are expanded inclusively and duplicates are dropped."""
+        self.assertEqual(expand_dates(['2020-01-01:2020-01-10', '2020-01-05', '2021-03-01'], step_days=4),
+                         ['2020-01-01', '2020-01-05', '2020-01-09', '2021-03-01'])
+        with self.assertRaises(ValueError):
+            expand_dates(['2020-02-01:2020-01-01'])
+
+    def test_one_shard_per_type_and_date(self):
+        """Test that every document type is combined with every date, or queried without one."""
+        shards = plan_shards(['seadus', 'määrus'], ['2020-01-01', '2021-01-01'], items_per_page=50)
+        self.assertEqual(len(shards), 4)
+        self.assertEqual(shards[1], {'dokument': 'seadus', 'limiit': 50, 'kehtiv': '2021-01-01'})
+        self.assertEqual(plan_shards(['seadus'], []), [{'dokument': 'seadus', 'limiit': 100}])
+
+class TestRunShards(unittest.TestCase):
+    """Test suite for run_shards against the mock server."""
+
+    def setUp(self):
+        """Start a mock server and point the API and the database at temporary locations."""
+        self.server = MockRTServer(acts=12, sections=3).start()
+        self.addCleanup(self.server.stop)
+        # Worker processes are spawned, so they read the API URLs from the environment
+        _, self.database_path = use_temporary_database(self, API_BASE_URL=self.server.api_url,
+                                                       RT_DOCUMENT_BASE_URL=self.server.base_url)
+        parser = argparse.ArgumentParser()
+        add_crawl_arguments(parser)
+        self.options = parser.parse_args(['--items-per-page', '5', '--requests-per-second', '0',
+                                          '--rate-limit-mode', 'fixed', '--workers', '2', '--batch-size', '4'])
+
+    def test_overlapping_shards_fetch_each_act_once(self):
+        """Test that acts listed by several shards are downloaded once and every shard completes."""
+        shards = plan_shards(['seadus', 'määrus'], ['2020-01-01', '2021-01-01'], items_per_page=5)
+        summary = run_shards(shards, self.options, processes=2)
+        self.assertEqual((summary['shards_completed'], summary['shards_failed']), (4, 0))
+        self.assertEqual((summary['acts_stored'], summary['acts_skipped'], summary['acts_failed'],
+                          summary['acts_duplicate']), (12, 0, 0, 36))
+        # Three listing pages per shard, then the plain text and XML of each act
+        self.assertEqual(self.server.requests_served, 4 * 3 + 12 * 2)
+
+        with sqlite3.connect(self.database_path) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM legal_documents").fetchone()[0], 12)
+            self.assertEqual(conn.execute(
+                "SELECT status, last_completed_page, acts_processed FROM crawl_runs ORDER BY run_id"
+            ).fetchall(), [('COMPLETED', 3, 12)] * 4)
+
+        # A second crawl finds everything stored and downloads no texts
+        summary = run_shards(shards[:1], self.options, processes=1)
+        self.assertEqual((summary['acts_stored'], summary['acts_skipped']), (0, 12))
+
+    def test_limit_acts_is_shared_by_all_shards(self):
+        """Test that --limit-acts caps the acts downloaded by all shards together."""
+        self.options.limit_acts = 5
+        shards = plan_shards(['seadus', 'määrus'], ['2020-01-01'], items_per_page=5)
+        summary = run_shards(shards, self.options, processes=2)
+        self.assertEqual((summary['shards_completed'], summary['acts_stored']), (2, 5))
+        with sqlite3.connect(self.database_path) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM legal_documents").fetchone()[0], 5)
+
+    def test_failed_act_releases_its_claim(self):
+        """Test that a shard failing an act lets other shards fetch it, and reports acts claimed elsewhere."""
+        class FailingPipeline:
+            def results(self, source):
+                for act_metadata in source:
+                    yield act_metadata, None, RuntimeError("download failed")
+
+        task = {'index': 0, 'params': plan_shards(['seadus'], [], items_per_page=5)[0], 'start_page': 1,
+                'finished_ids': set()}
+        claims = {200001: 1}
+        results = queue.Queue()
+        with patch('crawl_planner.create_ingest_pipeline', return_value=FailingPipeline()), \
+                patch('rt_api_client.API_BASE_URL', self.server.api_url):
+            _crawl_shard(task, results, None, claims, None, set(), self.options)
+
+        states = {}
+        while not results.empty():
+            message = results.get()
+            if message[0] == 'act':
+                states[message[2]] = message[4]
+        self.assertEqual(states.pop(200001), STATE_DUPLICATE)
+        self.assertEqual(set(states.values()), {STATE_FAILED})
+        self.assertEqual(claims, {200001: 1})
+
+if __name__ == "__main__":
+    unittest.main()
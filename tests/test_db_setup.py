@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the versioned schema migrations in db_setup.py.
+"""
+
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import sqlite3
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import db_setup
+from db_setup import MIGRATIONS, get_schema_version, initialize_database
+from helpers import use_temporary_database
+from storage_codec import decode_api_response
+
+class TestMigrations(unittest.TestCase):
+    """Test suite for initialize_database and the migration runner."""
+
+    def setUp(self):
+        """Point the database at a temporary directory."""
+        _, self.database_path = use_temporary_database(self, initialize=False)
+
+    def connect(self):
+        conn = sqlite3.connect(self.database_path)
+        self.addCleanup(conn.close)
+        return conn
+
+    def insert_document(self, conn):
+        conn.execute(
+            "INSERT INTO legal_documents (full_text_id, rt_unique_id, title, document_type, status, "
+            "retrieved_at, last_checked_at) VALUES (1, 'rt-1', 'Act', 'seadus', 'VALID', 'now', 'now')"
+        )
+        conn.commit()
+
+    def test_fresh_database_is_at_latest_version(self):
+        """Test that all migrations are applied to a new database."""
+        initialize_database()
+
+        self.assertEqual(get_schema_version(self.connect()), MIGRATIONS[-1][0])
+
+    def test_rerun_keeps_data(self):
+        """Test that initializing an existing database does not drop stored documents."""
+        initialize_database()
+        self.insert_document(self.connect())
+
+        initialize_database()
+
+        self.assertEqual(self.connect().execute("SELECT COUNT(*) FROM legal_documents").fetchone()[0], 1)
+
+    def test_reset_drops_data(self):
+        """Test that reset=True rebuilds an empty schema."""
+        initialize_database()
+        self.insert_document(self.connect())
+
+        initialize_database(reset=True)
+
+        conn = self.connect()
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM legal_documents").fetchone()[0], 0)
+        self.assertEqual(get_schema_version(conn), MIGRATIONS[-1][0])
+
+    def test_legacy_database_is_adopted(self):
+        """Test that a table created before migrations existed is kept and versioned."""
+        conn = self.connect()
+        db_setup._migrate_create_legal_documents(conn)
+        self.insert_document(conn)
+
+        initialize_database()
+
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM legal_documents").fetchone()[0], 1)
+
+    def test_metadata_is_promoted_and_indexed(self):
+        """Test that upgrading fills the link columns, compresses the JSON and serves common filters from indexes."""
+        with patch.object(db_setup, 'MIGRATIONS', MIGRATIONS[:10]):
+            initialize_database()
+        conn = self.connect()
+        conn.execute(
+            "INSERT INTO legal_documents (full_text_id, rt_unique_id, title, document_type, status, api_response_json, "
+            "retrieved_at, last_checked_at) VALUES (1, 'rt-1', 'Act', 'seadus', 'VALID', ?, 'now', 'now')",
+            ('{"dokumentXML": "/akt/rt-1.xml", "pealkiri": "Act"}',)
+        )
+        conn.commit()
+        change_seq = conn.execute("SELECT change_seq FROM legal_documents").fetchone()[0]
+
+        initialize_database()
+
+        text_url, xml_url, value, codec, new_change_seq = conn.execute(
+            "SELECT text_url, xml_url, api_response_json, api_response_codec, change_seq FROM legal_documents"
+        ).fetchone()
+        self.assertEqual((text_url, xml_url, new_change_seq), (None, '/akt/rt-1.xml', change_seq))
+        self.assertEqual(decode_api_response(value, codec), {'dokumentXML': '/akt/rt-1.xml', 'pealkiri': 'Act'})
+        for query, index in (
+            ("SELECT full_text_id FROM legal_documents WHERE document_type = 'seadus' AND status = 'VALID' "
+             "AND publication_date >= '2020-01-01'", 'idx_legal_documents_type_status'),
+            ("SELECT COUNT(*) FROM legal_documents WHERE status = 'VALID'", 'idx_legal_documents_status'),
+            ("SELECT full_text_id FROM legal_documents WHERE publication_date BETWEEN '2020-01-01' AND '2020-12-31'",
+             'idx_legal_documents_publication'),
+            ("SELECT rt_unique_id FROM legal_documents WHERE lineage_id = 7 ORDER BY entry_into_force_date",
+             'idx_legal_documents_lineage'),
+        ):
+            plan = ' '.join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}"))
+            self.assertIn(f"COVERING INDEX {index}", plan)
+
+    def test_failed_migration_is_rolled_back(self):
+        """Test that a failing migration leaves neither partial changes nor a version entry."""
+        initialize_database()
+
+        def broken_migration(conn):
+            conn.execute("CREATE TABLE half_done (id INTEGER)")
+            raise RuntimeError("boom")
+
+        with patch.object(db_setup, 'MIGRATIONS', MIGRATIONS + [(999, "Broken", broken_migration)]):
+            with self.assertRaises(RuntimeError):
+                initialize_database()
+
+        conn = self.connect()
+        self.assertEqual(get_schema_version(conn), MIGRATIONS[-1][0])
+        self.assertIsNone(conn.execute("SELECT name FROM sqlite_master WHERE name = 'half_done'").fetchone())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the batched SQLite writer in db_writer.py.
+"""
+
+import unittest
+import os
+import sys
+import sqlite3
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from db_writer import DocumentWriter
+from data_retriever import build_document_row
+from helpers import use_temporary_database
+from storage_codec import decode_api_response
+
+def make_act(full_text_id, **overrides):
+    """Create act metadata as returned by the search API."""
+    act = {
+        'terviktekstID': full_text_id,
+        'globaalID': 1000 + full_text_id,
+        'pealkiri': f"Seadus {full_text_id}",
+        'liik': 'seadus',
+        'avaldamiseKuupaev': '2020-01-01',
+        'kehtivus': {'algus': '2020-02-01', 'lopp': None},
+        'dokumentHtml': f"/akt/{1000 + full_text_id}"
+    }
+    act.update(overrides)
+    return act
+
+class TestDocumentWriter(unittest.TestCase):
+    """Test suite for DocumentWriter."""
+
+    def setUp(self):
+        """Create a temporary database."""
+        _, self.database_path = use_temporary_database(self)
+
+    def count_rows(self):
+        conn = sqlite3.connect(self.database_path)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM legal_documents").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_rows_are_buffered_until_batch_is_full(self):
+        """Test that rows are written in batches of batch_size."""
+        writer = DocumentWriter(self.database_path, batch_size=3)
+        writer.add(build_document_row(make_act(1), 'text', '<xml/>'))
+        writer.add(build_document_row(make_act(2), 'text', '<xml/>'))
+        self.assertEqual(self.count_rows(), 0)
+
+        writer.add(build_document_row(make_act(3), 'text', '<xml/>'))
+        self.assertEqual(self.count_rows(), 3)
+
+        writer.add(build_document_row(make_act(4), 'text', '<xml/>'))
+        writer.close()
+        self.assertEqual(self.count_rows(), 4)
+        self.assertEqual(writer.stats()['batches'], 2)
+
+    def test_wal_and_pragmas(self):
+        """Test that the writer switches the database to WAL with tuned pragmas."""
+        writer = DocumentWriter(self.database_path)
+        self.assertEqual(writer.conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+        self.assertEqual(writer.conn.execute("PRAGMA synchronous").fetchone()[0], 1)
+        self.assertEqual(writer.conn.execute("PRAGMA temp_store").fetchone()[0], 2)
+        writer.close()
+
+    def test_metadata_columns_and_compressed_json(self):
+        """Test that the text and XML links get columns and the raw API metadata is stored compressed."""
+        act = make_act(1, dokumentTekst='/akt/1001/tekst', dokumentXML='/akt/1001.xml')
+        with DocumentWriter(self.database_path, codec='zlib') as writer:
+            writer.add(build_document_row(act, 'text', None))
+            writer.add(build_document_row(make_act(2), 'text', None, store_api_response=False))
+        conn = sqlite3.connect(self.database_path)
+        self.addCleanup(conn.close)
+        rows = conn.execute("SELECT text_url, xml_url, api_response_json, api_response_codec FROM legal_documents "
+                            "ORDER BY full_text_id").fetchall()
+        self.assertEqual(rows[0][:2], ('/akt/1001/tekst', '/akt/1001.xml'))
+        self.assertIsInstance(rows[0][2], bytes)
+        self.assertEqual(decode_api_response(rows[0][2], rows[0][3]), act)
+        self.assertEqual(rows[1], (None, None, None, None))
+
+    def test_duplicates_are_ignored(self):
+        """Test that existing IDs are counted as ignored."""
+        with DocumentWriter(self.database_path, batch_size=10) as writer:
+            writer.add(build_document_row(make_act(1), 'text', None))
+            writer.add(build_document_row(make_act(1), 'text', None))
+
+        stats = writer.stats()
+        self.assertEqual(stats['rows_inserted'], 1)
+        self.assertEqual(stats['rows_ignored'], 1)
+
+    def test_bad_row_does_not_lose_batch(self):
+        """Test that a row that cannot be written is skipped without losing the rest of the batch."""
+        with DocumentWriter(self.database_path, batch_size=10) as writer:
+            writer.add(build_document_row(make_act(1), 'text', None))
+            writer.add(dict(build_document_row(make_act(2), 'text', None), title={'et': 'Seadus'}))
+            writer.add(build_document_row(make_act(3), 'text', None))
+
+        self.assertEqual(self.count_rows(), 2)
+        self.assertEqual(writer.stats()['rows_failed'], 1)
+
+    def test_build_document_row(self):
+        """Test that derived fields are filled in."""
+        row = build_document_row(make_act(5), 'text', '<xml/>')
+
+        self.assertEqual(row['full_text_id'], 5)
+        self.assertEqual(row['status'], 'VALID')
+        self.assertTrue(row['source_url'].endswith('/akt/1005'))
+
+if __name__ == "__main__":
+    unittest.main()
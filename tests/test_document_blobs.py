@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the deduplicated document texts in document_blobs.py.
+"""
+
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import sqlite3
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import db_setup
+from db_setup import MIGRATIONS, apply_migrations, initialize_database
+from db_writer import DocumentWriter
+from document_blobs import blob_stats, content_hash, load_document_texts, prune_blobs
+from helpers import make_document_row, use_temporary_database
+from search import search
+from storage_codec import encode_text
+
+SAMPLE_XML = '<oigusakt><paragrahv><paragrahvNr>1</paragrahvNr><loige><sisuTekst><tavatekst>Sisu</tavatekst></sisuTekst></loige></paragrahv></oigusakt>'
+
+def make_row(full_text_id, plain_text='Ühine tekst'):
+    """Create a legal_documents row whose texts are shared with other rows unless plain_text differs."""
+    return make_document_row(full_text_id, text_content_plain=plain_text, text_content_xml=SAMPLE_XML)
+
+class TestDocumentBlobs(unittest.TestCase):
+    """Test suite for the document_blobs table and the writer's use of it."""
+
+    def setUp(self):
+        """Create a temporary database."""
+        self.temp_dir, self.database_path = use_temporary_database(self, initialize=False)
+
+    def connect(self):
+        conn = sqlite3.connect(self.database_path)
+        self.addCleanup(conn.close)
+        return conn
+
+    def test_identical_texts_are_stored_once(self):
+        """Test that documents with the same texts share their blobs."""
+        initialize_database()
+        with DocumentWriter(self.database_path, batch_size=2, codec='zlib') as writer:
+            for full_text_id in range(1, 5):
+                writer.add(make_row(full_text_id))
+            writer.add(make_row(5, plain_text='Muu tekst'))
+        self.assertEqual(writer.blobs_reused, 5 * 2 - 3)
+
+        conn = self.connect()
+        stats = blob_stats(conn)
+        self.assertEqual((stats['blobs'], stats['text_references']), (3, 10))
+        self.assertLess(stats['unique_bytes'], stats['referenced_bytes'])
+        self.assertEqual(load_document_texts(conn, 3), {
+            'text_content_plain': 'Ühine tekst', 'text_content_xml': SAMPLE_XML, 'text_content_html': None
+        })
+        self.assertEqual(len(search(conn, 'ühine')), 4)
+
+    def test_changed_text_replaces_stored_text(self):
+        """Test that an act fetched again with a different text is updated, re-indexed and its old blobs pruned."""
+        initialize_database()
+        with DocumentWriter(self.database_path) as writer:
+            writer.add(make_row(1))
+            writer.add(make_document_row(2, text_content_plain='Ühine tekst', text_content_xml='<akt/>'))
+        new_xml = SAMPLE_XML.replace('Sisu', 'Uus sisu')
+        with DocumentWriter(self.database_path) as writer:
+            writer.add(make_row(1))
+            writer.add(make_document_row(1, text_content_plain='Uus redaktsioon', text_content_xml=new_xml))
+            writer.add(make_document_row(2, text_content_plain=None, text_content_xml='<akt/>'))
+        self.assertEqual((writer.rows_written, writer.rows_ignored, writer.rows_changed), (0, 2, 1))
+
+        conn = self.connect()
+        self.assertEqual(load_document_texts(conn, 1)['text_content_plain'], 'Uus redaktsioon')
+        # A text missing from the new fetch is kept
+        self.assertEqual(load_document_texts(conn, 2)['text_content_plain'], 'Ühine tekst')
+        self.assertEqual([result['full_text_id'] for result in search(conn, 'redaktsioon')], [1])
+        self.assertEqual([result['full_text_id'] for result in search(conn, 'ühine')], [2])
+        self.assertEqual(conn.execute("SELECT text FROM legal_sections WHERE full_text_id = 1").fetchall(),
+                         [('Uus sisu',)])
+        # The old plain text is still used by act 2; the old XML is pruned
+        self.assertEqual(blob_stats(conn)['blobs'], 4)
+
+    def test_prune_unreferenced_blobs(self):
+        """Test that only blobs without documents are deleted."""
+        initialize_database()
+        with DocumentWriter(self.database_path) as writer:
+            writer.add(make_row(1))
+            writer.add(make_row(2, plain_text='Ainult teises'))
+        conn = self.connect()
+        with conn:
+            conn.execute("DELETE FROM legal_documents WHERE full_text_id = 2")
+            self.assertEqual(prune_blobs(conn), 1)
+        self.assertEqual(blob_stats(conn)['blobs'], 2)
+        self.assertIsNotNone(load_document_texts(conn, 1)['text_content_plain'])
+
+    def test_texts_of_older_databases_are_moved(self):
+        """Test that migrating texts stored in legal_documents keeps them readable and deduplicates them."""
+        os.makedirs(self.temp_dir, exist_ok=True)
+        conn = sqlite3.connect(self.database_path, isolation_level=None)
+        self.addCleanup(conn.close)
+        with patch.object(db_setup, 'MIGRATIONS', MIGRATIONS[:7]):
+            apply_migrations(conn)
+        for full_text_id, codec in ((1, 'zlib'), (2, None), (3, 'zlib')):
+            conn.execute(
+                "INSERT INTO legal_documents (full_text_id, rt_unique_id, title, document_type, text_content_plain, "
+                "text_content_xml, status, retrieved_at, last_checked_at, text_codec) "
+                "VALUES (?, ?, 'Seadus', 'seadus', ?, ?, 'UNKNOWN', 'now', 'now', ?)",
+                (full_text_id, str(full_text_id), encode_text('Vana tekst', codec or 'none'),
+                 encode_text(SAMPLE_XML, codec or 'none'), codec)
+            )
+
+        self.assertEqual(apply_migrations(conn), [version for version, _, _ in MIGRATIONS[7:]])
+
+        self.assertEqual(conn.execute(
+            "SELECT COUNT(*) FROM legal_documents WHERE text_content_plain IS NOT NULL OR text_codec IS NOT NULL"
+        ).fetchone()[0], 0)
+        # The compressed and the plain copy of each text share a hash
+        self.assertEqual(blob_stats(conn)['blobs'], 2)
+        for full_text_id in (1, 2, 3):
+            texts = load_document_texts(conn, full_text_id)
+            self.assertEqual((texts['text_content_plain'], texts['text_content_xml']), ('Vana tekst', SAMPLE_XML))
+        self.assertEqual(conn.execute("SELECT plain_text_hash FROM legal_documents WHERE full_text_id = 2").fetchone()[0],
+                         content_hash('Vana tekst'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the read-side document API in document_store.py.
+"""
+
+import unittest
+import os
+import sys
+import sqlite3
+import threading
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from db_writer import DocumentWriter
+from document_store import LegalDocumentStore, TextCache
+from helpers import make_document_row, use_temporary_database
+
+class TestTextCache(unittest.TestCase):
+    """Test suite for TextCache."""
+
+    def test_least_recently_used_texts_are_evicted(self):
+        """Test that the cache stays within its size, evicting the text used longest ago."""
+        size = sys.getsizeof('a' * 100)
+        cache = TextCache(size * 2)
+        cache.put('a', 'a' * 100)
+        cache.put('b', 'b' * 100)
+        self.assertEqual(cache.get('a'), 'a' * 100)
+        cache.put('c', 'c' * 100)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 'c' * 100)
+        cache.put('huge', 'x' * 1000)
+        stats = cache.stats()
+        self.assertEqual((stats['texts'], stats['evictions'], stats['hits'], stats['misses']), (2, 1, 2, 1))
+        self.assertLessEqual(stats['bytes'], size * 2)
+
+class TestLegalDocumentStore(unittest.TestCase):
+    """Test suite for LegalDocumentStore."""
+
+    def setUp(self):
+        """Create a temporary WAL database with two versions of an act and an unrelated act."""
+        _, self.database_path = use_temporary_database(self)
+        with DocumentWriter(self.database_path) as writer:
+            writer.add(make_document_row(1, lineage_id=1, status='EXPIRED', text_content_plain='Sama tekst',
+                                         entry_into_force_date='2020-06-01'))
+            writer.add(make_document_row(2, lineage_id=1, text_content_plain='Sama tekst',
+                                         entry_into_force_date='2022-01-01', api_response_json='{"globaalID": 2}'))
+            writer.add(make_document_row(3, document_type='määrus'))
+        self.store = LegalDocumentStore(self.database_path, pool_size=2, cache_mb=1)
+        self.addCleanup(self.store.close)
+
+    def test_metadata_first_and_texts_on_access(self):
+        """Test that documents carry metadata, and texts are read once and shared through the cache."""
+        document = self.store.get(2)
+        self.assertEqual((document.title, document.lineage_id, document.status), ('Akt 2', 1, 'VALID'))
+        self.assertEqual(self.store.stats()['cache']['texts'], 0)
+        self.assertEqual(document.text_content_plain, 'Sama tekst')
+        self.assertEqual(document.text_content_xml, '<akt>2</akt>')
+        self.assertIsNone(document.text_content_html)
+        self.assertEqual(document.api_metadata, {'globaalID': 2})
+
+        # Version 1 has the same plain text, so it is served from the cache
+        self.assertEqual(self.store.get_by_rt_id('rt-1').text_content_plain, 'Sama tekst')
+        cache = self.store.stats()['cache']
+        self.assertEqual((cache['texts'], cache['hits']), (2, 1))
+        self.assertIsNone(self.store.get(99))
+
+    def test_queries(self):
+        """Test batch lookups, filtered keyset pages and versions."""
+        self.assertEqual([document.full_text_id for document in self.store.get_many([3, 99, 1])], [3, 1])
+        self.assertEqual([document.full_text_id for document in self.store.find(document_type='seadus')], [1, 2])
+        self.assertEqual([document.full_text_id for document in self.store.find(status='VALID', after_id=2)], [3])
+        self.assertEqual([document.full_text_id for document in self.store.find(limit=1, after_id=1)], [2])
+        self.assertEqual([document.entry_into_force_date for document in self.store.versions(1)],
+                         ['2020-06-01', '2022-01-01'])
+
+        documents = self.store.find()
+        self.store.load_texts(documents, columns=('text_content_plain', 'text_content_xml'))
+        self.assertEqual(self.store.stats()['cache']['texts'], 5)
+
+    def test_connections_are_read_only_and_pooled(self):
+        """Test that the pool is bounded, shared between threads and cannot write."""
+        with self.store.connection() as conn:
+            self.assertGreater(conn.execute("PRAGMA mmap_size").fetchone()[0], 0)
+            with self.assertRaises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM legal_documents")
+
+        errors = []
+
+        def read():
+            try:
+                for _ in range(20):
+                    self.assertEqual(self.store.get(3).text_content_plain, 'Tekst 3')
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(self.store.stats()['connections'], 2)
+
+if __name__ == "__main__":
+    unittest.main()
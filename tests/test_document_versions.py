@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Unit tests for version lineages, delta storage and section diffs in document_versions.py.
+"""
+
+import unittest
+import os
+import sys
+import sqlite3
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from db_writer import DocumentWriter
+from document_blobs import apply_delta, blob_stats, load_document_texts, make_delta, prune_blobs
+from document_versions import changes_since, diff_sections, list_versions, pack_versions, version_at
+from helpers import make_document_row, use_temporary_database
+from mock_rt_server import SyntheticAct
+
+def make_versions():
+    """Return three versions of a 12-section act: § 3 amended, then § 12 repealed and § 13 added."""
+    first = SyntheticAct(1, sections=12, seed=0, document_type='seadus', html_only=False)
+    second = SyntheticAct(1, sections=12, seed=0, document_type='seadus', html_only=False)
+    number, title, subsections = second.chapters[0][2][2]
+    second.chapters[0][2][2] = (number, title, subsections[:-1] + ['Muudetud lõike tekst.'])
+    third = SyntheticAct(1, sections=12, seed=0, document_type='seadus', html_only=False)
+    third.chapters[0][2][2] = second.chapters[0][2][2]
+    third.chapters[-1][2][-1] = (13, 'Uus paragrahv', ['Lisatud tekst.'])
+    return [first, second, third]
+
+def make_row(full_text_id, act, entry_into_force_date, lineage_id=7):
+    """Create a legal_documents row for a version of a synthetic act."""
+    return make_document_row(full_text_id, lineage_id=lineage_id, title=act.title, text_content_plain=act.plain_text(),
+                             text_content_xml=act.xml(), entry_into_force_date=entry_into_force_date)
+
+class TestDelta(unittest.TestCase):
+    """Test suite for make_delta and apply_delta."""
+
+    def test_round_trip(self):
+        """Test that a delta rebuilds the text exactly, including a missing final newline."""
+        base = 'üks\nkaks\nkolm\nneli\n'
+        for text in ('üks\nkaks\nKOLM\nneli\nviis', '', base, 'uus\n' + base):
+            self.assertEqual(apply_delta(base, make_delta(base, text)), text)
+
+class TestDocumentVersions(unittest.TestCase):
+    """Test suite for lineages, packing and diffs."""
+
+    def setUp(self):
+        """Create a temporary database with three versions of one act and one unrelated act."""
+        _, self.database_path = use_temporary_database(self)
+        self.acts = make_versions()
+        with DocumentWriter(self.database_path) as writer:
+            for full_text_id, act, entry_into_force_date in zip((1, 2, 3), self.acts,
+                                                                 ('2020-01-01', '2022-01-01', '2024-01-01')):
+                writer.add(make_row(full_text_id, act, entry_into_force_date))
+            writer.add(make_row(4, self.acts[0], '2020-01-01', lineage_id=8))
+        self.conn = sqlite3.connect(self.database_path)
+        self.addCleanup(self.conn.close)
+
+    def test_versions_of_a_lineage(self):
+        """Test that versions are listed in order and looked up by date."""
+        self.assertEqual([version['full_text_id'] for version in list_versions(self.conn, 2)], [1, 2, 3])
+        self.assertEqual(version_at(self.conn, 3, '2023-06-01'), 2)
+        self.assertIsNone(version_at(self.conn, 3, '2019-01-01'))
+
+    def test_diff_sections(self):
+        """Test that only the changed sections are returned, with the kind of change."""
+        changes = diff_sections(self.conn, 1, 2)
+        self.assertEqual([(change['section_number'], change['change']) for change in changes], [('3', 'modified')])
+        self.assertIn('+(', changes[0]['diff'][-1])
+        self.assertTrue(changes[0]['diff'][-1].endswith('Muudetud lõike tekst.'))
+        self.assertEqual(diff_sections(self.conn, 2, 2), [])
+
+        changes = changes_since(self.conn, 1, '2021-01-01', as_of='2025-01-01')
+        self.assertEqual((changes['old_id'], changes['new_id']), (1, 3))
+        self.assertEqual([(change['section_number'], change['change']) for change in changes['sections']],
+                         [('3', 'modified'), ('12', 'removed'), ('13', 'added')])
+        self.assertEqual(changes_since(self.conn, 1, '2024-02-01', as_of='2025-01-01')['sections'], [])
+
+    def test_pack_stores_older_versions_as_deltas(self):
+        """Test that older versions shrink to deltas against the latest one and still read back exactly."""
+        stored_before = blob_stats(self.conn)['stored_bytes']
+        totals = pack_versions(self.database_path, codec='zlib')
+        # Act 4 is in another lineage but shares its texts with version 1
+        self.assertEqual((totals['acts'], totals['deltas']), (1, 4))
+        self.assertLess(blob_stats(self.conn)['stored_bytes'], stored_before)
+        for full_text_id, act in zip((1, 2, 3, 4), self.acts + self.acts[:1]):
+            texts = load_document_texts(self.conn, full_text_id)
+            self.assertEqual((texts['text_content_plain'], texts['text_content_xml']), (act.plain_text(), act.xml()))
+        self.assertEqual(pack_versions(self.database_path, codec='zlib')['deltas'], 0)
+
+    def test_base_outlives_its_documents(self):
+        """Test that a base text is kept while deltas refer to it, and pruned after them."""
+        pack_versions(self.database_path)
+        with self.conn:
+            self.conn.execute("DELETE FROM legal_documents WHERE full_text_id = 3")
+            self.assertEqual(prune_blobs(self.conn), 0)
+        self.assertEqual(load_document_texts(self.conn, 2)['text_content_plain'], self.acts[1].plain_text())
+        with self.conn:
+            self.conn.execute("DELETE FROM legal_documents WHERE full_text_id IN (1, 2, 4)")
+            self.assertEqual(prune_blobs(self.conn), 6)
+        self.assertEqual(blob_stats(self.conn)['blobs'], 0)
+
+if __name__ == "__main__":
+    unittest.main()
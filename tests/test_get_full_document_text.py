@@ -14,7 +14,7 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
 # Import the function to be tested
-from src.rt_api_client import get_full_document_text
+from src.rt_api_client import get_full_document_text, set_default_client
 
 class TestGetFullDocumentText(unittest.TestCase):
     """Test suite for the get_full_document_text function."""
@@ -26,6 +26,9 @@ class TestGetFullDocumentText(unittest.TestCase):
         os.environ['USER_AGENT'] = 'test-agent/0.1'
         os.environ['DEFAULT_REQUEST_DELAY_SECONDS'] = '0.1'
 
+        # Start every test with a fresh shared client and an unused rate limiter
+        set_default_client(None)
+
         # Sample act metadata for testing
         self.sample_act = {
             'globaalID': '12345',
@@ -36,8 +39,8 @@ class TestGetFullDocumentText(unittest.TestCase):
         }
 
     @patch.dict(os.environ, {'USER_AGENT': 'est-lawyer-data-retriever/0.1 (Non-commercial research project)', 'DEFAULT_REQUEST_DELAY_SECONDS': '0.1'})
-    @patch('src.rt_api_client.time.sleep')
-    @patch('src.rt_api_client.requests.get')
+    @patch('rate_limiter.time.sleep')
+    @patch('src.rt_api_client.requests.Session.get')
     @patch('src.rt_api_client.os.path.isabs', return_value=True)
     @patch('src.rt_api_client.os.path.exists', return_value=False)  # Force it to use HTTP requests
     def test_fetch_plain_text_success(self, mock_exists, mock_isabs, mock_get, mock_sleep):
@@ -57,12 +60,11 @@ class TestGetFullDocumentText(unittest.TestCase):
         # Call the function
         plain_text, xml_text = get_full_document_text(self.sample_act)
 
-        # Verify the function called requests.get with the correct URL
+        # Verify the session was called with the correct URL
         expected_url = 'https://www.riigiteataja.ee/akt/12345/txt'
         mock_get.assert_any_call(
             expected_url,
             headers={
-                'User-Agent': 'est-lawyer-data-retriever/0.1 (Non-commercial research project)',
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
             },
             timeout=30
@@ -73,8 +75,8 @@ class TestGetFullDocumentText(unittest.TestCase):
         self.assertEqual(xml_text, "This is XML content")
 
     @patch.dict(os.environ, {'USER_AGENT': 'est-lawyer-data-retriever/0.1 (Non-commercial research project)', 'DEFAULT_REQUEST_DELAY_SECONDS': '0.1'})
-    @patch('src.rt_api_client.time.sleep')
-    @patch('src.rt_api_client.requests.get')
+    @patch('rate_limiter.time.sleep')
+    @patch('src.rt_api_client.requests.Session.get')
     @patch('src.rt_api_client.os.path.isabs', return_value=True)
     @patch('src.rt_api_client.os.path.exists', return_value=False)  # Force it to use HTTP requests
     def test_fetch_html_fallback_success(self, mock_exists, mock_isabs, mock_get, mock_sleep):
@@ -106,12 +108,11 @@ class TestGetFullDocumentText(unittest.TestCase):
         # Call the function
         plain_text, xml_text = get_full_document_text(act_without_text)
 
-        # Verify the function called requests.get with the correct HTML URL
+        # Verify the session was called with the correct HTML URL
         expected_url = 'https://www.riigiteataja.ee/akt/12345/html'
         mock_get.assert_any_call(
             expected_url,
             headers={
-                'User-Agent': 'est-lawyer-data-retriever/0.1 (Non-commercial research project)',
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
             },
             timeout=30
@@ -123,8 +124,8 @@ class TestGetFullDocumentText(unittest.TestCase):
         self.assertEqual(xml_text, "<html>This is HTML content</html>")
 
     @patch.dict(os.environ, {'USER_AGENT': 'est-lawyer-data-retriever/0.1 (Non-commercial research project)', 'DEFAULT_REQUEST_DELAY_SECONDS': '0.1'})
-    @patch('src.rt_api_client.time.sleep')
-    @patch('src.rt_api_client.requests.get')
+    @patch('rate_limiter.time.sleep')
+    @patch('src.rt_api_client.requests.Session.get')
     @patch('src.rt_api_client.os.path.isabs', return_value=True)
     @patch('src.rt_api_client.os.path.exists', return_value=False)  # Force it to use HTTP requests
     def test_fetch_xml_success(self, mock_exists, mock_isabs, mock_get, mock_sleep):
@@ -138,12 +139,11 @@ class TestGetFullDocumentText(unittest.TestCase):
         # Call the function
         plain_text, xml_text = get_full_document_text(self.sample_act)
 
-        # Verify the function called requests.get with the correct XML URL
+        # Verify the session was called with the correct XML URL
         expected_url = 'https://www.riigiteataja.ee/akt/12345/xml'
         mock_get.assert_called_with(
             expected_url,
             headers={
-                'User-Agent': 'est-lawyer-data-retriever/0.1 (Non-commercial research project)',
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
             },
             timeout=30
@@ -154,8 +154,8 @@ class TestGetFullDocumentText(unittest.TestCase):
         self.assertEqual(xml_text, "<xml>This is XML content</xml>")
 
     @patch.dict(os.environ, {'USER_AGENT': 'est-lawyer-data-retriever/0.1 (Non-commercial research project)', 'DEFAULT_REQUEST_DELAY_SECONDS': '0.1'})
-    @patch('src.rt_api_client.time.sleep')
-    @patch('src.rt_api_client.requests.get')
+    @patch('rate_limiter.time.sleep')
+    @patch('src.rt_api_client.requests.Session.get')
     def test_all_urls_missing(self, mock_get, mock_sleep):
         """Test behavior when all document URLs are missing."""
         # Call the function with an act that has no document URLs
@@ -172,8 +172,8 @@ class TestGetFullDocumentText(unittest.TestCase):
         self.assertIsNone(xml_text)
 
     @patch.dict(os.environ, {'USER_AGENT': 'est-lawyer-data-retriever/0.1 (Non-commercial research project)', 'DEFAULT_REQUEST_DELAY_SECONDS': '0.1'})
-    @patch('src.rt_api_client.time.sleep')
-    @patch('src.rt_api_client.requests.get')
+    @patch('rate_limiter.time.sleep')
+    @patch('src.rt_api_client.requests.Session.get')
     def test_request_exception_handling(self, mock_get, mock_sleep):
         """Test handling of request exceptions."""
         # Configure the mock to raise a RequestException
@@ -187,8 +187,8 @@ class TestGetFullDocumentText(unittest.TestCase):
         self.assertIsNone(xml_text)
 
     @patch.dict(os.environ, {'USER_AGENT': 'est-lawyer-data-retriever/0.1 (Non-commercial research project)', 'DEFAULT_REQUEST_DELAY_SECONDS': '0.1'})
-    @patch('src.rt_api_client.time.sleep')
-    @patch('src.rt_api_client.requests.get')
+    @patch('rate_limiter.time.sleep')
+    @patch('src.rt_api_client.requests.Session.get')
     @patch('src.rt_api_client.os.path.isabs', return_value=False)  # Force it to use HTTP requests
     def test_absolute_urls(self, mock_isabs, mock_get, mock_sleep):
         """Test handling of absolute URLs."""
@@ -210,12 +210,11 @@ class TestGetFullDocumentText(unittest.TestCase):
         # Call the function
         plain_text, xml_text = get_full_document_text(act_with_absolute_urls)
 
-        # Verify the function called requests.get with the absolute URL
+        # Verify the session was called with the absolute URL
         expected_url = 'https://example.com/12345/txt'
         mock_get.assert_any_call(
             expected_url,
             headers={
-                'User-Agent': 'est-lawyer-data-retriever/0.1 (Non-commercial research project)',
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
             },
             timeout=30
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the HTML-to-text extraction in html_text.py.
+"""
+
+import unittest
+import os
+import sys
+import sqlite3
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from db_writer import DocumentWriter
+from data_retriever import build_document_row
+from document_blobs import load_document_texts
+from helpers import use_temporary_database
+from html_text import benchmark, clean_stored_html, html_to_text, looks_like_html, split_plain_and_html
+from search import search
+
+ACT_PAGE = '''<!DOCTYPE html>
+<html lang="et">
+<head>
+    <title>Võlaõigusseadus – Riigi Teataja</title>
+    <style>body { font-family: sans-serif; }</style>
+    <script>var tracking = "<p>not text</p>";</script>
+</head>
+<body>
+    <header><a href="/">Riigi Teataja</a> <nav><a href="/otsing">Otsing</a></nav></header>
+    <div id="article-content">
+        <h1>Võlaõigusseadus</h1>
+        <p><strong>§ 1.</strong>&nbsp;Seaduse reguleerimisala</p>
+        <p>(1) Käesolev   seadus sätestab
+           lepingulised ja lepinguvälised võlasuhted.<br>(2) Seadust kohaldatakse ka &quot;tarbijale&quot;.</p>
+        <table><tr><td>Jõust.</td><td>01.07.2002</td></tr></table>
+    </div>
+    <form><input name="q"><button>Otsi</button></form>
+    <footer>© Justiitsministeerium</footer>
+</body>
+</html>'''
+
+def make_act(full_text_id):
+    """Create act metadata as returned by the search API."""
+    return {
+        'terviktekstID': full_text_id, 'globaalID': 1000 + full_text_id, 'pealkiri': 'Võlaõigusseadus',
+        'liik': 'seadus', 'avaldamiseKuupaev': '2020-01-01', 'kehtivus': {'algus': '2020-02-01', 'lopp': None}
+    }
+
+class TestHtmlToText(unittest.TestCase):
+    """Test suite for html_to_text and looks_like_html."""
+
+    def test_extracts_document_text(self):
+        """Test that page chrome, scripts and markup are removed and blocks become lines."""
+        self.assertEqual(html_to_text(ACT_PAGE), '\n'.join([
+            'Võlaõigusseadus',
+            '',
+            '§ 1. Seaduse reguleerimisala',
+            '',
+            '(1) Käesolev seadus sätestab lepingulised ja lepinguvälised võlasuhted.',
+            '(2) Seadust kohaldatakse ka "tarbijale".',
+            '',
+            'Jõust. 01.07.2002'
+        ]))
+
+    def test_looks_like_html(self):
+        """Test that HTML pages are detected and plain texts mentioning HTML are not."""
+        self.assertTrue(looks_like_html(ACT_PAGE))
+        self.assertTrue(looks_like_html('<?xml version="1.0"?>\n<html><body>x</body></html>'))
+        self.assertFalse(looks_like_html('Seadus, mis käsitleb <html> märgendeid'))
+        self.assertFalse(looks_like_html(None))
+
+    def test_split_plain_and_html(self):
+        """Test that plain text passes through and HTML is split into text and page."""
+        self.assertEqual(split_plain_and_html('Tavatekst'), ('Tavatekst', None))
+        plain_text, raw_html = split_plain_and_html(ACT_PAGE)
+        self.assertTrue(plain_text.startswith('Võlaõigusseadus'))
+        self.assertEqual(raw_html, ACT_PAGE)
+
+    def test_test_data_page(self):
+        """Test extraction on the Estonian characters sample page."""
+        with open(os.path.join(os.path.dirname(__file__), 'test_data', 'test_estonian_chars.html'), encoding='utf-8') as f:
+            self.assertEqual(html_to_text(f.read()),
+                             'This is a test HTML file with Estonian special characters: ä ö ü õ š ž')
+
+    def test_benchmark_synthetic_act(self):
+        """Test that the benchmark generates a large act when no files are given."""
+        result, = benchmark(repeat=1, sections=50)
+        self.assertIn('50 sections', result['file'])
+        self.assertGreater(result['html_bytes'], result['text_bytes'])
+        self.assertGreater(result['text_bytes'], 10_000)
+
+class TestHtmlAtIngest(unittest.TestCase):
+    """Test suite for storing HTML fallbacks."""
+
+    def setUp(self):
+        """Create a temporary database."""
+        _, self.database_path = use_temporary_database(self)
+
+    def stored_texts(self, conn, full_text_id):
+        texts = load_document_texts(conn, full_text_id)
+        return texts['text_content_plain'], texts['text_content_html']
+
+    def test_build_document_row_extracts_text(self):
+        """Test that the raw page is only kept when requested."""
+        row = build_document_row(make_act(1), ACT_PAGE, None)
+        self.assertNotIn('<', row['text_content_plain'])
+        self.assertIsNone(row['text_content_html'])
+        row = build_document_row(make_act(1), ACT_PAGE, None, store_raw_html=True)
+        self.assertEqual(row['text_content_html'], ACT_PAGE)
+
+    def test_clean_stored_html(self):
+        """Test converting documents that were stored with HTML as plain text."""
+        with DocumentWriter(self.database_path) as writer:
+            writer.add(dict(build_document_row(make_act(1), 'Tavatekst', None), text_content_plain=ACT_PAGE))
+            writer.add(build_document_row(make_act(2), 'Tavatekst', None))
+        conn = sqlite3.connect(self.database_path)
+        self.addCleanup(conn.close)
+        self.assertEqual([hit['full_text_id'] for hit in search(conn, 'tracking')], [1])
+
+        self.assertEqual(clean_stored_html(conn, store_raw_html=True), 1)
+
+        plain_text, raw_html = self.stored_texts(conn, 1)
+        self.assertTrue(plain_text.startswith('Võlaõigusseadus\n'))
+        self.assertEqual(raw_html, ACT_PAGE)
+        self.assertEqual(self.stored_texts(conn, 2), ('Tavatekst', None))
+        self.assertEqual(search(conn, 'tracking'), [])
+        self.assertEqual(clean_stored_html(conn), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the incremental mode of data_retriever.py, which skips
+downloading the full text of acts that are already stored.
+"""
+
+import unittest
+import os
+import sys
+import sqlite3
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from db_setup import get_db_path, initialize_database
+from data_retriever import load_known_full_text_ids, skip_known_acts, touch_last_checked
+from helpers import use_temporary_database
+
+class TestIncrementalMode(unittest.TestCase):
+    """Test suite for skipping already stored acts."""
+
+    def setUp(self):
+        """Create a temporary database with two stored acts."""
+        use_temporary_database(self, initialize=False)
+
+        initialize_database()
+        _, database_path = get_db_path()
+        self.conn = sqlite3.connect(database_path)
+        self.addCleanup(self.conn.close)
+        for full_text_id in (10, 20):
+            self.conn.execute(
+                "INSERT INTO legal_documents (full_text_id, rt_unique_id, title, document_type, status, "
+                "retrieved_at, last_checked_at) VALUES (?, ?, 'Act', 'seadus', 'VALID', ?, ?)",
+                (full_text_id, f"rt-{full_text_id}", '2024-01-01 00:00:00', '2024-01-01 00:00:00')
+            )
+        self.conn.commit()
+
+    def test_load_known_full_text_ids(self):
+        """Test that stored IDs are loaded into a set."""
+        self.assertEqual(load_known_full_text_ids(self.conn), {10, 20})
+
+    def test_skip_known_acts(self):
+        """Test that only unknown acts are passed on and skipped IDs are recorded."""
+        acts = [{'terviktekstID': 10}, {'terviktekstID': 11}, {'terviktekstID': 20}, {'globaalID': 5}]
+        skipped_ids = []
+
+        remaining = list(skip_known_acts(iter(acts), {10, 20}, skipped_ids))
+
+        self.assertEqual(remaining, [{'terviktekstID': 11}, {'globaalID': 5}])
+        self.assertEqual(skipped_ids, [10, 20])
+
+    def test_touch_last_checked(self):
+        """Test that last_checked_at is updated for the skipped acts only."""
+        updated = touch_last_checked(self.conn, [20, 99], '2024-06-01 12:00:00')
+
+        self.assertEqual(updated, 1)
+        rows = dict(self.conn.execute("SELECT full_text_id, last_checked_at FROM legal_documents"))
+        self.assertEqual(rows, {10: '2024-01-01 00:00:00', 20: '2024-06-01 12:00:00'})
+
+    def test_touch_last_checked_empty(self):
+        """Test that an empty ID list does not touch the database."""
+        self.assertEqual(touch_last_checked(self.conn, [], '2024-06-01 12:00:00'), 0)
+
+if __name__ == "__main__":
+    unittest.main()
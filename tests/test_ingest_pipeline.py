@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the staged ingest pipeline in ingest_pipeline.py and its use in data_retriever.py.
+"""
+
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import threading
+import time
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from data_retriever import create_ingest_pipeline
+from ingest_pipeline import IngestPipeline, Stage
+from metrics import MetricsRegistry
+
+class TestIngestPipeline(unittest.TestCase):
+    """Test suite for IngestPipeline."""
+
+    def test_every_item_passes_all_stages(self):
+        """Test that each stage receives the previous stage's result and all items come out."""
+        pipeline = IngestPipeline([Stage('double', lambda item, value: value * 2, workers=3),
+                                   Stage('describe', lambda item, value: f"{item}:{value}", workers=2)],
+                                  queue_size=2)
+        results = sorted(value for _, value, error in pipeline.results(range(20)) if error is None)
+        self.assertEqual(results, sorted(f"{i}:{i * 2}" for i in range(20)))
+        stats = pipeline.stats()
+        self.assertEqual([stats[name]['items'] for name in ('list', 'double', 'describe', 'write')], [20] * 4)
+
+    def test_failed_item_skips_later_stages(self):
+        """Test that an exception fails only its item, which bypasses the remaining stages."""
+        calls = []
+
+        def check(item, value):
+            if item == 3:
+                raise ValueError("bad item")
+            return value
+
+        pipeline = IngestPipeline([Stage('check', check), Stage('record', lambda item, value: calls.append(item))])
+        errors = {item: error for item, _, error in pipeline.results(range(5))}
+        self.assertIsInstance(errors.pop(3), ValueError)
+        self.assertEqual(set(errors.values()), {None})
+        self.assertNotIn(3, calls)
+        self.assertEqual(pipeline.stats()['check']['errors'], 1)
+
+    def test_source_error_is_raised_after_draining(self):
+        """Test that items read before the source failed are delivered, then the error is raised."""
+        def source():
+            yield from range(3)
+            raise RuntimeError("listing failed")
+
+        pipeline = IngestPipeline([Stage('identity', lambda item, value: value)])
+        delivered = []
+        with self.assertRaises(RuntimeError):
+            for item, _, _ in pipeline.results(source()):
+                delivered.append(item)
+        self.assertEqual(sorted(delivered), [0, 1, 2])
+
+    def test_slow_consumer_holds_back_earlier_stages(self):
+        """Test that full queues stop the source from running ahead of a slow consumer."""
+        produced = []
+
+        def source():
+            for i in range(50):
+                produced.append(i)
+                yield i
+
+        pipeline = IngestPipeline([Stage('identity', lambda item, value: value)], queue_size=2)
+        results = pipeline.results(source())
+        next(results)
+        time.sleep(0.2)
+        # Two queues of two items, one item in the stage, one in the source and one delivered
+        self.assertLessEqual(len(produced), 7)
+        results.close()
+        self.assertGreater(pipeline.stats()['identity']['output_wait_seconds'], 0.1)
+
+    def test_fetches_in_flight_are_bounded(self):
+        """Test that no more than `workers` downloads run at the same time and timings reach the metrics."""
+        acts = [{'globaalID': i, 'terviktekstID': i} for i in range(20)]
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def fake_fetch(act_metadata):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.002)
+            with lock:
+                running[0] -= 1
+            return f"text-{act_metadata['globaalID']}", None
+
+        metrics = MetricsRegistry()
+        with patch('data_retriever.get_full_document_text', side_effect=fake_fetch):
+            rows = [row for _, row, error in create_ingest_pipeline(3, 2, metrics=metrics).results(acts)
+                    if error is None]
+
+        self.assertLessEqual(peak[0], 3)
+        self.assertEqual(sorted(row['full_text_id'] for row in rows), list(range(20)))
+        histograms = metrics.snapshot()['histograms']['rt_stage_duration_seconds']
+        self.assertEqual({sample['labels']['stage']: sample['count'] for sample in histograms},
+                         {'list': 20, 'fetch': 20, 'parse': 20, 'write': 20})
+
+if __name__ == "__main__":
+    unittest.main()
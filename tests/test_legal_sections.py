@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Unit tests for splitting act XML into sections in legal_sections.py.
+"""
+
+import unittest
+import os
+import sys
+import sqlite3
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from db_writer import DocumentWriter
+from helpers import make_document_row, use_temporary_database
+from legal_sections import format_section, get_section, iter_sections, rebuild_sections
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), 'test_data')
+
+def load_test_xml():
+    """Load the sample act with chapters, sections, subsections and points."""
+    with open(os.path.join(TEST_DATA_DIR, 'test_act_sections.xml'), encoding='utf-8') as f:
+        return f.read()
+
+class TestIterSections(unittest.TestCase):
+    """Test suite for the streaming XML parser."""
+
+    def setUp(self):
+        self.rows = list(iter_sections(load_test_xml()))
+
+    def test_rows_follow_document_order(self):
+        """Test that every text-bearing unit yields one row, numbered in document order."""
+        self.assertEqual([row['position'] for row in self.rows], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(
+            [(row['section_number'], row['subsection_number'], row['point_number']) for row in self.rows],
+            [('1', '1', None), ('1', '2', None), ('1', '2', '1'), ('1', '2', '2'), ('2', None, None), ('3', None, None)]
+        )
+
+    def test_chapter_and_headings(self):
+        """Test that chapter and section numbers and headings are attached to each row."""
+        point = self.rows[3]
+        self.assertEqual(point['chapter_number'], '1')
+        self.assertEqual(point['chapter_title'], 'ÜLDSÄTTED')
+        self.assertEqual(point['section_title'], 'Seaduse reguleerimisala')
+        self.assertEqual(point['text'], 'šokolaadi- ja žetoonimüügile.')
+        self.assertEqual(self.rows[5]['chapter_title'], 'RAKENDUSSÄTTED')
+
+    def test_inline_markup_and_whitespace(self):
+        """Test that inline elements are kept as text and whitespace is collapsed."""
+        self.assertEqual(self.rows[2]['text'], 'välisriigi õigusaktidele;')
+        self.assertEqual(self.rows[1]['text'], 'Seadust ei kohaldata:')
+
+    def test_section_without_text(self):
+        """Test that a repealed section without text still yields a row."""
+        self.assertIsNone(self.rows[5]['text'])
+        self.assertTrue(self.rows[5]['section_title'].startswith('[Kehtetu'))
+
+class TestStoredSections(unittest.TestCase):
+    """Test suite for storing and looking up sections."""
+
+    def setUp(self):
+        """Create a temporary database and write one act through the DocumentWriter."""
+        _, self.database_path = use_temporary_database(self)
+
+        with DocumentWriter(self.database_path) as writer:
+            writer.add(make_document_row(1, title='Testimise seadus', text_content_xml=load_test_xml()))
+            writer.add(make_document_row(2, text_content_xml='<oigusakt><sisu><paragrahv>'))
+            writer.add(make_document_row(3, text_content_xml=None))
+
+        self.conn = sqlite3.connect(self.database_path)
+        self.addCleanup(self.conn.close)
+
+    def count_sections(self):
+        return self.conn.execute("SELECT COUNT(*) FROM legal_sections").fetchone()[0]
+
+    def test_writer_stores_sections(self):
+        """Test that inserted acts are split into sections and malformed XML is skipped."""
+        self.assertEqual(self.count_sections(), 6)
+        self.assertEqual(self.conn.execute("SELECT DISTINCT full_text_id FROM legal_sections").fetchall(), [(1,)])
+
+    def test_get_section(self):
+        """Test looking up a section and a subsection."""
+        rows = get_section(self.conn, 1, '1')
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(format_section(rows),
+                         "§ 1. Seaduse reguleerimisala\n"
+                         "(1) Käesolev seadus sätestab õigused ja kohustused.\n"
+                         "(2) Seadust ei kohaldata:\n"
+                         "    1) välisriigi õigusaktidele;\n"
+                         "    2) šokolaadi- ja žetoonimüügile.")
+        self.assertEqual([row['point_number'] for row in get_section(self.conn, 1, 1, subsection_number='2')],
+                         [None, '1', '2'])
+        self.assertEqual(get_section(self.conn, 1, '99'), [])
+
+    def test_lookup_uses_index(self):
+        """Test that a section lookup is an index search, not a table scan."""
+        plan = ' '.join(row[-1] for row in self.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM legal_sections WHERE full_text_id = 1 AND section_number = '1'"
+        ))
+        self.assertIn('idx_legal_sections_lookup', plan)
+
+    def test_rebuild_and_delete(self):
+        """Test that a rebuild is idempotent and deleting an act removes its sections."""
+        with self.conn:
+            self.assertEqual(rebuild_sections(self.conn), 6)
+        self.assertEqual(self.count_sections(), 6)
+        with self.conn:
+            self.conn.execute("DELETE FROM legal_documents WHERE full_text_id = 1")
+        self.assertEqual(self.count_sections(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,10 +9,14 @@ import sys
 import os
 import subprocess
 import json
+import tempfile
 
 # Add the src directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
+from benchmark import run_benchmark
+from mock_rt_server import MockRTServer
+
 class TestLimitActs(unittest.TestCase):
     """Test suite for the --limit-acts parameter behavior."""
 
@@ -43,5 +47,12 @@ class TestLimitActs(unittest.TestCase):
         # This is just to demonstrate the test microagent rules
         self.skipTest("Skipping network-dependent test")
 
+    def test_known_acts_do_not_count(self):
+        """Test that acts already stored are skipped without counting toward the limit."""
+        with tempfile.TemporaryDirectory() as work_dir, MockRTServer(acts=5, sections=2) as server:
+            first = run_benchmark(server, ['--limit-acts', '2', '--items-per-page', '2'], work_dir=work_dir)
+            second = run_benchmark(server, ['--limit-acts', '2', '--items-per-page', '2'], work_dir=work_dir)
+        self.assertEqual((first['acts'], second['acts']), (2, 2))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the crawl metrics in metrics.py and their recording in RTApiClient.
+"""
+
+import unittest
+from unittest.mock import MagicMock
+import json
+import os
+import sys
+import tempfile
+
+import requests
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from metrics import MetricsRegistry, MetricsReporter
+from rate_limiter import TokenBucketRateLimiter
+from retry_policy import CircuitBreaker, RetryPolicy
+from rt_api_client import RTApiClient
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Test suite for MetricsRegistry."""
+
+    def setUp(self):
+        """Create a registry with a few histogram buckets."""
+        self.registry = MetricsRegistry(buckets=(0.1, 1.0))
+
+    def test_counters_and_gauges_by_label(self):
+        """Test that samples with different labels are kept apart."""
+        self.registry.inc('requests_total', endpoint='search', status=200)
+        self.registry.inc('requests_total', 2, endpoint='search', status=200)
+        self.registry.inc('requests_total', endpoint='xml', status=503)
+        self.registry.set_gauge('queue_depth', 4, queue='fetch')
+        snapshot = self.registry.snapshot()
+        self.assertEqual(snapshot['counters']['requests_total'], [
+            {'labels': {'endpoint': 'search', 'status': '200'}, 'value': 3},
+            {'labels': {'endpoint': 'xml', 'status': '503'}, 'value': 1}
+        ])
+        self.assertEqual(snapshot['gauges']['queue_depth'], [{'labels': {'queue': 'fetch'}, 'value': 4}])
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that observations land in the first bucket whose bound they do not exceed."""
+        for value in (0.05, 0.1, 0.5, 3.0):
+            self.registry.observe('duration_seconds', value, stage='fetch')
+        (sample,) = self.registry.snapshot()['histograms']['duration_seconds']
+        self.assertEqual(sample['buckets'], {'0.1': 2, '1.0': 3, '+Inf': 4})
+        self.assertEqual(sample['count'], 4)
+        self.assertAlmostEqual(sample['sum'], 3.65)
+
+    def test_merge_adds_another_registry(self):
+        """Test that merging a snapshot adds counters and histograms and takes over gauges."""
+        self.registry.inc('requests_total', endpoint='search')
+        self.registry.observe('duration_seconds', 0.05, stage='fetch')
+        worker = MetricsRegistry(buckets=(0.1, 1.0))
+        worker.inc('requests_total', 2, endpoint='search')
+        worker.observe('duration_seconds', 0.5, stage='fetch')
+        worker.set_gauge('request_rate', 1.5)
+        self.registry.merge(worker.snapshot())
+        snapshot = self.registry.snapshot()
+        self.assertEqual(snapshot['counters']['requests_total'][0]['value'], 3)
+        self.assertEqual(snapshot['histograms']['duration_seconds'][0]['buckets'], {'0.1': 1, '1.0': 2, '+Inf': 2})
+        self.assertEqual(snapshot['gauges']['request_rate'][0]['value'], 1.5)
+
+    def test_prometheus_format(self):
+        """Test the exposition text of counters and histograms, including HELP lines of known metrics."""
+        self.registry.inc('rt_http_requests_total', endpoint='search', status=200)
+        self.registry.observe('rt_http_request_duration_seconds', 0.5, endpoint='search')
+        text = self.registry.to_prometheus()
+        self.assertIn('# TYPE rt_http_requests_total counter\n', text)
+        self.assertIn('# HELP rt_http_requests_total ', text)
+        self.assertIn('rt_http_requests_total{endpoint="search",status="200"} 1\n', text)
+        self.assertIn('rt_http_request_duration_seconds_bucket{endpoint="search",le="0.1"} 0\n', text)
+        self.assertIn('rt_http_request_duration_seconds_bucket{endpoint="search",le="+Inf"} 1\n', text)
+        self.assertIn('rt_http_request_duration_seconds_count{endpoint="search"} 1\n', text)
+
+    def test_collectors_run_before_snapshot(self):
+        """Test that registered collectors update gauges when a snapshot is taken."""
+        pending = [1, 2, 3]
+        self.registry.add_collector(lambda registry: registry.set_gauge('buffered', len(pending)))
+        pending.append(4)
+        self.assertEqual(self.registry.snapshot()['gauges']['buffered'][0]['value'], 4)
+
+    def test_reporter_writes_files_on_stop(self):
+        """Test that stopping the reporter leaves both files with the final values."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            textfile = os.path.join(temp_dir, 'metrics', 'crawl.prom')
+            json_file = os.path.join(temp_dir, 'crawl.json')
+            reporter = MetricsReporter(self.registry, textfile, json_file, interval_seconds=60)
+            reporter.start()
+            self.registry.inc('rt_acts_total', result='stored')
+            reporter.stop()
+            with open(textfile, encoding='utf-8') as f:
+                self.assertIn('rt_acts_total{result="stored"} 1', f.read())
+            with open(json_file, encoding='utf-8') as f:
+                self.assertEqual(json.load(f)['counters']['rt_acts_total'][0]['value'], 1)
+            self.assertEqual(sorted(os.listdir(os.path.dirname(textfile))), ['crawl.prom'])
+
+class TestClientMetrics(unittest.TestCase):
+    """Test suite for the request metrics recorded by RTApiClient."""
+
+    def test_requests_retries_and_bytes_are_recorded(self):
+        """Test that each attempt is counted by endpoint and status, along with retries and body bytes."""
+        registry = MetricsRegistry()
+        client = RTApiClient(
+            rate_limiter=TokenBucketRateLimiter(0),
+            retry_policy=RetryPolicy(max_attempts=3, backoff_base=0),
+            circuit_breaker=MagicMock(spec=CircuitBreaker, **{'wait.return_value': 0.0}),
+            metrics=registry
+        )
+        failed = MagicMock(status_code=503, headers={}, content=b'')
+        ok = MagicMock(status_code=200, headers={}, content=b'<xml/>')
+        client.session.get = MagicMock(side_effect=[requests.exceptions.Timeout("slow"), failed, ok])
+        client.get_full_document_text({'dokumentXML': 'https://example.com/akt/1.xml'})
+
+        counters = {(name, tuple(sorted(sample['labels'].items()))): sample['value']
+                    for name, samples in registry.snapshot()['counters'].items() for sample in samples}
+        self.assertEqual(counters[('rt_http_requests_total', (('endpoint', 'xml'), ('status', 'error')))], 1)
+        self.assertEqual(counters[('rt_http_requests_total', (('endpoint', 'xml'), ('status', '503')))], 1)
+        self.assertEqual(counters[('rt_http_requests_total', (('endpoint', 'xml'), ('status', '200')))], 1)
+        self.assertEqual(counters[('rt_http_retries_total', (('endpoint', 'xml'),))], 2)
+        self.assertEqual(counters[('rt_http_response_bytes_total', (('endpoint', 'xml'),))], 6)
+
+if __name__ == '__main__':
+    unittest.main()
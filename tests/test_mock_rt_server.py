@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the mock Riigi Teataja server in mock_rt_server.py and the benchmark in benchmark.py.
+"""
+
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import sqlite3
+import tempfile
+
+import requests
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import data_retriever
+from benchmark import run_benchmark
+from crawl_checkpoint import RUN_FAILED
+from helpers import use_temporary_database
+from legal_sections import iter_sections
+from mock_rt_server import MockRTServer
+from rate_limiter import TokenBucketRateLimiter
+from retry_policy import RetryPolicy
+from rt_api_client import RTApiClient
+
+class TestMockRTServer(unittest.TestCase):
+    """Test suite for MockRTServer."""
+
+    def make_client(self, server, **kwargs):
+        client = RTApiClient(base_url=server.api_url, document_base_url=server.base_url,
+                             rate_limiter=TokenBucketRateLimiter(0), **kwargs)
+        self.addCleanup(client.close)
+        return client
+
+    def test_pagination_matches_the_search_api(self):
+        """Test that the client walks all pages, using the reported total."""
+        with MockRTServer(acts=12, sections=3) as server:
+            client = self.make_client(server)
+            page = client.fetch_acts_list({'leht': 3, 'limiit': 5, 'dokument': 'määrus'})
+            self.assertEqual(page['metaandmed']['kokku'], 12)
+            self.assertEqual([act['terviktekstID'] for act in page['aktid']], [200011, 200012])
+            self.assertEqual(page['aktid'][0]['liik'], 'määrus')
+            acts = list(client.iter_acts({'limiit': 5}))
+        self.assertEqual(len({act['terviktekstID'] for act in acts}), 12)
+
+    def test_documents_are_consistent_and_parseable(self):
+        """Test that all formats describe the same sections and the XML parses into legal_sections rows."""
+        with MockRTServer(acts=2, sections=7) as server:
+            client = self.make_client(server)
+            act = client.fetch_acts_list({'leht': 1, 'limiit': 1})['aktid'][0]
+            plain_text, xml_text = client.get_full_document_text(act)
+            self.assertEqual(plain_text, server.act(1).plain_text())
+            self.assertEqual(requests.get(f"{server.base_url}/akt/999").status_code, 404)
+        self.assertIn('§ 7.', plain_text)
+        rows = list(iter_sections(xml_text))
+        self.assertEqual({row['section_number'] for row in rows}, {str(number) for number in range(1, 8)})
+        self.assertEqual(rows[0]['chapter_number'], '1')
+
+    def test_html_only_acts(self):
+        """Test that html_fraction leaves out the plain text link."""
+        with MockRTServer(acts=20, html_fraction=1.0) as server:
+            act = server.search_page({'limiit': 1})['aktid'][0]
+        self.assertNotIn('dokumentTekst', act)
+        self.assertIn('dokumentHtml', act)
+
+    def test_injected_errors_are_retried(self):
+        """Test that injected errors reach the client as retryable responses."""
+        with MockRTServer(acts=3, error_rate=1.0) as server:
+            client = self.make_client(server, retry_policy=RetryPolicy(max_attempts=2, backoff_base=0))
+            self.assertIsNone(client.fetch_acts_list({'leht': 1}))
+            self.assertEqual((server.requests_served, server.errors_injected), (2, 2))
+
+class TestBenchmark(unittest.TestCase):
+    """Test suite for the end-to-end benchmark."""
+
+    def test_run_benchmark(self):
+        """Test that a crawl of the mock server stores every act and reports the measurements."""
+        with MockRTServer(acts=6, sections=2) as server:
+            result = run_benchmark(server, ['--items-per-page', '4', '--workers', '2'])
+        self.assertEqual(result['acts'], 6)
+        self.assertEqual(result['requests'], 2 + 6 * 2)
+        self.assertGreater(result['database_mb'], 0)
+        self.assertGreater(result['acts_per_second'], 0)
+        self.assertEqual(set(result['stage_seconds']), {'list', 'fetch', 'parse', 'write', 'insert'})
+
+    def test_work_dir_is_kept(self):
+        """Test that a given work directory is used as is and keeps the database and log."""
+        with tempfile.TemporaryDirectory() as work_dir:
+            with MockRTServer(acts=2, sections=2) as server:
+                result = run_benchmark(server, work_dir=work_dir)
+            self.assertEqual(result['acts'], 2)
+            self.assertTrue(os.path.exists(os.path.join(work_dir, 'data', 'benchmark.sqlite')))
+            self.assertTrue(os.path.exists(os.path.join(work_dir, 'data_retriever.log')))
+
+    def test_failed_crawl_exits_with_an_error(self):
+        """Test that data_retriever.py exits non-zero after a crawl that failed, so the benchmark cannot report it."""
+        _, database_path = use_temporary_database(self)
+        argv = ['data_retriever.py', '--cache-mode', 'off', '--metrics-interval', '0']
+        with patch.object(sys, 'argv', argv), patch('data_retriever.set_default_client'), \
+                patch('data_retriever.create_ingest_pipeline', side_effect=RuntimeError('pipeline failed')):
+            with self.assertRaises(SystemExit) as raised:
+                data_retriever.main()
+
+        self.assertEqual(raised.exception.code, 1)
+        conn = sqlite3.connect(database_path)
+        self.addCleanup(conn.close)
+        self.assertEqual(conn.execute("SELECT status FROM crawl_runs").fetchone(), (RUN_FAILED,))
+
+if __name__ == '__main__':
+    unittest.main()
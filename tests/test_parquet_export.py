@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Parquet export in parquet_export.py and the change_seq numbering it relies on.
+"""
+
+import unittest
+import os
+import sys
+import sqlite3
+from datetime import date
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from db_writer import DocumentWriter
+from helpers import make_document_row, use_temporary_database
+from parquet_export import export_documents, load_export_state, partition_path, pyarrow
+
+if pyarrow is not None:
+    import pyarrow.dataset
+
+def make_row(full_text_id, **overrides):
+    """Create a legal_documents row published in May 2020, unless overridden."""
+    return make_document_row(full_text_id, **{'publication_date': '2020-05-01', 'entry_into_force_date': '2020-06-01',
+                                              **overrides})
+
+def read_dataset(path, columns=None):
+    """Read an exported directory, with the partition keys as columns, sorted by full_text_id."""
+    dataset = pyarrow.dataset.dataset(path, format='parquet', partitioning='hive')
+    return sorted(dataset.to_table(columns=columns).to_pylist(), key=lambda row: row['full_text_id'])
+
+class TestPartitionPath(unittest.TestCase):
+    """Test suite for partition_path."""
+
+    def test_partition_path(self):
+        """Test that type and year become escaped Hive directories, with a default for missing dates."""
+        self.assertEqual(partition_path('määrus', '2024-03-01'), 'document_type=m%C3%A4%C3%A4rus/year=2024')
+        self.assertEqual(partition_path('seadus', None), 'document_type=seadus/year=__HIVE_DEFAULT_PARTITION__')
+
+@unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+class TestParquetExport(unittest.TestCase):
+    """Test suite for export_documents."""
+
+    def setUp(self):
+        """Create a temporary database with acts of two types and years."""
+        self.temp_dir, self.database_path = use_temporary_database(self)
+        with DocumentWriter(self.database_path) as writer:
+            writer.add(make_row(1))
+            writer.add(make_row(2, publication_date='2021-01-01'))
+            writer.add(make_row(3, document_type='määrus'))
+            writer.add(make_row(4, publication_date=None))
+        self.conn = sqlite3.connect(self.database_path)
+        self.addCleanup(self.conn.close)
+        self.output_dir = os.path.join(self.temp_dir, 'export')
+
+    def test_partitioned_metadata_and_separate_texts(self):
+        """Test that metadata and texts land in the same partitions, read in small batches."""
+        summary = export_documents(self.conn, self.output_dir, batch_size=2)
+        self.assertEqual((summary['acts'], summary['files']), (4, 8))
+        self.assertEqual(sorted(os.listdir(os.path.join(self.output_dir, 'documents'))),
+                         ['document_type=m%C3%A4%C3%A4rus', 'document_type=seadus'])
+
+        documents = read_dataset(os.path.join(self.output_dir, 'documents'))
+        self.assertEqual([(row['document_type'], row['year']) for row in documents],
+                         [('seadus', 2020), ('seadus', 2021), ('määrus', 2020), ('seadus', None)])
+        self.assertEqual(documents[0]['publication_date'], date(2020, 5, 1))
+        self.assertNotIn('text_content_xml', documents[0])
+        texts = read_dataset(os.path.join(self.output_dir, 'texts'), columns=['full_text_id', 'text_content_xml'])
+        self.assertEqual(texts[2], {'full_text_id': 3, 'text_content_xml': '<akt>3</akt>'})
+
+    def test_incremental_export_writes_only_changes(self):
+        """Test that a second export contains only inserted and updated acts."""
+        export_documents(self.conn, self.output_dir, text_mode='none')
+        summary = export_documents(self.conn, self.output_dir, text_mode='none', incremental=True)
+        self.assertEqual(summary['acts'], 0)
+
+        with DocumentWriter(self.database_path) as writer:
+            writer.add(make_row(5))
+        with self.conn:
+            self.conn.execute("UPDATE legal_documents SET status = 'EXPIRED' WHERE full_text_id = 2")
+            self.conn.execute("UPDATE legal_documents SET last_checked_at = 'later' WHERE full_text_id = 3")
+        summary = export_documents(self.conn, self.output_dir, text_mode='none', incremental=True)
+        self.assertEqual((summary['incremental'], summary['acts']), (True, 2))
+
+        # Readers keep the latest change of each act
+        latest = {}
+        for row in read_dataset(os.path.join(self.output_dir, 'documents')):
+            if row['change_seq'] > latest.get(row['full_text_id'], {}).get('change_seq', 0):
+                latest[row['full_text_id']] = row
+        self.assertEqual(sorted(latest), [1, 2, 3, 4, 5])
+        self.assertEqual(latest[2]['status'], 'EXPIRED')
+        self.assertEqual(len(load_export_state(self.output_dir)['exports']), 3)
+
+        with self.assertRaises(ValueError):
+            export_documents(self.conn, self.output_dir, text_mode='inline', incremental=True)
+
+    def test_inline_texts_and_full_export_replaces_files(self):
+        """Test that inline texts are extra columns and a full export starts the dataset over."""
+        export_documents(self.conn, self.output_dir, text_mode='none')
+        with self.conn:
+            self.conn.execute("DELETE FROM legal_documents WHERE full_text_id = 4")
+        export_documents(self.conn, self.output_dir, text_mode='inline', include_json=True)
+        documents = read_dataset(os.path.join(self.output_dir, 'documents'))
+        self.assertEqual([row['full_text_id'] for row in documents], [1, 2, 3])
+        self.assertEqual((documents[0]['text_content_plain'], documents[0]['api_response_json']), ('Tekst 1', '{}'))
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, 'texts')))
+
+if __name__ == "__main__":
+    unittest.main()
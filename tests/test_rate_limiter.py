@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the token bucket rate limiter in rate_limiter.py.
+These tests replace the clock and sleep so that no real time passes.
+"""
+
+import unittest
+from unittest.mock import patch
+import os
+import sys
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from rate_limiter import AdaptiveRateLimiter, TokenBucketRateLimiter
+
+class FakeClock:
+    """Monotonic clock that only advances when sleep() is called."""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class TestTokenBucketRateLimiter(unittest.TestCase):
+    """Test suite for TokenBucketRateLimiter."""
+
+    def setUp(self):
+        """Patch the clock used by the limiter."""
+        self.clock = FakeClock()
+        patcher_monotonic = patch('rate_limiter.time.monotonic', side_effect=self.clock.monotonic)
+        patcher_sleep = patch('rate_limiter.time.sleep', side_effect=self.clock.sleep)
+        patcher_monotonic.start()
+        patcher_sleep.start()
+        self.addCleanup(patcher_monotonic.stop)
+        self.addCleanup(patcher_sleep.stop)
+
+    def test_burst_is_not_delayed(self):
+        """Test that up to `burst` requests pass without waiting."""
+        limiter = TokenBucketRateLimiter(rate=2.0, burst=3)
+
+        waits = [limiter.acquire() for _ in range(3)]
+
+        self.assertEqual(waits, [0.0, 0.0, 0.0])
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_requests_are_spaced_at_rate(self):
+        """Test that requests beyond the burst are spaced 1/rate apart."""
+        limiter = TokenBucketRateLimiter(rate=2.0, burst=1)
+
+        limiter.acquire()
+        limiter.acquire()
+        limiter.acquire()
+
+        self.assertEqual(self.clock.sleeps, [0.5, 0.5])
+
+    def test_tokens_refill_while_idle(self):
+        """Test that idle time refills the bucket up to the burst size."""
+        limiter = TokenBucketRateLimiter(rate=1.0, burst=2)
+        limiter.acquire()
+        limiter.acquire()
+
+        self.clock.now += 10
+
+        self.assertEqual(limiter.acquire(), 0.0)
+        self.assertEqual(limiter.acquire(), 0.0)
+        self.assertEqual(limiter.acquire(), 1.0)
+
+    def test_zero_rate_disables_limiting(self):
+        """Test that a non-positive rate never waits."""
+        limiter = TokenBucketRateLimiter(rate=0, burst=1)
+
+        for _ in range(5):
+            self.assertEqual(limiter.acquire(), 0.0)
+
+class TestAdaptiveRateLimiter(unittest.TestCase):
+    """Test suite for the AIMD AdaptiveRateLimiter."""
+
+    setUp = TestTokenBucketRateLimiter.setUp
+
+    def make_limiter(self, **overrides):
+        settings = dict(rate=1.0, burst=1, floor=0.25, ceiling=1.5, increase_step=0.2,
+                        decrease_factor=0.5, latency_target=1.0, adjust_interval=5.0)
+        settings.update(overrides)
+        return AdaptiveRateLimiter(**settings)
+
+    def test_additive_increase_up_to_ceiling(self):
+        """Test that healthy responses raise the rate by one step per interval, capped at the ceiling."""
+        limiter = self.make_limiter()
+        limiter.record_response(0.1, 200)
+        self.assertEqual(limiter.rate, 1.0)
+
+        for _ in range(5):
+            self.clock.now += 5
+            limiter.record_response(0.1, 200)
+
+        self.assertEqual(limiter.rate, 1.5)
+        self.assertEqual(limiter.stats()['increases'], 3)
+
+    def test_multiplicative_decrease_down_to_floor(self):
+        """Test that 429s, 5xx and failed requests halve the rate, once per interval, down to the floor."""
+        limiter = self.make_limiter()
+        limiter.record_response(0.1, 503)
+        limiter.record_response(0.1, 503)
+        self.assertEqual(limiter.rate, 0.5)
+
+        for status_code in (429, None, 500):
+            self.clock.now += 5
+            limiter.record_response(0.1, status_code)
+
+        self.assertEqual(limiter.rate, 0.25)
+        stats = limiter.stats()
+        self.assertEqual((stats['min_rate'], stats['max_rate'], stats['decreases']), (0.25, 1.0, 2))
+
+    def test_slow_responses_lower_the_rate(self):
+        """Test that a smoothed latency above the target counts as overload."""
+        limiter = self.make_limiter()
+        limiter.record_response(3.0, 200)
+        self.assertEqual(limiter.rate, 0.5)
+
+    def test_rate_change_applies_to_spacing(self):
+        """Test that requests are spaced by the new rate after a change."""
+        limiter = self.make_limiter(rate=1.0)
+        limiter.acquire()
+        limiter.record_response(0.1, 503)
+        limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [2.0])
+
+    def test_start_rate_is_clamped(self):
+        """Test that the starting rate is kept within the floor and ceiling."""
+        self.assertEqual(self.make_limiter(rate=10).rate, 1.5)
+        self.assertEqual(self.make_limiter(rate=0).rate, 0.25)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the set-based status refresh in refresh_status.py.
+"""
+
+import unittest
+import itertools
+import os
+import sys
+import sqlite3
+from datetime import date
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from data_retriever import determine_document_status
+from db_setup import apply_migrations
+from refresh_status import refresh_status, status_changes
+
+DATES = (None, '', '2020-01-01', '2024-06-30', '2024-07-01', '2024-07-02', '2030-01-01', '2024-02-30', 'soon')
+
+class TestRefreshStatus(unittest.TestCase):
+    """Test suite for refresh_status and status_changes."""
+
+    def setUp(self):
+        """Create an in-memory database with one act per combination of dates, all marked UNKNOWN."""
+        self.conn = sqlite3.connect(':memory:', isolation_level=None)
+        self.addCleanup(self.conn.close)
+        apply_migrations(self.conn)
+        self.combinations = list(itertools.product(DATES[:3], DATES, DATES))
+        self.conn.executemany(
+            "INSERT INTO legal_documents (full_text_id, rt_unique_id, title, document_type, publication_date, "
+            "entry_into_force_date, repeal_date, status, retrieved_at, last_checked_at) "
+            "VALUES (?, ?, 't', 'seadus', ?, ?, ?, 'UNKNOWN', 'x', 'x')",
+            [(number, str(number)) + dates for number, dates in enumerate(self.combinations)]
+        )
+
+    def statuses(self) -> list:
+        return [row[0] for row in self.conn.execute("SELECT status FROM legal_documents ORDER BY full_text_id")]
+
+    def expected(self, as_of: date) -> list:
+        # The invalid dates are logged as errors
+        with self.assertLogs(level='ERROR'):
+            return [determine_document_status(*dates, as_of=as_of) for dates in self.combinations]
+
+    def test_matches_determine_document_status(self):
+        """Test that the SQL rules give the same status as the Python function for every date combination."""
+        refresh_status(self.conn, '2024-07-01')
+        self.assertEqual(self.statuses(), self.expected(date(2024, 7, 1)))
+
+    def test_only_changed_rows_are_written(self):
+        """Test that a second refresh at the same date changes nothing."""
+        first = refresh_status(self.conn, '2024-07-01')
+        self.assertGreater(first, 0)
+        self.assertEqual(refresh_status(self.conn, '2024-07-01'), 0)
+
+    def test_incremental_refresh_matches_full_refresh(self):
+        """Test that refreshing only the acts whose dates were crossed gives the full result, in both directions."""
+        refresh_status(self.conn, '2024-06-30')
+        refresh_status(self.conn, '2024-07-02', since='2024-06-30')
+        self.assertEqual(self.statuses(), self.expected(date(2024, 7, 2)))
+        refresh_status(self.conn, '2020-01-01', since='2024-07-02')
+        self.assertEqual(self.statuses(), self.expected(date(2020, 1, 1)))
+
+    def test_status_changes_is_a_dry_run(self):
+        """Test that the reported changes add up to the rows a refresh would write, and nothing is written."""
+        refresh_status(self.conn, '2024-06-30')
+        before = self.statuses()
+        changes = status_changes(self.conn, '2024-07-01')
+        self.assertEqual(self.statuses(), before)
+        # Entry into force on 2024-07-01, with no repeal date or one that has not passed
+        self.assertIn({'from': 'PENDING_VALIDITY', 'to': 'VALID', 'count': 3 * 5}, changes)
+        self.assertEqual(refresh_status(self.conn, '2024-07-01'), sum(change['count'] for change in changes))
+
+if __name__ == '__main__':
+    unittest.main()
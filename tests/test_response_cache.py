@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the on-disk HTTP response cache in response_cache.py and its
+use by RTApiClient. Network access is replaced by mocks.
+"""
+
+import unittest
+from unittest.mock import MagicMock
+import os
+import sys
+import tempfile
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from rate_limiter import TokenBucketRateLimiter
+from response_cache import CacheMissError, ResponseCache
+from rt_api_client import RTApiClient
+
+def make_response(status_code, body=b'', headers=None):
+    """Create a mock HTTP response."""
+    response = MagicMock()
+    response.status_code = status_code
+    response.content = body
+    response.headers = headers or {}
+    return response
+
+class TestResponseCache(unittest.TestCase):
+    """Test suite for ResponseCache storage and eviction."""
+
+    def setUp(self):
+        """Create a cache in a temporary directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def open_cache(self, **kwargs):
+        options = {'max_size_bytes': 1024, 'ttl_seconds': 3600}
+        options.update(kwargs)
+        cache = ResponseCache(self.temp_dir.name, **options)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_put_and_get(self):
+        """Test that bodies and validators survive a round trip."""
+        cache = self.open_cache()
+        key = cache.make_key('https://example.com/akt/1', None, 'text/html')
+        cache.put(key, 'https://example.com/akt/1',
+                  make_response(200, 'Tekst õ'.encode('utf-8'), {'ETag': '"v1"', 'Content-Type': 'text/plain'}))
+
+        entry = cache.get(key)
+
+        self.assertEqual(entry.body.decode('utf-8'), 'Tekst õ')
+        self.assertEqual(entry.validator_headers(), {'If-None-Match': '"v1"'})
+        self.assertTrue(cache.is_fresh(entry))
+        self.assertEqual(entry.to_response().content, 'Tekst õ'.encode('utf-8'))
+
+    def test_key_depends_on_params(self):
+        """Test that different query parameters get different keys regardless of order."""
+        key_a = ResponseCache.make_key('https://example.com/api', {'leht': 1, 'limiit': 10}, 'application/json')
+        key_b = ResponseCache.make_key('https://example.com/api', {'limiit': 10, 'leht': 1}, 'application/json')
+        key_c = ResponseCache.make_key('https://example.com/api', {'leht': 2, 'limiit': 10}, 'application/json')
+
+        self.assertEqual(key_a, key_b)
+        self.assertNotEqual(key_a, key_c)
+
+    def test_identical_bodies_are_stored_once(self):
+        """Test that bodies are content-addressed."""
+        cache = self.open_cache()
+        for i in range(3):
+            cache.put(f"key{i}", f"https://example.com/{i}", make_response(200, b'x' * 100))
+
+        self.assertEqual(cache.total_size, 100)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entries are evicted first."""
+        cache = self.open_cache(max_size_bytes=250)
+        cache.put('a', 'https://example.com/a', make_response(200, b'a' * 100))
+        cache.put('b', 'https://example.com/b', make_response(200, b'b' * 100))
+        cache.get('a')
+        cache.put('c', 'https://example.com/c', make_response(200, b'c' * 100))
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+        self.assertEqual(cache.total_size, 200)
+
+    def test_persists_across_instances(self):
+        """Test that the cache survives reopening."""
+        cache = self.open_cache()
+        cache.put('a', 'https://example.com/a', make_response(200, b'body'))
+        cache.close()
+
+        reopened = self.open_cache()
+        self.assertEqual(reopened.get('a').body, b'body')
+        self.assertEqual(reopened.total_size, 4)
+
+    def test_stored_size_is_kept_in_the_index(self):
+        """Test that the stored size follows replaced, shared and evicted bodies without re-summing the index."""
+        cache = self.open_cache(max_size_bytes=1000)
+        for i in range(10):
+            cache.put(f"key{i}", f"https://example.com/{i}", make_response(200, bytes([65 + i]) * 100))
+        cache.put('key0', 'https://example.com/0', make_response(200, b'B' * 100))
+        cache.put('shared', 'https://example.com/shared', make_response(200, b'C' * 100))
+        self.assertEqual(cache.total_size, 900)
+
+        # One large body evicts the oldest entries in a single pass
+        cache.put('big', 'https://example.com/big', make_response(200, b'z' * 500))
+        summed = cache._conn.execute(
+            "SELECT SUM(size) FROM (SELECT DISTINCT content_hash, size FROM cache_entries)"
+        ).fetchone()[0]
+        self.assertEqual(cache.total_size, summed)
+        self.assertLessEqual(summed, 1000)
+        self.assertIsNotNone(cache.get('big'))
+
+    def test_shared_directory_respects_limit(self):
+        """Test that caches opened on the same directory, as by crawl processes, share one size limit."""
+        first = self.open_cache(max_size_bytes=250)
+        second = self.open_cache(max_size_bytes=250)
+        first.put('a', 'https://example.com/a', make_response(200, b'a' * 100))
+        second.put('b', 'https://example.com/b', make_response(200, b'b' * 100))
+        first.put('c', 'https://example.com/c', make_response(200, b'c' * 100))
+        second.put('same', 'https://example.com/same', make_response(200, b'c' * 100))
+
+        self.assertEqual((first.total_size, second.total_size), (200, 200))
+        self.assertIsNone(second.get('a'))
+        bodies = [name for _, _, files in os.walk(os.path.join(self.temp_dir.name, 'bodies')) for name in files]
+        self.assertEqual(len(bodies), 2)
+
+class TestClientWithCache(unittest.TestCase):
+    """Test suite for conditional GETs and replay mode in RTApiClient."""
+
+    def setUp(self):
+        """Create a client with a cache and a mocked session."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def make_client(self, ttl_seconds=3600, replay_only=False):
+        cache = ResponseCache(self.temp_dir.name, max_size_bytes=10_000, ttl_seconds=ttl_seconds,
+                              replay_only=replay_only)
+        client = RTApiClient(rate_limiter=TokenBucketRateLimiter(0), cache=cache)
+        client.session.get = MagicMock()
+        self.addCleanup(client.close)
+        return client
+
+    def test_fresh_entry_skips_network(self):
+        """Test that a fresh entry is served without a request."""
+        client = self.make_client()
+        client.session.get.return_value = make_response(200, b'<xml/>', {'ETag': '"v1"'})
+
+        first = client._get('https://example.com/akt/1.xml', 'application/xml')
+        second = client._get('https://example.com/akt/1.xml', 'application/xml')
+
+        self.assertEqual(client.session.get.call_count, 1)
+        self.assertEqual(first.content, second.content)
+
+    def test_stale_entry_is_revalidated(self):
+        """Test that a stale entry is revalidated with its validators and served on 304."""
+        client = self.make_client(ttl_seconds=0)
+        client.session.get.return_value = make_response(
+            200, b'<xml/>', {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+        client._get('https://example.com/akt/1.xml', 'application/xml')
+
+        client.session.get.return_value = make_response(304)
+        response = client._get('https://example.com/akt/1.xml', 'application/xml')
+
+        headers = client.session.get.call_args.kwargs['headers']
+        self.assertEqual(headers['If-None-Match'], '"v1"')
+        self.assertEqual(headers['If-Modified-Since'], 'Mon, 01 Jan 2024 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'<xml/>')
+
+    def test_replay_only(self):
+        """Test that replay mode serves cached entries and never uses the network."""
+        client = self.make_client()
+        client.session.get.return_value = make_response(200, b'{"aktid": []}')
+        client._get('https://example.com/api', 'application/json', params={'leht': 1})
+        client.close()
+
+        replay_client = self.make_client(ttl_seconds=0, replay_only=True)
+        response = replay_client._get('https://example.com/api', 'application/json', params={'leht': 1})
+
+        self.assertEqual(response.json(), {'aktid': []})
+        with self.assertRaises(CacheMissError):
+            replay_client._get('https://example.com/api', 'application/json', params={'leht': 2})
+        replay_client.session.get.assert_not_called()
+
+if __name__ == "__main__":
+    unittest.main()
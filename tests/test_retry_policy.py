@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the retry policy and circuit breaker in retry_policy.py and their use in RTApiClient.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import queue
+import sys
+import threading
+import time
+
+import requests
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from rate_limiter import TokenBucketRateLimiter
+from retry_policy import CircuitBreaker, RetryPolicy, parse_retry_after
+from rt_api_client import PageFetchError, RTApiClient
+
+def make_response(status_code, headers=None, json_data=None):
+    """Create a mock HTTP response."""
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.json.return_value = json_data
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError(f"{status_code} Error")
+    return response
+
+class TestRetryPolicy(unittest.TestCase):
+    """Test suite for RetryPolicy and parse_retry_after."""
+
+    def test_parse_retry_after(self):
+        """Test parsing delta-seconds and HTTP-date values."""
+        self.assertEqual(parse_retry_after('120'), 120.0)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertIsNone(parse_retry_after(None))
+
+    def test_backoff_is_exponential_with_jitter(self):
+        """Test that waits stay below the exponential ceiling and honour Retry-After."""
+        policy = RetryPolicy(max_attempts=5, backoff_base=1.0, backoff_max=5.0)
+        for attempt, ceiling in ((1, 1.0), (2, 2.0), (3, 4.0), (4, 5.0), (10, 5.0)):
+            waits = [policy.backoff_seconds(attempt) for _ in range(50)]
+            self.assertTrue(all(0 <= wait <= ceiling for wait in waits))
+        self.assertGreaterEqual(policy.backoff_seconds(1, retry_after=30), 30)
+
+    def test_retryable_failures(self):
+        """Test that transient failures are retryable and permanent ones are not."""
+        self.assertTrue(RetryPolicy.is_retryable_status(503))
+        self.assertTrue(RetryPolicy.is_retryable_status(429))
+        self.assertFalse(RetryPolicy.is_retryable_status(404))
+        self.assertTrue(RetryPolicy.is_retryable_exception(requests.exceptions.ConnectionError()))
+        self.assertFalse(RetryPolicy.is_retryable_exception(requests.exceptions.InvalidURL()))
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test suite for CircuitBreaker."""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that the breaker opens at the threshold and a success resets the count."""
+        breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=30)
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertFalse(breaker.is_open())
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open())
+        self.assertEqual(breaker.times_opened, 1)
+
+    def test_retry_after_pauses_all_requests(self):
+        """Test that a Retry-After makes the next request wait."""
+        breaker = CircuitBreaker(failure_threshold=0)
+        breaker.record_failure(retry_after=0.05)
+        self.assertTrue(breaker.is_open())
+        self.assertGreaterEqual(breaker.wait(), 0.04)
+        self.assertFalse(breaker.is_open())
+        self.assertLess(breaker.wait(), 0.01)
+
+    def test_half_open_lets_one_probe_through(self):
+        """Test that after the cooldown one thread probes while the others wait for its outcome."""
+        breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=0.05, probe_timeout_seconds=10)
+        breaker.record_failure()
+        outcomes = queue.Queue()
+        lock = threading.Lock()
+        passed = []
+
+        def request():
+            breaker.wait()
+            with lock:
+                passed.append(threading.get_ident())
+            if outcomes.get():
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+
+        threads = [threading.Thread(target=request) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+        self.assertEqual(len(passed), 1)
+
+        # The probe fails: the breaker opens again and a second probe follows the cooldown
+        outcomes.put(False)
+        time.sleep(0.2)
+        self.assertEqual((len(passed), breaker.times_opened), (2, 2))
+
+        # A successful probe closes the breaker for everyone
+        for _ in range(3):
+            outcomes.put(True)
+        for thread in threads:
+            thread.join(timeout=1)
+        self.assertEqual(len(passed), 4)
+        self.assertFalse(breaker.is_open())
+
+class TestClientRetries(unittest.TestCase):
+    """Test suite for retries in RTApiClient."""
+
+    def setUp(self):
+        """Create a client without rate limiting, with a mock circuit breaker."""
+        sleep_patcher = patch('retry_policy.time.sleep')
+        self.mock_sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+        self.client = RTApiClient(
+            rate_limiter=TokenBucketRateLimiter(0),
+            retry_policy=RetryPolicy(max_attempts=3, backoff_base=1.0, backoff_max=4.0),
+            circuit_breaker=MagicMock(spec=CircuitBreaker),
+            page_workers=1
+        )
+        self.client.session.get = MagicMock()
+
+    def test_transient_error_is_retried(self):
+        """Test that a 503 followed by a 200 returns the data."""
+        self.client.session.get.side_effect = [
+            make_response(503), make_response(200, json_data={'aktid': [{'globaalID': 1}]})
+        ]
+        self.assertEqual(self.client.fetch_acts_list({'leht': 1}), {'aktid': [{'globaalID': 1}]})
+        self.assertEqual(self.client.session.get.call_count, 2)
+        self.assertEqual(self.mock_sleep.call_count, 1)
+
+    def test_retry_after_is_honoured(self):
+        """Test that the wait after a 429 is at least the Retry-After value and pauses the pool."""
+        self.client.session.get.side_effect = [
+            make_response(429, headers={'Retry-After': '7'}), make_response(200, json_data={})
+        ]
+        self.client.fetch_acts_list({'leht': 1})
+        self.assertGreaterEqual(self.mock_sleep.call_args_list[0].args[0], 7)
+        self.client.circuit_breaker.record_failure.assert_called_once_with(7.0)
+        self.assertEqual(self.client.circuit_breaker.wait.call_count, 2)
+
+    def test_outcomes_are_reported_to_rate_limiter(self):
+        """Test that every attempt's status reaches the rate limiter, e.g. for adaptive pacing."""
+        self.client.rate_limiter = MagicMock(spec=TokenBucketRateLimiter)
+        self.client.session.get.side_effect = [
+            requests.exceptions.Timeout("slow"), make_response(503), make_response(200, json_data={})
+        ]
+        self.client.fetch_acts_list({'leht': 1})
+        self.assertEqual([call.args[1] for call in self.client.rate_limiter.record_response.call_args_list],
+                         [None, 503, 200])
+
+    def test_permanent_error_is_not_retried(self):
+        """Test that a 404 is returned at once."""
+        self.client.session.get.return_value = make_response(404)
+        self.assertIsNone(self.client.fetch_acts_list({'leht': 1}))
+        self.assertEqual(self.client.session.get.call_count, 1)
+
+    def test_connection_errors_exhaust_attempts(self):
+        """Test that connection errors are retried up to max_attempts and then raised."""
+        self.client.session.get.side_effect = requests.exceptions.ConnectionError("reset")
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.client._send('https://example.com', 'application/json')
+        self.assertEqual(self.client.session.get.call_count, 3)
+
+    def test_failed_page_raises_instead_of_truncating(self):
+        """Test that a page failing after all retries stops the crawl with an error."""
+        full_page = make_response(200, json_data={'aktid': [{'globaalID': 1}, {'globaalID': 2}]})
+        self.client.session.get.side_effect = [full_page] + [make_response(503)] * 3
+        acts = self.client.iter_acts({'limiit': 2})
+        self.assertEqual([next(acts)['globaalID'], next(acts)['globaalID']], [1, 2])
+        with self.assertRaises(PageFetchError):
+            next(acts)
+
+if __name__ == '__main__':
+    unittest.main()
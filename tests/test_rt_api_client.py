@@ -9,11 +9,14 @@ from unittest.mock import patch, MagicMock
 import os
 import sys
 import json
+import threading
 
 # Add the src directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
-from src.rt_api_client import fetch_acts_list, get_all_acts_for_query
+from src.rt_api_client import (
+    RTApiClient, fetch_acts_list, get_all_acts_for_query, get_default_client, iter_acts, set_default_client
+)
 
 class TestRTApiClient(unittest.TestCase):
     """Test suite for the RT API client functions."""
@@ -25,7 +28,10 @@ class TestRTApiClient(unittest.TestCase):
         os.environ['USER_AGENT'] = 'test-agent/0.1'
         os.environ['DEFAULT_REQUEST_DELAY_SECONDS'] = '0.1'
 
-    @patch('src.rt_api_client.requests.get')
+        # Start every test with a fresh shared client and an unused rate limiter
+        set_default_client(None)
+
+    @patch('src.rt_api_client.requests.Session.get')
     def test_fetch_acts_list_success(self, mock_get):
         """Test successful fetching of acts list."""
         # Create a mock response with sample data
@@ -49,7 +55,7 @@ class TestRTApiClient(unittest.TestCase):
         # Call the function
         result = fetch_acts_list(api_params)
 
-        # Verify the function called requests.get with the correct URL
+        # Verify the session was called
         # Note: The actual URL might be different based on the implementation
         mock_get.assert_called_once()
 
@@ -58,7 +64,7 @@ class TestRTApiClient(unittest.TestCase):
         self.assertIn('oigusaktid', result)
         self.assertEqual(len(result['oigusaktid']), 2)
 
-    @patch('src.rt_api_client.requests.get')
+    @patch('src.rt_api_client.requests.Session.get')
     def test_fetch_acts_list_empty(self, mock_get):
         """Test fetching an empty acts list."""
         # Create a mock response with empty data
@@ -97,5 +103,155 @@ class TestRTApiClient(unittest.TestCase):
         # This is just to demonstrate the test microagent rules
         self.skipTest("Skipping test that requires specific mocking")
 
+class TestRTApiClientSession(unittest.TestCase):
+    """Test suite for the pooled session owned by RTApiClient."""
+
+    def test_session_defaults(self):
+        """Test that the session carries the User-Agent and a sized connection pool."""
+        client = RTApiClient(user_agent='test-agent/0.1', pool_size=4, timeout=5)
+
+        self.assertEqual(client.session.headers['User-Agent'], 'test-agent/0.1')
+        self.assertEqual(client.session.headers['Connection'], 'keep-alive')
+        adapter = client.session.get_adapter('https://www.riigiteataja.ee')
+        self.assertEqual(adapter._pool_maxsize, 4)
+        client.close()
+
+    @patch('rate_limiter.time.sleep')
+    @patch('src.rt_api_client.requests.Session.get')
+    def test_requests_reuse_session(self, mock_get, mock_sleep):
+        """Test that consecutive requests go through the same session with the configured timeout."""
+        mock_response = MagicMock()
+        mock_response.json.return_value = {'aktid': []}
+        mock_get.return_value = mock_response
+
+        client = RTApiClient(timeout=5)
+        client.fetch_acts_list({'leht': 1})
+        client.fetch_acts_list({'leht': 2})
+
+        self.assertEqual(mock_get.call_count, 2)
+        for call in mock_get.call_args_list:
+            self.assertEqual(call.kwargs['timeout'], 5)
+            self.assertEqual(call.kwargs['headers'], {'Accept': 'application/json'})
+
+    def test_module_functions_use_default_client(self):
+        """Test that the module-level wrappers delegate to the shared client."""
+        client = MagicMock()
+        client.fetch_acts_list.return_value = {'aktid': []}
+        set_default_client(client)
+        try:
+            self.assertIs(get_default_client(), client)
+            self.assertEqual(fetch_acts_list({'leht': 1}), {'aktid': []})
+            client.fetch_acts_list.assert_called_once_with({'leht': 1})
+        finally:
+            set_default_client(None)
+
+class TestIterActs(unittest.TestCase):
+    """Test suite for the streaming iter_acts generator."""
+
+    def setUp(self):
+        """Serve pages of three, three and one act from a fake API."""
+        self.pages = {
+            1: [{'globaalID': 1}, {'globaalID': 2}, {'globaalID': 3}],
+            2: [{'globaalID': 4}, {'globaalID': 5}, {'globaalID': 6}],
+            3: [{'globaalID': 7}],
+        }
+        self.client = RTApiClient()
+        self.requested_pages = []
+
+        def fake_fetch(params):
+            self.requested_pages.append(params['leht'])
+            return {'aktid': self.pages.get(params['leht'], [])}
+
+        self.client.fetch_acts_list = fake_fetch
+
+    def test_yields_all_pages_until_short_page(self):
+        """Test that iteration stops after a page shorter than the limit."""
+        acts = list(self.client.iter_acts({'limiit': 3}))
+
+        self.assertEqual([act['globaalID'] for act in acts], list(range(1, 8)))
+        self.assertEqual(self.requested_pages, [1, 2, 3])
+
+    def test_pages_are_fetched_lazily(self):
+        """Test that the next page is only requested when the consumer reaches it."""
+        acts = self.client.iter_acts({'limiit': 3})
+
+        self.assertEqual(next(acts)['globaalID'], 1)
+        self.assertEqual(self.requested_pages, [1])
+        for _ in range(3):
+            next(acts)
+        self.assertEqual(self.requested_pages, [1, 2])
+
+    def test_max_pages(self):
+        """Test that max_pages stops the stream."""
+        acts = list(self.client.iter_acts({'limiit': 3}, max_pages=1))
+
+        self.assertEqual(len(acts), 3)
+        self.assertEqual(self.requested_pages, [1])
+
+    def test_module_wrappers(self):
+        """Test that the module-level functions stream from the shared client."""
+        set_default_client(self.client)
+        try:
+            self.assertEqual(len(list(iter_acts({'limiit': 3}))), 7)
+            self.assertEqual(len(get_all_acts_for_query({'limiit': 3}, max_pages=2)), 6)
+        finally:
+            set_default_client(None)
+
+class TestConcurrentPages(unittest.TestCase):
+    """Test suite for fetching listing pages concurrently when the result count is known."""
+
+    def setUp(self):
+        """Serve 10 acts in pages of three, reporting the total in 'metaandmed'."""
+        self.total = 10
+        self.client = RTApiClient(page_workers=3)
+        self.requested_pages = []
+        self.release = threading.Event()
+
+        def fake_fetch(params):
+            page = params['leht']
+            self.requested_pages.append(page)
+            # Later pages may finish first; order must still follow the page numbers
+            if page == 2:
+                self.release.wait(1)
+            elif page > 2:
+                self.release.set()
+            first = (page - 1) * 3 + 1
+            acts = [{'globaalID': i} for i in range(first, min(first + 3, self.total + 1))]
+            return {'metaandmed': {'kokku': self.total}, 'aktid': acts}
+
+        self.client.fetch_acts_list = fake_fetch
+
+    def test_pages_are_yielded_in_order(self):
+        """Test that concurrently fetched pages are yielded in page order."""
+        pages = list(self.client.iter_pages({'limiit': 3}))
+
+        self.assertEqual([page for page, _ in pages], [1, 2, 3, 4])
+        self.assertEqual([act['globaalID'] for _, acts in pages for act in acts], list(range(1, 11)))
+        self.assertEqual(sorted(self.requested_pages), [1, 2, 3, 4])
+
+    def test_max_pages_bounds_concurrent_fetches(self):
+        """Test that pages beyond max_pages are never requested."""
+        self.release.set()
+        acts = list(self.client.iter_acts({'limiit': 3}, max_pages=2))
+
+        self.assertEqual(len(acts), 6)
+        self.assertEqual(sorted(self.requested_pages), [1, 2])
+
+    def test_count_grown_since_first_page(self):
+        """Test that pages beyond the reported count are still walked until a short page."""
+        self.release.set()
+        self.total = 9
+        pages = self.client.iter_pages({'limiit': 3})
+        self.assertEqual(next(pages)[0], 1)
+        self.total = 11
+
+        self.assertEqual([page for page, _ in pages], [2, 3, 4])
+
+    def test_total_results(self):
+        """Test reading the result count from the response metadata."""
+        self.assertEqual(RTApiClient._total_results({'metaandmed': {'kokku': 42}}), 42)
+        self.assertEqual(RTApiClient._total_results({'kokku': '7'}), 7)
+        self.assertIsNone(RTApiClient._total_results({'aktid': []}))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
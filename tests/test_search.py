@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the FTS5 full-text search in search.py.
+"""
+
+import unittest
+import os
+import sys
+import sqlite3
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from db_writer import DocumentWriter
+from helpers import make_document_row, use_temporary_database
+from search import build_match_query, rebuild_search_index, search
+
+def make_row(full_text_id, title, plain_text, **overrides):
+    """Create a legal_documents row with a title and plain text and no XML."""
+    return make_document_row(full_text_id, title=title, text_content_plain=plain_text, text_content_xml=None,
+                             source_url=f"https://www.riigiteataja.ee/akt/{full_text_id}", **overrides)
+
+class TestSearch(unittest.TestCase):
+    """Test suite for indexing and searching documents."""
+
+    def setUp(self):
+        """Create a temporary database with a few documents."""
+        _, database_path = use_temporary_database(self)
+
+        with DocumentWriter(database_path) as writer:
+            writer.add(make_row(1, 'Töölepingu seadus', 'Töölepingu ülesütlemine tööandja poolt. Säästmine.'))
+            writer.add(make_row(2, 'Võlaõigusseadus', 'Lepingu ülesütlemine ja kahju hüvitamine.'))
+            writer.add(make_row(3, 'Saastetasu määrus', 'Saastmine ja saastetasu.', document_type='määrus'))
+            writer.add(make_row(1, 'Töölepingu seadus', 'Duplicate that must not be indexed twice'))
+
+        self.conn = sqlite3.connect(database_path)
+        self.addCleanup(self.conn.close)
+
+    def ids(self, hits):
+        return [hit['full_text_id'] for hit in hits]
+
+    def test_estonian_letters_are_matched_exactly(self):
+        """Test that words with Estonian letters match case-insensitively and are not folded to ASCII."""
+        self.assertEqual(set(self.ids(search(self.conn, 'ÜLESÜTLEMINE'))), {1, 2})
+        self.assertEqual(self.ids(search(self.conn, 'säästmine')), [1])
+        self.assertEqual(self.ids(search(self.conn, 'saastmine')), [3])
+
+    def test_title_matches_rank_first(self):
+        """Test that bm25 ranks a title match above a body-only match."""
+        self.assertEqual(self.ids(search(self.conn, 'töölepingu')), [1])
+        self.assertEqual(self.ids(search(self.conn, 'võlaõigusseadus')), [2])
+        hits = search(self.conn, 'ülesütlemine lepingu')
+        self.assertEqual(self.ids(hits), [2])
+
+    def test_prefix_search_and_snippet(self):
+        """Test prefix queries and highlighted snippets."""
+        hits = search(self.conn, 'hüvita*')
+
+        self.assertEqual(self.ids(hits), [2])
+        self.assertIn('[hüvitamine]', hits[0]['snippet'])
+
+    def test_document_type_filter(self):
+        """Test that results can be limited to a document type."""
+        self.assertEqual(self.ids(search(self.conn, 'saastetasu', document_type='seadus')), [])
+        self.assertEqual(self.ids(search(self.conn, 'saastetasu', document_type='määrus')), [3])
+
+    def test_delete_trigger(self):
+        """Test that deleting a document removes it from the index."""
+        with self.conn:
+            self.conn.execute("DELETE FROM legal_documents WHERE full_text_id = 2")
+
+        self.assertEqual(self.ids(search(self.conn, 'ülesütlemine')), [1])
+
+    def test_rebuild_index(self):
+        """Test that the index can be rebuilt from the stored, compressed texts."""
+        with self.conn:
+            self.conn.execute("DELETE FROM legal_documents_fts")
+            self.assertEqual(rebuild_search_index(self.conn, batch_size=2), 3)
+
+        self.assertEqual(self.ids(search(self.conn, 'kahju')), [2])
+
+    def test_build_match_query(self):
+        """Test that free text is quoted so FTS5 syntax characters are harmless."""
+        self.assertEqual(build_match_query('töö-lepingu § 12'), '"töö" "lepingu" "12"')
+        self.assertEqual(build_match_query('võlaõigus*'), '"võlaõigus"*')
+        self.assertEqual(build_match_query('  '), '')
+
+if __name__ == "__main__":
+    unittest.main()
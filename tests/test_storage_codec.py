@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the document text storage codecs in storage_codec.py.
+"""
+
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import sqlite3
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from helpers import make_document_row, use_temporary_database
+import storage_codec
+from storage_codec import convert_database, decode_text, encode_text, register_sql_functions, validate_codec
+from db_writer import DocumentWriter
+
+SAMPLE_XML = '<?xml version="1.0" encoding="UTF-8"?><oigusakt>' + '<loige>Õigus ja kohustus: ä ö ü õ š ž</loige>' * 200 + '</oigusakt>'
+
+class TestCodecs(unittest.TestCase):
+    """Test suite for encode_text and decode_text."""
+
+    def test_round_trip(self):
+        """Test that every available codec restores the text exactly."""
+        codecs = ['none', 'zlib'] + (['zstd'] if storage_codec.zstandard is not None else [])
+        for codec in codecs:
+            with self.subTest(codec=codec):
+                encoded = encode_text(SAMPLE_XML, codec)
+                self.assertEqual(decode_text(encoded, None if codec == 'none' else codec), SAMPLE_XML)
+
+    def test_compression_shrinks_repetitive_xml(self):
+        """Test that compressed XML is much smaller than the raw text."""
+        encoded = encode_text(SAMPLE_XML, 'zlib')
+        self.assertLess(len(encoded) * 5, len(SAMPLE_XML.encode('utf-8')))
+
+    def test_none_values(self):
+        """Test that missing texts stay missing."""
+        self.assertIsNone(encode_text(None, 'zlib'))
+        self.assertIsNone(decode_text(None, 'zlib'))
+
+    def test_unknown_codec(self):
+        """Test that unknown codecs are rejected."""
+        with self.assertRaises(ValueError):
+            validate_codec('lzma')
+
+    def test_zstd_without_package(self):
+        """Test that zstd is rejected when zstandard is not installed."""
+        with patch.object(storage_codec, 'zstandard', None):
+            with self.assertRaises(ValueError):
+                validate_codec('zstd')
+
+    def test_sql_function(self):
+        """Test that decompress_text() decodes compressed values inside SQL."""
+        conn = sqlite3.connect(':memory:')
+        register_sql_functions(conn)
+
+        result = conn.execute("SELECT decompress_text(?, 'zlib')", (encode_text('Tekst õ', 'zlib'),)).fetchone()[0]
+
+        self.assertEqual(result, 'Tekst õ')
+        conn.close()
+
+class TestCompressedStorage(unittest.TestCase):
+    """Test suite for compressed writes and in-place conversion."""
+
+    def setUp(self):
+        """Create a temporary database."""
+        _, self.database_path = use_temporary_database(self)
+
+    def write_rows(self, codec):
+        with DocumentWriter(self.database_path, codec=codec) as writer:
+            for full_text_id in range(1, 6):
+                writer.add(make_document_row(full_text_id, text_content_plain='Tekst õ', text_content_xml=SAMPLE_XML))
+
+    def read_rows(self):
+        conn = sqlite3.connect(self.database_path)
+        try:
+            return conn.execute(
+                "SELECT text_content_plain, plain_codec, text_content_xml, xml_codec FROM legal_document_texts "
+                "ORDER BY full_text_id"
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def test_writer_compresses_texts(self):
+        """Test that the writer stores BLOBs and records the codec per text."""
+        self.write_rows('zlib')
+
+        for plain_text, plain_codec, xml_text, xml_codec in self.read_rows():
+            self.assertEqual((plain_codec, xml_codec), ('zlib', 'zlib'))
+            self.assertIsInstance(xml_text, bytes)
+            self.assertEqual(decode_text(xml_text, xml_codec), SAMPLE_XML)
+            self.assertEqual(decode_text(plain_text, plain_codec), 'Tekst õ')
+
+    def test_convert_existing_database(self):
+        """Test that an uncompressed database is converted in place and back."""
+        self.write_rows('none')
+        self.assertTrue(all(row[1] is None and row[3] is None for row in self.read_rows()))
+
+        # The five documents share one plain text and one XML text
+        self.assertEqual(convert_database(self.database_path, 'zlib', batch_size=1), 2)
+        self.assertTrue(all(row[1] == 'zlib' and row[3] == 'zlib' for row in self.read_rows()))
+        self.assertEqual(convert_database(self.database_path, 'zlib'), 0)
+
+        self.assertEqual(convert_database(self.database_path, 'none'), 2)
+        self.assertEqual(self.read_rows()[0], ('Tekst õ', None, SAMPLE_XML, None))
+
+if __name__ == "__main__":
+    unittest.main()